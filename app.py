@@ -13,7 +13,9 @@ question on Ed Discussions.
 from consts import *
 from game2d import *
 from wave import *
+from replay import InputLog
 import json
+import os
 
 # PRIMARY RULE: Planetoids can only access attributes in wave.py via getters/setters
 # Planetoids is NOT allowed to access anything in models.py
@@ -67,13 +69,26 @@ class Planetoids(GameApp):
     # Invariant: _wave is a Wave object, or None if there is no wave currently active.
     #            _wave is only None if _state is STATE_INACTIVE.
     #
-    # Attribute _title: the game title
-    # Invariant: _title is a GLabel, or None if there is no title to display. It is None 
-    #            whenever the _state is not STATE_INACTIVE.
+    # Attribute _title: the large text of the overlay (the game title at first)
+    # Invariant: _title is a GLabel
     #
-    # Attribute _message: the currently active message
-    # Invariant: _message is a GLabel, or None if there is no message to display. It is 
-    #            only None if _state is STATE_ACTIVE.
+    # Attribute _message: the small text of the overlay, under the title
+    # Invariant: _message is a GLabel
+    #
+    # Attribute _overlay: the title and message, shown in front of the game
+    # Invariant: _overlay is a GScene with children _title and _message. It is 
+    #            retained by the view exactly when the state is not STATE_ACTIVE
+    #            (see show_overlay)
+    #
+    # Attribute _log: the input read by the current wave, for replays
+    # Invariant: _log is an InputLog, or None if _wave is None or RECORD_REPLAYS is False
+    #
+    # Attribute _hud: the labels retained by the view (see show_hud)
+    # Invariant: _hud is a list of GBitmapLabel objects
+    #
+    # Attribute _loader: the loader of the assets in ASSET_MANIFEST
+    # Invariant: _loader is an AssetLoader, or None if the first wave was never 
+    #            started. Once it is done, it stays done.
 
     # DO NOT MAKE A NEW INITIALIZER!
 
@@ -89,7 +104,8 @@ class Planetoids(GameApp):
         This method should make sure that all of the attributes satisfy the given
         invariants. When done, it sets the _state to STATE_INACTIVE and creates both 
         the title (in attribute _title) and a message (in attribute _message) saying 
-        that the user should press a key to play a game.
+        that the user should press a key to play a game. The two labels are made 
+        once, and reused for every later message.
         """
         # IMPLEMENT ME
         self._state = STATE_INACTIVE
@@ -98,9 +114,13 @@ class Planetoids(GameApp):
                         + GAME_HEIGHT / 2, font_name = TITLE_FONT)
         self._message = GLabel(text = "Press 's' to Start", font_size = MESSAGE_SIZE, \
                       font_name = MESSAGE_FONT, x = GAME_WIDTH/2, y = MESSAGE_OFFSET+GAME_HEIGHT/2)
+        self._overlay = GScene(children = [self._title, self._message])
         self._wave = None
+        self._log = None
+        self._hud = []
+        self._loader = None
         self._high_score = 0
-        self._high_score_label = GLabel(text = f"High\n Score:\n {self._high_score}", font_size = 20, \
+        self._high_score_label = GBitmapLabel(text = f"High\n Score:\n {self._high_score}", font_size = 20, \
                       font_name = MESSAGE_FONT, x = 400, y = 50)
 
     def update(self,dt):
@@ -125,8 +145,10 @@ class Planetoids(GameApp):
         
         STATE_LOADING: This is the state creates a new wave and shows it on the screen.
         The application switches to this state if the state was STATE_INACTIVE in the
-        previous frame, and the player pressed a key. This state only lasts one animation
-        frame before switching to STATE_ACTIVE.
+        previous frame, and the player pressed a key. The first time, it loads the 
+        assets in ASSET_MANIFEST in the background, and lasts until they are all loaded 
+        (showing the progress). Later, it only lasts one animation frame before 
+        switching to STATE_ACTIVE.
         
         STATE_ACTIVE: This is a session of normal gameplay. The player can move the
         ship and fire bullets. All of this should be handled inside of class Wave
@@ -160,12 +182,20 @@ class Planetoids(GameApp):
                 self._high_score = self._wave.get_score()
             self._high_score_label.text = f"High\n Score:\n {self._high_score}"
         if self._state == STATE_LOADING:
-            self._message = None
-            self._title = None
-            self._wave = Wave(self.load_json(DEFAULT_WAVE))
+            self.load_assets()
+        if self._state == STATE_LOADING and self._loader.done:
+            if not self._wave is None:
+                self._wave.close()
+            self._wave = Wave(self.load_wave())
+            self._log = None
+            if RECORD_REPLAYS:
+                self._log = InputLog(DEFAULT_WAVE, self._wave.get_seed())
             self._state = STATE_ACTIVE
         if self._wave != None:
-            if self._wave.get_lives() == 0 or self._wave.get_asteroid_count() == 0:
+            if self._wave.get_lives() == 0 or self._wave.is_cleared():
+                if self._state != STATE_COMPLETE and not self._log is None:
+                    self.save_log()
+                self._wave.close()
                 self._state = STATE_COMPLETE
             elif 0 < self._wave.get_lives() < SHIP_LIVES:
                 if self._state != STATE_PAUSED and self._wave.get_hit():
@@ -175,24 +205,95 @@ class Planetoids(GameApp):
             if self._state == STATE_CONTINUE:
                 self._wave.reset_ship()
                 self._wave.set_lives_label_text(f'Lives\n Left: \n{self._wave.get_lives()}')
-                self._wave.get_lives_label().draw(self.view)
                 self._state = STATE_ACTIVE          
             if self._state == STATE_ACTIVE:
+                if not self._log is None:
+                    self._log.record(self.input)
                 self._wave.update(dt, self.input)
+                if not self._log is None:
+                    self._log.add_hash(self._wave.get_state_hash())
                 self._wave.set_asteroid_label_text(f"Asteroids\n Left: \n{self._wave.get_asteroid_count()}")
-                self._wave.get_asteroid_label().draw(self.view)
                 self._wave.set_score_label_text(f"Score: \n{self._wave.get_score()}")
     
-    def draw_game_end(self, message1, message2):
-        """This method """
-        title = GLabel(text = message1, font_size = TITLE_SIZE, \
-                        x = GAME_WIDTH / 2, y = TITLE_OFFSET \
-                + GAME_HEIGHT / 2, font_name = TITLE_FONT)    
-        message = GLabel(text = message2, \
-                                    font_size = MESSAGE_SIZE, x = GAME_WIDTH / 2, y = MESSAGE_OFFSET \
-                        + GAME_HEIGHT / 2, font_name = MESSAGE_FONT)    
-        title.draw(self.view)
-        message.draw(self.view)
+    def load_assets(self):
+        """
+        Loads the assets for the game a little at a time, starting if necessary
+        
+        The first call starts an AssetLoader for the assets in ASSET_MANIFEST. 
+        Files are read in the background, so each call only takes a short time to 
+        finish the ones that are ready.
+        """
+        if self._loader is None:
+            self._loader = AssetLoader(self.load_json(ASSET_MANIFEST))
+        self._loader.update()
+
+    def load_wave(self):
+        """
+        Returns the compiled wave (or a new wave stream) DEFAULT_WAVE
+        
+        The wave is only parsed and checked the first time (or when the file 
+        changes), and restarts reuse the compiled wave. If WAVE_CACHE_FOLDER is 
+        set, the compiled wave is also saved there for the next time the game runs.
+        A wave stream is opened again for every wave instead (see open_wave).
+        """
+        folder = None
+        if WAVE_CACHE_FOLDER:
+            folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), WAVE_CACHE_FOLDER)
+        return open_wave(os.path.join(self.json, DEFAULT_WAVE), folder)
+
+    def save_log(self):
+        """
+        Saves the input of the current wave to REPLAY_FOLDER
+        
+        The file is named after the wave and its seed, so that replay.py can 
+        play it back.
+        """
+        folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), REPLAY_FOLDER)
+        os.makedirs(folder, exist_ok=True)
+        name = os.path.splitext(os.path.basename(DEFAULT_WAVE))[0]
+        self._log.save(os.path.join(folder, f"{name}-{self._log.get_seed()}.plog"))
+
+    def show_hud(self, labels):
+        """
+        Makes the given labels the ones retained by the view
+        
+        Retained labels stay on screen without being drawn every frame, and 
+        only cost time when their text changes. Labels retained before but not 
+        in the list are removed from the view.
+        
+        Parameter labels: the labels to show
+        Precondition: labels is a list of GBitmapLabel objects
+        """
+        for label in self._hud:
+            if not label in labels:
+                self.view.remove(label)
+        for label in labels:
+            self.view.add(label, front=True)
+        self._hud = labels
+
+    def show_overlay(self, title, message):
+        """
+        Shows the given title and message in front of the game
+        
+        The overlay labels are never rebuilt. Their text is only rendered again 
+        when it changes, so a screen showing the same message costs almost 
+        nothing per frame.
+        
+        Parameter title: the large text
+        Precondition: title is a string
+        
+        Parameter message: the small text, under the title
+        Precondition: message is a string
+        """
+        self._title.text = title
+        self._message.text = message
+        self.view.add(self._overlay, front=True)
+
+    def hide_overlay(self):
+        """
+        Removes the title and message from the screen
+        """
+        self.view.remove(self._overlay)
 
     def draw(self):
         """
@@ -207,22 +308,29 @@ class Planetoids(GameApp):
         See the example subcontroller.py from class.
         """
         # IMPLEMENT ME
-        if self._message is not None:
-            self._message.draw(self.view)
-            self._title.draw(self.view)
+        if self._state == STATE_INACTIVE:
+            self.show_overlay("Planetoids", "Press 's' to Start")
+        elif self._state == STATE_LOADING:
+            self.show_overlay("Loading", f"{int(self._loader.progress * 100)}%")
+        elif self._state == STATE_ACTIVE:
+            self.hide_overlay()
 
-        if self._state == STATE_LOADING or self._state == STATE_ACTIVE:
+        if self._state == STATE_ACTIVE:
+            self.show_hud([self._wave.get_asteroid_label(), self._wave.get_lives_label(), 
+                           self._wave.get_score_label(), self._high_score_label])
             self._wave.draw(self.view)  
             self._high_score_label.draw(self.view)  
+        else:
+            self.show_hud([])
 
         if self._state == STATE_COMPLETE:
             text1 = "Game Over!" if self._wave.get_lives() == 0 else "Congrats!"
             text2 = "Press 'r' to restart" if self._wave.get_lives() == 0 else \
                 "You completed the game!\nPress 'r' to restart"
-            self.draw_game_end(text1, text2)
+            self.show_overlay(text1, text2)
         
         if self._state == STATE_PAUSED:
-            self.draw_game_end("Life Lost!", f"You have {self._wave.get_lives()} left. Press 's'")
+            self.show_overlay("Life Lost!", f"You have {self._wave.get_lives()} left. Press 's'")
 
     
     # HELPER METHODS FOR THE STATES GO HERE
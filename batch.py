@@ -0,0 +1,277 @@
+"""
+Batch simulation runner for Planetoids
+
+This module plays many headless games of Planetoids in parallel and collects
+the outcome of each one. Every combination of wave file and seed is one run, and
+the runs are spread over a pool of worker processes, so the batch scales with
+the number of cores.
+
+To play three waves with 100 seeds each, for at most 10000 frames per run,
+using random input, type
+
+    python batch.py Data/wave1.json Data/wave2.json Data/wave3.json \\
+        --seeds 100 --frames 10000 --policy random --output results.csv
+
+Wave files may also be directories or glob patterns (e.g. 'generated/*.json'),
+and may be wave streams (see wavefile.py).
+The output is a CSV file, or a JSON Lines file if its name ends in '.jsonl'.
+Each row records the wave, seed and policy, and the final score, lives,
+number of frames played, whether (and when) the wave was cleared, and the
+number of asteroids remaining.
+"""
+from simulate import *
+from wavefile import STREAM_EXTENSION
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import random
+import glob
+import time
+import csv
+
+# The keys that the input policies may hold down
+POLICY_KEYS = ('left', 'right', 'up', 'spacebar')
+
+# The number of frames a random policy holds the same keys
+POLICY_HOLD = 15
+
+# The columns of the result file, in order
+RESULT_FIELDS = ['wave', 'seed', 'policy', 'score', 'lives', 'frames', 'cleared',
+                 'frames_to_clear', 'asteroids', 'seconds']
+
+
+class RandomPolicy(object):
+    """
+    An input policy that holds a random set of keys, changing every few frames.
+
+    Each key in POLICY_KEYS is held with probability one half. The keys change
+    every POLICY_HOLD frames. The choices only depend on the seed.
+    """
+    # Attribute _rng: the random number generator for this policy
+    # Invariant: _rng is a random.Random object
+
+    def __init__(self, seed):
+        """
+        Initializes a random policy
+
+        Parameter seed: the seed for the random choices
+        Precondition: seed is an int
+        """
+        self._rng = random.Random(seed)
+
+    def keys(self, frame, wave):
+        """
+        Returns the keys to hold down for this frame, or None to keep the same keys
+
+        Parameter frame: the number of frames played so far
+        Precondition: frame is an int >= 0
+
+        Parameter wave: the wave being played
+        Precondition: wave is a Wave object
+        """
+        if frame % POLICY_HOLD == 0:
+            return [k for k in POLICY_KEYS if self._rng.random() < 0.5]
+        return None
+
+
+class ScriptedPolicy(object):
+    """
+    An input policy that follows a fixed script.
+
+    A script is a list of [frame, keys] entries, sorted by frame. Starting at
+    the given frame, exactly the listed keys are held down. A script may be
+    read from a JSON file containing such a list.
+    """
+    # Attribute _script: the key changes, indexed by frame
+    # Invariant: _script is a dict mapping ints >= 0 to lists of strings
+
+    def __init__(self, script):
+        """
+        Initializes a scripted policy
+
+        Parameter script: the script, or the name of a JSON file holding one
+        Precondition: script is a list of [frame, keys] pairs, or a string
+        """
+        if type(script) == str:
+            with open(script) as f:
+                script = json.load(f)
+        self._script = {int(frame): list(keys) for (frame, keys) in script}
+
+    def keys(self, frame, wave):
+        """
+        Returns the keys to hold down for this frame, or None to keep the same keys
+
+        Parameter frame: the number of frames played so far
+        Precondition: frame is an int >= 0
+
+        Parameter wave: the wave being played
+        Precondition: wave is a Wave object
+        """
+        return self._script.get(frame)
+
+
+def make_policy(name, seed):
+    """
+    Returns the input policy with the given name
+
+    The name is 'random', 'idle' (no keys), 'spin' (turn left and fire), or the
+    name of a JSON script file (see ScriptedPolicy).
+
+    Parameter name: the policy name
+    Precondition: name is a string
+
+    Parameter seed: the seed for the run
+    Precondition: seed is an int
+    """
+    if name == 'random':
+        return RandomPolicy(seed)
+    elif name == 'idle':
+        return ScriptedPolicy([[0, []]])
+    elif name == 'spin':
+        return ScriptedPolicy([[0, ['left', 'spacebar']]])
+    return ScriptedPolicy(name)
+
+
+def play(wave, seed, frames, policy):
+    """
+    Returns the outcome of a single headless run as a dict
+
+    The keys of the dict are those in RESULT_FIELDS.
+
+    Parameter wave: the wave file to play
+    Precondition: wave is a string accepted by load_wave
+
+    Parameter seed: the seed for the run
+    Precondition: seed is an int
+
+    Parameter frames: the maximum number of frames to play
+    Precondition: frames is an int >= 0
+
+    Parameter policy: the name of the input policy
+    Precondition: policy is a string accepted by make_policy
+    """
+    start = time.perf_counter()
+    driver = make_policy(policy, seed)
+    sim = Simulation(wave, seed=seed)
+    input = sim.get_input()
+    w = sim.get_wave()
+
+    while sim.get_frame() < frames and not sim.is_complete():
+        keys = driver.keys(sim.get_frame(), w)
+        if not keys is None:
+            input.set_keys(keys)
+        sim.step()
+
+    cleared = w.is_cleared()
+    w.close()
+    return {'wave': wave, 'seed': seed, 'policy': policy,
+            'score': w.get_score(), 'lives': w.get_lives(),
+            'frames': sim.get_frame(), 'cleared': cleared,
+            'frames_to_clear': sim.get_frame() if cleared else None,
+            'asteroids': w.get_asteroid_count(),
+            'seconds': round(time.perf_counter() - start, 6)}
+
+
+def play_task(task):
+    """
+    Returns the outcome of play(*task); used by the worker processes
+
+    Parameter task: the arguments to play
+    Precondition: task is a tuple (wave, seed, frames, policy)
+    """
+    return play(*task)
+
+
+def find_waves(names):
+    """
+    Returns the wave files named by the given paths, directories and patterns
+
+    Parameter names: the wave files, directories of wave files, or glob patterns
+    Precondition: names is a list of strings
+    """
+    result = []
+    for name in names:
+        if os.path.isdir(name):
+            result.extend(sorted(glob.glob(os.path.join(name, '*.json')) + 
+                                 glob.glob(os.path.join(name, '*' + STREAM_EXTENSION))))
+        elif glob.has_magic(name):
+            result.extend(sorted(glob.glob(name)))
+        else:
+            result.append(name)
+    return result
+
+
+def run_batch(waves, seeds, frames, policy, output, workers=None):
+    """
+    Plays every wave with every seed in parallel, writing the outcomes to output
+
+    Returns the number of runs played.
+
+    Parameter waves: the wave files to play
+    Precondition: waves is a list of strings accepted by load_wave
+
+    Parameter seeds: the seeds to play each wave with
+    Precondition: seeds is a list of ints
+
+    Parameter frames: the maximum number of frames per run
+    Precondition: frames is an int >= 0
+
+    Parameter policy: the name of the input policy
+    Precondition: policy is a string accepted by make_policy
+
+    Parameter output: the result file (JSON Lines if it ends in '.jsonl', else CSV)
+    Precondition: output is a string
+
+    Parameter workers: the number of worker processes (None for one per core)
+    Precondition: workers is None or an int > 0
+    """
+    tasks = [(wave, seed, frames, policy) for wave in waves for seed in seeds]
+    workers = workers or os.cpu_count() or 1
+    chunk = max(1, len(tasks) // (workers * 4))
+    jsonl = output.lower().endswith('.jsonl')
+
+    count = 0
+    with open(output, 'w', newline='') as f:
+        writer = None if jsonl else csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+        if writer:
+            writer.writeheader()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for result in pool.map(play_task, tasks, chunksize=chunk):
+                if writer:
+                    writer.writerow(result)
+                else:
+                    f.write(json.dumps(result) + '\n')
+                count += 1
+    return count
+
+
+def main(argv=None):
+    """
+    Runs the batch described by the command line arguments
+
+    Parameter argv: the command line arguments (None for sys.argv[1:])
+    Precondition: argv is None or a list of strings
+    """
+    parser = argparse.ArgumentParser(description='Play Planetoids waves headless, in parallel.')
+    parser.add_argument('waves', nargs='+',
+                        help='wave files, directories of wave files, or glob patterns')
+    parser.add_argument('--seeds', type=int, default=1, help='number of seeds per wave')
+    parser.add_argument('--first-seed', type=int, default=0, help='the first seed')
+    parser.add_argument('--frames', type=int, default=10000, help='maximum frames per run')
+    parser.add_argument('--policy', default='random',
+                        help="'random', 'idle', 'spin' or a JSON script file")
+    parser.add_argument('--workers', type=int, default=None,
+                        help='number of worker processes (default: one per core)')
+    parser.add_argument('--output', default='results.csv',
+                        help='result file (.csv, or .jsonl for JSON Lines)')
+    args = parser.parse_args(argv)
+
+    waves = find_waves(args.waves)
+    seeds = list(range(args.first_seed, args.first_seed + args.seeds))
+    start = time.perf_counter()
+    count = run_batch(waves, seeds, args.frames, args.policy, args.output, args.workers)
+    print('%d runs in %.2f seconds, written to %s' % (count, time.perf_counter() - start, args.output))
+
+
+# Application code
+if __name__ == '__main__':
+    main()
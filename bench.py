@@ -0,0 +1,438 @@
+"""
+Benchmark suite for Planetoids
+
+This module times the hot paths of the game (Wave.update, Wave.collide,
+Wave.remove_bullets, Wave.break_ast, Ship.turn and the construction of the
+game objects), each over a sweep of sizes, plus whole frames of the wave files
+in the Data folder. Like simulate.py, it runs headless, so it needs no display,
+and the drawing code is not timed.
+
+For every case, the benchmark reports the operations per second, the 50th, 90th
+and 99th percentile (and worst) time of a single operation, and the memory
+allocated per operation (the peak traced by tracemalloc, in a separate pass so
+that it does not slow down the timing). Every operation starts from the same
+state, so the numbers do not drift as asteroids break or bullets fly off.
+
+To run every benchmark and save the results as a baseline, type
+
+    python bench.py --output baseline.json
+
+and to check a later version of the code against it, type
+
+    python bench.py --baseline baseline.json --tolerance 0.15
+
+A case is flagged if it is more than 15% slower than the baseline, or if it
+allocates more than 15% more memory. The exit status is 1 if any case is
+flagged, so this can be used in a script. Use --only to run some of the
+benchmarks, and --asteroids, --bullets and --waves to change the sweeps.
+"""
+from simulate import *
+from generate import generate_wave
+import numpy as np
+import tracemalloc
+import argparse
+import platform
+import time
+import sys
+import gc
+
+# The version of the result file format
+BENCH_VERSION = 1
+
+# The seed of every wave and random choice in the benchmarks
+BENCH_SEED = 0
+
+# The time step of every frame, in seconds
+BENCH_DT = 1 / 60
+
+# The number of timed operations per case
+BENCH_FRAMES = 200
+
+# The number of operations before timing starts
+BENCH_WARMUP = 20
+
+# The number of operations traced for allocations per case
+BENCH_ALLOC_FRAMES = 20
+
+# The fraction a case may be slower (or allocate more) than its baseline
+BENCH_TOLERANCE = 0.10
+
+# The allocation (in KB) a case may gain on its baseline regardless of tolerance
+BENCH_ALLOC_SLACK = 1.0
+
+# The number of asteroids in the waves of the benchmarks that sweep something else
+BENCH_FIELD = 1000
+
+# The default sweeps
+ASTEROID_COUNTS = [100, 1000, 10000]
+BULLET_COUNTS = [0, 32, BULLET_POOL_SIZE]
+BREAK_COUNTS = [1, 16, 128]
+TURN_KEYS = ['none', 'left', 'left+up']
+OBJECT_KINDS = ['GEllipse', 'GImage', 'Ship']
+WAVE_FILES = ['wave1.json', 'wave2.json', 'wave3.json']
+
+
+def make_wave(asteroids, bullets=0):
+    """
+    Returns a new generated wave with the given number of asteroids and bullets
+
+    The bullets are spread over the screen, moving in random directions.
+
+    Parameter asteroids: the number of asteroids
+    Precondition: asteroids is an int >= 0
+
+    Parameter bullets: the number of bullets
+    Precondition: bullets is an int in 0..BULLET_POOL_SIZE
+    """
+    wave = Wave(generate_wave(asteroids, BENCH_SEED), BENCH_SEED)
+    rng = np.random.default_rng(BENCH_SEED)
+    positions = rng.uniform(0, 1, (bullets, 2)) * [GAME_WIDTH, GAME_HEIGHT]
+    theta = rng.uniform(0, 2 * np.pi, bullets)
+    pool = wave.get_pool()
+    for i in range(bullets):
+        pool.spawn((positions[i, 0], positions[i, 1]),
+                   (BULLET_SPEED * math.cos(theta[i]), BULLET_SPEED * math.sin(theta[i])))
+    return wave
+
+
+def make_input(keys):
+    """
+    Returns a new scripted input holding down the given keys
+
+    Parameter keys: the keys joined by '+', or 'none' for no keys
+    Precondition: keys is a string
+    """
+    input = GInput()
+    input.set_keys([] if keys == 'none' else keys.split('+'))
+    return input
+
+
+# BENCHMARK CASES
+# Each one returns a pair (setup, op) for the given parameter, where op does a
+# single operation and setup (if not None) puts back the state before each one.
+def case_update(asteroids):
+    """
+    Returns a case timing Wave.update with the given number of asteroids
+
+    The ship turns and fires every frame.
+
+    Parameter asteroids: the number of asteroids
+    Precondition: asteroids is an int >= 0
+    """
+    wave = make_wave(asteroids)
+    input = make_input('left+spacebar')
+    snapshot = wave.snapshot()
+    return (lambda: wave.restore(snapshot), lambda: wave.update(BENCH_DT, input))
+
+
+def case_collide(bullets):
+    """
+    Returns a case timing Wave.collide with the given number of bullets
+
+    Parameter bullets: the number of bullets
+    Precondition: bullets is an int in 0..BULLET_POOL_SIZE
+    """
+    wave = make_wave(BENCH_FIELD, bullets)
+    snapshot = wave.snapshot()
+    return (lambda: wave.restore(snapshot), wave.collide)
+
+
+def case_remove_bullets(bullets):
+    """
+    Returns a case timing Wave.remove_bullets with the given number of bullets
+
+    Parameter bullets: the number of bullets
+    Precondition: bullets is an int in 0..BULLET_POOL_SIZE
+    """
+    wave = make_wave(BENCH_FIELD, bullets)
+    snapshot = wave.snapshot()
+    return (lambda: wave.restore(snapshot), lambda: wave.remove_bullets(BENCH_DT))
+
+
+def case_break_ast(count):
+    """
+    Returns a case timing Wave.break_ast on the given number of asteroids
+
+    Parameter count: the number of asteroids to break
+    Precondition: count is an int > 0, no more than the large and medium
+    asteroids in a wave of BENCH_FIELD asteroids
+    """
+    wave = make_wave(BENCH_FIELD)
+    indices = np.flatnonzero(wave.get_field().get_sizes() > 0)[:count]
+    assert len(indices) == count, 'there are not %d asteroids to break' % count
+    theta = np.random.default_rng(BENCH_SEED).uniform(0, 2 * np.pi, count)
+    velocities = BULLET_SPEED * np.column_stack((np.cos(theta), np.sin(theta)))
+    snapshot = wave.snapshot()
+    return (lambda: wave.restore(snapshot), lambda: wave.break_ast(indices, velocities))
+
+
+def case_turn(keys):
+    """
+    Returns a case timing Ship.turn with the given keys held down
+
+    Parameter keys: the keys joined by '+', or 'none' for no keys
+    Precondition: keys is a string
+    """
+    ship = Ship(position=(GAME_WIDTH / 2, GAME_HEIGHT / 2), angle=90)
+    input = make_input(keys)
+    return (None, lambda: ship.turn(BENCH_DT, input))
+
+
+def case_construct(kind):
+    """
+    Returns a case timing the creation of a (headless) GObject
+
+    The objects are made like the ones in the game: a GEllipse the size of a 
+    bullet, a GImage of a large asteroid, or a Ship.
+
+    Parameter kind: the name of the class
+    Precondition: kind is one of OBJECT_KINDS
+    """
+    center = (GAME_WIDTH / 2, GAME_HEIGHT / 2)
+    if kind == 'GEllipse':
+        size = 2 * BULLET_RADIUS
+        return (None, lambda: GEllipse(x=center[0], y=center[1], width=size, height=size,
+                                       fillcolor=BULLET_COLOR))
+    elif kind == 'GImage':
+        size = 2 * LARGE_RADIUS
+        return (None, lambda: GImage(x=center[0], y=center[1], width=size, height=size,
+                                     source=LARGE_IMAGE))
+    elif kind == 'Ship':
+        return (None, lambda: Ship(position=center, angle=90))
+    assert False, '%s is not one of %s' % (repr(kind), OBJECT_KINDS)
+
+
+def case_frame(name):
+    """
+    Returns a case timing whole frames (Simulation.step) of the given wave file
+
+    The ship turns and fires every frame. The wave starts over once it is
+    complete, so that every frame is part of a live game.
+
+    Parameter name: the wave file
+    Precondition: name is a string accepted by find_wave
+    """
+    sim = Simulation(name, make_input('left+spacebar'), seed=BENCH_SEED)
+    wave = sim.get_wave()
+    snapshot = wave.snapshot()
+    def setup():
+        if sim.is_complete():
+            wave.restore(snapshot)
+    return (setup, sim.step)
+
+
+# The benchmarks, in the order that they run, with their default sweeps
+BENCHMARKS = {'update': (case_update, ASTEROID_COUNTS),
+              'collide': (case_collide, BULLET_COUNTS),
+              'remove_bullets': (case_remove_bullets, BULLET_COUNTS),
+              'break_ast': (case_break_ast, BREAK_COUNTS),
+              'turn': (case_turn, TURN_KEYS),
+              'construct': (case_construct, OBJECT_KINDS),
+              'frame': (case_frame, WAVE_FILES)}
+
+
+def measure(setup, op, frames=BENCH_FRAMES, warmup=BENCH_WARMUP,
+            alloc_frames=BENCH_ALLOC_FRAMES):
+    """
+    Returns the timings and allocations of the given operation, as a dict
+
+    The dict has the keys 'ops' (operations per second), 'p50_ms', 'p90_ms',
+    'p99_ms' and 'max_ms' (the time of one operation) and 'alloc_kb' (the
+    average peak memory allocated by one operation).
+
+    Parameter setup: the function to call before each operation, or None
+    Precondition: setup is None or a function with no arguments
+
+    Parameter op: the operation to time
+    Precondition: op is a function with no arguments
+
+    Parameter frames: the number of operations to time
+    Precondition: frames is an int > 0
+
+    Parameter warmup: the number of operations before timing starts
+    Precondition: warmup is an int >= 0
+
+    Parameter alloc_frames: the number of operations to trace for allocations
+    Precondition: alloc_frames is an int > 0
+    """
+    for i in range(warmup):
+        if setup:
+            setup()
+        op()
+
+    gc.collect()
+    times = np.empty(frames)
+    for i in range(frames):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        op()
+        times[i] = time.perf_counter() - start
+
+    peaks = np.empty(alloc_frames)
+    tracemalloc.start()
+    for i in range(alloc_frames):
+        if setup:
+            setup()
+        base = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        op()
+        peaks[i] = tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+
+    p50, p90, p99 = np.percentile(times, [50, 90, 99]) * 1000
+    return {'ops': round(frames / times.sum(), 1), 'p50_ms': round(p50, 4),
+            'p90_ms': round(p90, 4), 'p99_ms': round(p99, 4),
+            'max_ms': round(times.max() * 1000, 4), 'alloc_kb': round(peaks.mean() / 1024, 2)}
+
+
+def run_benchmarks(names, sweeps, frames=BENCH_FRAMES, warmup=BENCH_WARMUP, out=None):
+    """
+    Returns the results of the given benchmarks, as a dict keyed by case
+
+    Each case is named 'benchmark[parameter]' (e.g. 'update[1000]').
+
+    Parameter names: the benchmarks to run
+    Precondition: names is a list of keys of BENCHMARKS
+
+    Parameter sweeps: the parameters to run each benchmark with
+    Precondition: sweeps is a dict mapping each name to a list of parameters
+
+    Parameter frames: the number of operations to time per case
+    Precondition: frames is an int > 0
+
+    Parameter warmup: the number of operations before timing starts
+    Precondition: warmup is an int >= 0
+
+    Parameter out: the file to print each result to as it is ready, or None
+    Precondition: out is None or a text file
+    """
+    results = {}
+    for name in names:
+        for param in sweeps[name]:
+            setup, op = BENCHMARKS[name][0](param)
+            key = '%s[%s]' % (name, param)
+            results[key] = measure(setup, op, frames, warmup)
+            if out:
+                print(format_result(key, results[key]), file=out, flush=True)
+    return results
+
+
+def compare(results, baseline, tolerance=BENCH_TOLERANCE):
+    """
+    Returns a list of messages, one for each case that regressed from the baseline
+
+    A case regresses if its operations per second fall by more than tolerance,
+    or its allocations grow by more than tolerance (and BENCH_ALLOC_SLACK).
+    Cases missing from either side are ignored.
+
+    Parameter results: the new results
+    Precondition: results is a dict returned by run_benchmarks
+
+    Parameter baseline: the old results
+    Precondition: baseline is a dict returned by run_benchmarks
+
+    Parameter tolerance: the fraction a case may get worse
+    Precondition: tolerance is a number >= 0
+    """
+    messages = []
+    for key in results:
+        if not key in baseline:
+            continue
+        new = results[key]
+        old = baseline[key]
+        if new['ops'] < old['ops'] * (1 - tolerance):
+            messages.append('%s: %.1f ops/s, %.0f%% slower than %.1f' %
+                            (key, new['ops'], 100 * (1 - new['ops'] / old['ops']), old['ops']))
+        if new['alloc_kb'] > old['alloc_kb'] * (1 + tolerance) + BENCH_ALLOC_SLACK:
+            messages.append('%s: %.2f KB allocated per op, up from %.2f' %
+                            (key, new['alloc_kb'], old['alloc_kb']))
+    return messages
+
+
+def format_result(key, result):
+    """
+    Returns a line of the result table for the given case
+
+    Parameter key: the name of the case
+    Precondition: key is a string
+
+    Parameter result: the result of the case
+    Precondition: result is a dict returned by measure
+    """
+    return '%-28s %12.1f %9.4f %9.4f %9.4f %9.4f %10.2f' % (key, result['ops'],
+            result['p50_ms'], result['p90_ms'], result['p99_ms'], result['max_ms'],
+            result['alloc_kb'])
+
+
+def _parse_counts(text):
+    """
+    Returns the list of ints in the given comma-separated text
+
+    Parameter text: the numbers, separated by commas
+    Precondition: text is a string
+    """
+    return [int(value) for value in text.split(',')]
+
+
+def main(argv=None):
+    """
+    Runs the benchmarks described by the command line arguments
+
+    The exit status is 1 if a case regressed from the baseline.
+
+    Parameter argv: the command line arguments (None for sys.argv[1:])
+    Precondition: argv is None or a list of strings
+    """
+    parser = argparse.ArgumentParser(description='Benchmark the hot paths of Planetoids, headless.')
+    parser.add_argument('--only', action='append', choices=list(BENCHMARKS),
+                        help='a benchmark to run (may be repeated; default: all)')
+    parser.add_argument('--asteroids', type=_parse_counts, default=ASTEROID_COUNTS,
+                        help='asteroid counts for update, e.g. 100,1000,10000')
+    parser.add_argument('--bullets', type=_parse_counts, default=BULLET_COUNTS,
+                        help='bullet counts for collide and remove_bullets')
+    parser.add_argument('--breaks', type=_parse_counts, default=BREAK_COUNTS,
+                        help='asteroids broken at once for break_ast')
+    parser.add_argument('--waves', type=lambda text: text.split(','), default=WAVE_FILES,
+                        help='wave files for frame, e.g. wave1.json,wave2.json')
+    parser.add_argument('--frames', type=int, default=BENCH_FRAMES,
+                        help='timed operations per case')
+    parser.add_argument('--warmup', type=int, default=BENCH_WARMUP,
+                        help='operations before timing starts')
+    parser.add_argument('--output', default=None, help='the file to save the results in')
+    parser.add_argument('--baseline', default=None, help='the results to compare with')
+    parser.add_argument('--tolerance', type=float, default=BENCH_TOLERANCE,
+                        help='the fraction a case may be worse than the baseline')
+    args = parser.parse_args(argv)
+
+    sweeps = {name: BENCHMARKS[name][1] for name in BENCHMARKS}
+    sweeps.update(update=args.asteroids, collide=args.bullets, remove_bullets=args.bullets,
+                  break_ast=args.breaks, frame=args.waves)
+    names = args.only or list(BENCHMARKS)
+
+    print('%-28s %12s %9s %9s %9s %9s %10s' %
+          ('case', 'ops/s', 'p50 ms', 'p90 ms', 'p99 ms', 'max ms', 'alloc KB'))
+    results = run_benchmarks(names, sweeps, args.frames, args.warmup, sys.stdout)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'version': BENCH_VERSION, 'python': platform.python_version(),
+                       'machine': platform.machine(), 'frames': args.frames,
+                       'results': results}, f, indent=2)
+        print('Results written to %s' % args.output)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        assert baseline.get('version') == BENCH_VERSION, 'unsupported baseline version'
+        messages = compare(results, baseline['results'], args.tolerance)
+        for message in messages:
+            print('REGRESSION ' + message)
+        if messages:
+            sys.exit(1)
+        print('No regressions against %s (tolerance %.0f%%)' % (args.baseline, 100 * args.tolerance))
+
+
+# Application code
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,234 @@
+"""
+Collision module for Planetoids
+
+This module contains the collision detection that Wave uses to find which
+bullets hit which asteroids. Testing every bullet against every asteroid is
+far too slow once there are a few hundred bullets on screen, so the work is
+split into two phases, both written with NumPy so that they handle every
+object at once.
+
+The broadphase is a uniform grid (a spatial hash) that is rebuilt at the start
+of the collision step. A cell is as wide as a large asteroid, so two objects
+can only touch if they are in the same cell or in neighboring cells.
+
+The narrowphase computes the squared distance for every candidate pair from
+the broadphase in a single broadcast, and keeps the pairs that overlap.
+
+The screen wraps around, so an object that is about to leave one edge is really
+next to the objects at the opposite edge. To handle this, an object near an
+edge is stored a second time at the position where it would reappear, using
+the same DEAD_ZONE rules as Ship.update and AsteroidField.update.
+"""
+from consts import *
+import numpy as np
+
+# The multiplier used to combine a (column,row) pair into a single cell key
+CELL_STRIDE = 1 << 20
+
+# Below this many point/object pairs, skip the grid and test every pair
+BROADCAST_LIMIT = 4096
+
+
+def wrap_images(positions, margin):
+    """
+    Returns the positions of a set of objects and of their wrapped copies.
+
+    The result is a tuple (index,x,y) of arrays. The first len(positions)
+    entries are the objects themselves, in order. After that come the copies:
+    an object within margin of the edge of the dead zone gets an extra copy on
+    the other side of the screen, displaced by the same amount that Ship.update
+    and AsteroidField.update would move it. An object near a corner gets three
+    extra copies.
+
+    Parameter positions: the object centers
+    Precondition: positions is a float array of shape (n,2)
+
+    Parameter margin: how close to an edge an object must be to be copied
+    Precondition: margin is an int or float >= 0
+    """
+    x = positions[:, 0]
+    y = positions[:, 1]
+    index = np.arange(len(positions))
+
+    left = x - margin < -DEAD_ZONE
+    right = ~left & (x + margin > GAME_WIDTH + DEAD_ZONE)
+    dx = np.where(left, WRAP_WIDTH, -WRAP_WIDTH)
+    hasx = left | right
+
+    bottom = y - margin < -DEAD_ZONE
+    top = ~bottom & (y + margin > GAME_WIDTH + DEAD_ZONE)
+    dy = np.where(bottom, WRAP_HEIGHT_BOTTOM, -WRAP_HEIGHT_TOP)
+    hasy = bottom | top
+
+    both = hasx & hasy
+    ix = index[hasx]
+    iy = index[hasy]
+    ib = index[both]
+    return (np.concatenate((index, ix, iy, ib)),
+            np.concatenate((x, x[ix] + dx[ix], x[iy], x[ib] + dx[ib])),
+            np.concatenate((y, y[ix], y[iy] + dy[iy], y[ib] + dy[ib])))
+
+
+def first_hits(points, objects):
+    """
+    Returns the hits to resolve from a list of overlapping pairs.
+
+    Each point (e.g. a bullet) hits the first object (the one with the lowest
+    index) that it overlaps. If several points hit the same object, only the
+    first of those points (the one with the lowest index) counts; the others
+    are left untouched. The result is a tuple (points,objects) of index
+    arrays, sorted by point index, in which every point and every object
+    appears at most once.
+
+    Parameter points: the point index of each overlapping pair
+    Precondition: points is an int array, sorted in increasing order
+
+    Parameter objects: the object index of each overlapping pair
+    Precondition: objects is an int array of the same length as points, sorted
+    in increasing order for each point
+    """
+    points, first = np.unique(points, return_index=True)
+    objects = objects[first]
+    order = np.lexsort((points, objects))
+    objects, first = np.unique(objects[order], return_index=True)
+    points = points[order][first]
+    order = np.argsort(points)
+    return (points[order], objects[order])
+
+
+class SpatialHash(object):
+    """
+    A class representing a uniform grid over the playfield.
+
+    The grid is built from a set of circular objects (the asteroids) with the
+    method build, and is then queried with a set of circles (the bullets, or
+    the ship) with the method overlapping. Objects near an edge are stored
+    along with their wrapped copies, so overlaps across the screen edge are
+    found as well.
+
+    The cells are stored as a sorted array of cell keys, so a query is a
+    binary search for each of the 9 neighboring cells of every point.
+    """
+    # Attribute _size: the width and height of a single cell
+    # Invariant: _size is an int or float > 0
+    #
+    # Attribute _count: the number of objects in the grid (not counting copies)
+    # Invariant: _count is an int >= 0
+    #
+    # Attribute _keys: the cell key of every stored entry, sorted
+    # Invariant: _keys is an int array
+    #
+    # Attribute _index: the object index of every stored entry
+    # Invariant: _index is an int array the same length as _keys
+    #
+    # Attribute _x, _y, _r: the center and radius of every stored entry
+    # Invariant: _x, _y, _r are float arrays the same length as _keys
+
+    # GETTERS AND SETTERS (ONLY ADD IF YOU NEED THEM)
+    def get_size(self):
+        """
+        Returns self._size
+        """
+        return self._size
+
+    def get_count(self):
+        """
+        Returns self._count
+        """
+        return self._count
+
+    # INITIALIZER
+    def __init__(self, size=GRID_CELL_SIZE):
+        """
+        Initializes an empty grid
+
+        Parameter size: the width and height of a cell
+        Precondition: size is an int or float > 0, at least as large as the
+        sum of the radii of any two objects that can touch
+        """
+        assert type(size) in [int, float] and size > 0
+        self._size = size
+        self.build(np.zeros((0, 2)), np.zeros(0))
+
+    # PUBLIC METHODS
+    def build(self, positions, radii):
+        """
+        Replaces the contents of the grid with the given objects.
+
+        Parameter positions: the object centers
+        Precondition: positions is a float array of shape (n,2)
+
+        Parameter radii: the object radii
+        Precondition: radii is a float array of shape (n,)
+        """
+        index, x, y = wrap_images(positions, self._size)
+        keys = self._cell_keys(x, y)
+        order = np.argsort(keys, kind='stable')
+        self._count = len(positions)
+        self._keys = keys[order]
+        self._index = index[order]
+        self._x = x[order]
+        self._y = y[order]
+        self._r = radii[self._index]
+
+    def overlapping(self, positions, radii):
+        """
+        Returns the pairs of query circles and stored objects that overlap.
+
+        The result is a tuple (points,objects) of index arrays, sorted by point
+        and then by object. A pair appears once, even if the object overlaps
+        the query circle with more than one of its wrapped copies.
+
+        Parameter positions: the centers of the query circles
+        Precondition: positions is a float array of shape (m,2)
+
+        Parameter radii: the radii of the query circles
+        Precondition: radii is a float array of shape (m,), or a single number
+        """
+        m = len(positions)
+        radii = np.broadcast_to(np.asarray(radii, dtype=float), (m,))
+        if m * len(self._keys) <= BROADCAST_LIMIT:
+            points = np.repeat(np.arange(m), len(self._keys))
+            entries = np.tile(np.arange(len(self._keys)), m)
+        else:
+            points, entries = self._candidates(positions)
+
+        dx = self._x[entries] - positions[points, 0]
+        dy = self._y[entries] - positions[points, 1]
+        r = self._r[entries] + radii[points]
+        hit = dx*dx + dy*dy < r*r
+
+        width = self._count + 1
+        pairs = np.unique(points[hit] * width + self._index[entries[hit]])
+        return (pairs // width, pairs % width)
+
+    # HIDDEN METHODS
+    def _cell_keys(self, x, y):
+        """
+        Returns the cell keys for the given coordinates.
+
+        Parameter x, y: the coordinates
+        Precondition: x, y are float arrays of the same shape
+        """
+        col = np.floor(x / self._size).astype(np.int64)
+        row = np.floor(y / self._size).astype(np.int64)
+        return col * CELL_STRIDE + row
+
+    def _candidates(self, positions):
+        """
+        Returns the (point,entry) index pairs in neighboring cells.
+
+        Parameter positions: the centers of the query circles
+        Precondition: positions is a float array of shape (m,2)
+        """
+        base = self._cell_keys(positions[:, 0], positions[:, 1])
+        offsets = np.array([i * CELL_STRIDE + j for i in (-1, 0, 1) for j in (-1, 0, 1)])
+        query = (base[None, :] + offsets[:, None]).ravel()
+        lo = np.searchsorted(self._keys, query, side='left')
+        hi = np.searchsorted(self._keys, query, side='right')
+
+        counts = hi - lo
+        total = int(counts.sum())
+        points = np.repeat(np.tile(np.arange(len(positions)), len(offsets)), counts)
+        starts = np.repeat(lo - (np.cumsum(counts) - counts), counts)
+        return (points, starts + np.arange(total))
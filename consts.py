@@ -73,6 +73,15 @@ SMALL_RADIUS = 16
 # The speed of a small planetoid
 SMALL_SPEED  = 3
 
+# The planetoid size names, indexed by size class (smallest first)
+ASTEROID_SIZES  = [SMALL_ASTEROID, MEDIUM_ASTEROID, LARGE_ASTEROID]
+# The planetoid images, indexed by size class
+ASTEROID_IMAGES = [SMALL_IMAGE, MEDIUM_IMAGE, LARGE_IMAGE]
+# The planetoid radii, indexed by size class
+ASTEROID_RADII  = [SMALL_RADIUS, MEDIUM_RADIUS, LARGE_RADIUS]
+# The planetoid speeds, indexed by size class
+ASTEROID_SPEEDS = [SMALL_SPEED, MEDIUM_SPEED, LARGE_SPEED]
+
 ### BULLET CONSTANTS ###
 
 # The radius of a bullet (width/2 and height/2)
@@ -83,6 +92,19 @@ BULLET_SPEED  = 10
 BULLET_RATE   = 1
 # The color of a bullet
 BULLET_COLOR   = 'red'
+# The maximum number of bullets on screen at once (extra shots are dropped)
+BULLET_POOL_SIZE = 128
+
+### COLLISION CONSTANTS ###
+
+# The width and height of a broadphase grid cell (two large planetoids can just touch)
+GRID_CELL_SIZE = LARGE_RADIUS*2
+# The distance an object jumps horizontally when it wraps around the screen
+WRAP_WIDTH = GAME_WIDTH + 2 * DEAD_ZONE
+# The distance an object jumps when it wraps off the bottom of the screen
+WRAP_HEIGHT_BOTTOM = GAME_HEIGHT + 2 * DEAD_ZONE
+# The distance an object jumps when it wraps off the top of the screen
+WRAP_HEIGHT_TOP = GAME_WIDTH + 2 * DEAD_ZONE
 
 ### GAME CONSTANTS ###
 
@@ -116,10 +138,31 @@ MESSAGE_SIZE = 60
 # The y-offset for the message (the value to add to the center y value)
 MESSAGE_OFFSET = -70
 
+### REPLAY CONSTANTS ###
+
+# Whether to save the input of every wave to REPLAY_FOLDER (see replay.py)
+RECORD_REPLAYS = False
+# The folder (next to app.py) to save input logs in
+REPLAY_FOLDER = 'Replays'
+
+### SNAPSHOT CONSTANTS ###
+
+# The first bytes of a wave snapshot (see Wave.snapshot)
+SNAPSHOT_MAGIC = b'PWAV'
+# The version of the wave snapshot format
+SNAPSHOT_VERSION = 2
+
 ### JSON FILES ###
 
 # The default wave
 DEFAULT_WAVE  = 'wave1.json'
+# The assets to load before the first wave (see AssetLoader). Its atlas holds 
+# the planetoids of every size, so that they can be drawn together, each shrunk 
+# to the size it is drawn at (twice its radius).
+ASSET_MANIFEST = 'manifest.json'
+# The folder (next to app.py) to save compiled waves in (see wavefile.py), or 
+# None to only keep them in memory
+WAVE_CACHE_FOLDER = None
 
 ### USE COMMAND LINE ARGUMENTS TO CHANGE DEFAULT LEVEL FILE
 """
@@ -4,14 +4,28 @@ A module to support simple 2D game development.
 This module is a simple wrapper around Kivy interfaces to make 2D game development
 simpler for students in CS 1110.
 
+If the environment variable ``GAME2D_HEADLESS`` is set (to anything other than an
+empty string or 0), the module provides Kivy-free stand-ins instead, so that games
+can be simulated without a window.  See :mod:`game2d.headless`.
+
 Author: Walker M. White (wmw2)
 Date:   August 1, 2017 (Python 3 version)
 """
-from .gobject import GObject, GScene
-from .grectangle import GRectangle, GEllipse, GImage, GLabel
-from .gsprite import GSprite
-from .gtile import GTile
-from .gpath import GPath, GTriangle, GPolygon
-from .gview import GInput, GView
-from .sound import Sound, SoundLibrary
-from .app import GameApp
\ No newline at end of file
+import os
+
+HEADLESS = os.environ.get('GAME2D_HEADLESS','') not in ('','0')
+
+if HEADLESS:
+    from .headless import *
+else:
+    from .gobject import GObject, GScene
+    from .grectangle import GRectangle, GEllipse, GImage, GLabel
+    from .gsprite import GSprite
+    from .gtile import GTile
+    from .gbatch import GSpriteBatch, GEllipseBatch
+    from .gglyph import GBitmapLabel
+    from .gpath import GPath, GTriangle, GPolygon
+    from .gview import GInput, GView
+    from .sound import Sound, SoundLibrary
+    from .gloader import AssetLoader
+    from .app import GameApp
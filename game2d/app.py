@@ -26,6 +26,8 @@ import sys
 
 # Pull off the band aid
 import numpy as np
+from .gatlas import TextureAtlas, ATLAS_SIZE
+from .gcache import TextureCache
 
 class GameApp(kivy.app.App):
     """
@@ -39,15 +41,17 @@ class GameApp(kivy.app.App):
     method.  Overriding __init__ will break your game. Hence we have provided build as 
     an alternative.
     
-    :meth:`update`: This method updates the game state at the start of every animation
-    frame.  Any code that moves objects or processes user input (keyboard or mouse)
-    goes in this method.
+    :meth:`update`: This method updates the game state one simulation tick (see 
+    :attr:`tick_rate`).  Any code that moves objects or processes user input (keyboard 
+    or mouse) goes in this method.
     
     :meth:`draw`: This method draws all of the objects to the screen.  The only 
     thing you should have in this method are calls to ``self.view.draw()``.
     """
     # Class attribute for tracking textures (to reduce memory footprint)
-    TEXTURE_CACHE = {}
+    TEXTURE_CACHE = TextureCache()
+    # Class attribute for JSON files loaded ahead of time (see AssetLoader)
+    JSON_CACHE = {}
     
     
     # MUTABLE ATTRIBUTES
@@ -72,6 +76,45 @@ class GameApp(kivy.app.App):
         self._fps = value
         Clock.schedule_interval(self._refresh,1.0/self._fps)
     
+    @property
+    def tick_rate(self):
+        """
+        The number of simulation ticks per second.
+        
+        The game is simulated in fixed ticks, independent of the frame rate. The 
+        method :meth:`update` is called once per tick, always with ``dt`` equal to 
+        1/tick_rate.  A frame may run several ticks (if frames are slower than ticks) 
+        or none at all (if they are faster).  By default this value is 60.
+        
+        **Invariant**: Must be an int or float > 0.
+        """
+        return self._tickrate
+    
+    @tick_rate.setter
+    def tick_rate(self,value):
+        assert type(value) in [int,float], 'value %s is not a number' % repr(value)
+        assert value > 0, 'value %s is not positive' % repr(value)
+        self._tickrate = value
+    
+    @property
+    def max_substeps(self):
+        """
+        The maximum number of ticks to run in a single frame.
+        
+        If the game falls so far behind that it would need more ticks than this to 
+        catch up, the extra time is dropped and the game slows down instead. By 
+        default this value is 5.
+        
+        **Invariant**: Must be an int > 0.
+        """
+        return self._maxsteps
+    
+    @max_substeps.setter
+    def max_substeps(self,value):
+        assert type(value) == int, 'value %s is not an int' % repr(value)
+        assert value > 0, 'value %s is not positive' % repr(value)
+        self._maxsteps = value
+    
     
     # IMMUTABLE PROPERTIES
     @property
@@ -92,6 +135,19 @@ class GameApp(kivy.app.App):
         """
         return self._gheight
     
+    @property
+    def alpha(self):
+        """
+        The fraction of a tick that has passed since the last call to :meth:`update`.
+        
+        This is the time left in the tick accumulator, divided by the length of a tick.
+        Before each call to :meth:`draw`, it is copied to the ``alpha`` attribute of
+        the view, so objects can be drawn between their previous and current tick.
+        
+        **Invariant**: Must be a float in 0..1.
+        """
+        return min(self._accumulator*self._tickrate,1.0)
+    
     @property
     def view(self):
         """
@@ -192,7 +248,7 @@ class GameApp(kivy.app.App):
         return os.path.exists(os.path.join(cls.json,name))
     
     @classmethod
-    def load_texture(cls,name):
+    def load_texture(cls,name,owner=None):
         """
         Returns: The texture for the given file name, or None if it cannot be loaded
         
@@ -200,26 +256,74 @@ class GameApp(kivy.app.App):
         has already been loaded, it will return the cached texture.  Otherwise, it will
         load the texture and cache it before returning it.
         
+        If the image was packed by :meth:`build_atlas`, the texture returned is a 
+        region of the atlas texture.
+        
+        The cache has a memory budget (see :class:`TextureCache`), and drops the 
+        textures used least recently to stay within it.  If ``owner`` is given, the 
+        texture is pinned in the cache for as long as ``owner`` is alive, replacing 
+        any texture pinned before for ``owner``.
+        
         This method will crash if name is not a valid file.
         
         :param name: The file name
         :type name:  ``str``
+        
+        :param owner: The object that uses the texture
+        :type owner:  ``None`` or a :class:`GObject`
         """
         assert cls.is_image(name), '%s is not an image file' % repr(name)
-        if name in cls.TEXTURE_CACHE:
-            return cls.TEXTURE_CACHE[name]
+        if not owner is None:
+            cls.TEXTURE_CACHE.pin(owner,[name])
+        texture = cls.TEXTURE_CACHE.get(name)
+        if not texture is None:
+            return texture
         
         try:
             from kivy.core.image import Image
             image = Image(name)
             image.mipmaps = True
             texture = image.texture
-            cls.TEXTURE_CACHE[name] = texture
+            cls.TEXTURE_CACHE.add(name,texture)
         except:
             texture = None
         
         return texture
     
+    @classmethod
+    def build_atlas(cls,names=None,size=ATLAS_SIZE):
+        """
+        Returns: A new texture atlas of the given images, whose regions are now cached
+        
+        The images are packed into as few textures as possible (see 
+        :class:`TextureAtlas`).  Afterwards, :meth:`load_texture` returns the region 
+        of each packed image instead of a texture of its own.  Regions work exactly 
+        like textures, but objects whose regions share a page can be drawn together, 
+        such as in a single :class:`GSpriteBatch`.
+        
+        The names must refer to files in the **Images** folder.  If ``names`` is None, 
+        every image in that folder is packed.  A name may also be a pair [name, side], 
+        to shrink that image to at most side pixels wide and high (usually the size it 
+        is drawn at) before packing it.  This method needs a window, and so it should 
+        be called in :meth:`start` (or later), before the images are drawn.
+        
+        :param names: The file names of the images to pack, or [name, side] pairs
+        :type names:  ``list`` of ``str`` or pairs, or ``None``
+        
+        :param size: The largest width or height of an atlas texture
+        :type size:  ``int`` > 0
+        """
+        if names is None:
+            names = sorted(name for name in os.listdir(cls.images) if cls.is_image(name))
+        for name in names:
+            file = name if isinstance(name,str) else name[0]
+            assert cls.is_image(file), '%s is not an image file' % repr(file)
+        
+        atlas = TextureAtlas(cls.images,names,size)
+        for name in atlas.names:
+            cls.TEXTURE_CACHE.add(name,atlas.get_texture(name))
+        return atlas
+    
     @classmethod
     def unload_texture(cls,name):
         """
@@ -233,12 +337,7 @@ class GameApp(kivy.app.App):
         :type name:  ``str``
         """
         assert type(name) == str, '%s is not a valid texture name' % repr(name)
-        if name in cls.TEXTURE_CACHE:
-            texture = cls.TEXTURE_CACHE[name]
-            del cls.TEXTURE_CACHE[name]
-            return texture
-        
-        return None
+        return cls.TEXTURE_CACHE.remove(name)
     
     @classmethod
     def load_json(cls,name):
@@ -246,11 +345,15 @@ class GameApp(kivy.app.App):
         Returns: The JSON for the given file name, or None if it cannot be loaded
         
         The ``name`` must refer to the file in the **JSON** folder.  If the file is
-        not there, it will return None.
+        not there, it will return None.  If the file was loaded ahead of time by an 
+        :class:`AssetLoader`, it returns the loaded value, which should not be modified.
         
         :param name: The file name
         :type name:  ``str``
         """
+        if name in cls.JSON_CACHE:
+            return cls.JSON_CACHE[name]
+        
         if not cls.is_json(name):
             Logger.info('GameApp: No json file named %s.' % repr(name))
             return None
@@ -289,6 +392,9 @@ class GameApp(kivy.app.App):
         **You will never call the constructor or run yourself**.  That is handled for 
         you in the provided code.
         
+        The keywords ``fps``, ``tick_rate`` and ``max_substeps`` set the attributes of 
+        the same name.
+        
         :param keywords: dictionary of keyword arguments 
         :type keywords:  keys are attribute names
         """
@@ -307,6 +413,9 @@ class GameApp(kivy.app.App):
         Window.bind(on_request_close=self._exit)
         
         self._fps = f
+        self.tick_rate = keywords.pop('tick_rate', 60.0)
+        self.max_substeps = keywords.pop('max_substeps', 5)
+        self._accumulator = 0.0
         
         x = keywords.pop('left', None)
         y = keywords.pop('top', None)
@@ -390,9 +499,9 @@ class GameApp(kivy.app.App):
         """
         Updates the state of the game one animation frame.
         
-        This method is called 60x a second (depending on the ``fps``) to provide on-screen 
-        animation. Any code that moves objects or processes user input (keyboard or mouse)
-        goes in this method.
+        This method is called once per simulation tick, 60x a second by default (see 
+        ``tick_rate``), no matter how fast the screen is redrawn. Any code that moves 
+        objects or processes user input (keyboard or mouse) goes in this method.
         
         Think of this method as the body of the loop.  You will need to add attributes
         that represent the current animation state, so that they can persist across
@@ -446,11 +555,35 @@ class GameApp(kivy.app.App):
         :type dt:  ``int`` or ``float``
         """
         self.view.clear()
-        self.input._prestep()
-        self.update(dt)
-        self.input._poststep()
+        self._tick(dt)
+        self.view.alpha = self.alpha
+        self.view._sync()
         self.draw()
     
+    def _tick(self,dt):
+        """
+        Runs the simulation ticks owed after dt more seconds have passed.
+        
+        The time is added to an accumulator, and :meth:`update` is called once for 
+        every whole tick in the accumulator (but at most :attr:`max_substeps` times). 
+        Any time left over carries to the next frame.
+        
+        :param dt: time in seconds since last frame
+        :type dt:  ``int`` or ``float``
+        """
+        step = 1.0/self._tickrate
+        self._accumulator += dt
+        ticks = 0
+        # The tolerance keeps rounding error from dropping a tick
+        while self._accumulator >= step-1e-9 and ticks < self._maxsteps:
+            self.input._prestep()
+            self.update(step)
+            self.input._poststep()
+            self._accumulator = max(self._accumulator-step,0.0)
+            ticks += 1
+        if self._accumulator >= step:
+            self._accumulator %= step
+    
     def _setpaths(self):
         """
         Sets the resource paths to the application directory.
@@ -0,0 +1,238 @@
+"""
+A module to support packing many images into a few textures.
+
+Every image loaded by :meth:`GameApp.load_texture` normally gets a texture of its own.
+Objects with different textures can never be drawn with the same Mesh, so a scene that
+mixes several images needs at least one draw call per image.  This module packs images
+into a few large textures, called pages.  Each image becomes a region of its page, which
+has the same API as a texture, and so regions of the same page can be drawn together.
+"""
+from kivy.graphics.texture import Texture
+from kivy.core.image import ImageLoader
+import numpy as np
+import os.path
+
+# The largest width or height of an atlas page, in pixels
+ATLAS_SIZE = 4096
+
+# The empty pixels between two images on the same page
+ATLAS_PADDING = 4
+
+
+# #mark -
+class TextureAtlas(object):
+    """
+    A class representing a set of images packed into one or more pages.
+
+    The images are packed in rows (tallest images first), and each page is only as
+    large as the images on it.  An image too large for a page gets a page of its own.
+
+    An image may be given as a pair [name, side] instead of a name.  It is then shrunk
+    (keeping its shape) so that its width and height are at most side pixels, before
+    it is packed.  Source art is often much larger than the size it is drawn at, and
+    shrinking it to that size keeps the pages (and the GPU memory they pin) small.
+
+    The images are read when the atlas is made, but the page textures are only created
+    the first time they are needed, since that needs a window.  Use :meth:`get_texture`
+    to get the region of an image.
+    """
+
+    # IMMUTABLE PROPERTIES
+    @property
+    def names(self):
+        """
+        The names of the images in this atlas, in the order given.
+
+        **invariant**: Value is a ``list`` of ``str``.
+        """
+        return list(self._places)
+
+    @property
+    def pages(self):
+        """
+        The number of pages in this atlas.
+
+        **invariant**: Value is an ``int`` >= 0.
+        """
+        return len(self._pixels)
+
+
+    # BUILT-IN METHODS
+    def __init__(self,folder,names,size=ATLAS_SIZE,padding=ATLAS_PADDING):
+        """
+        Reads and packs the given images into a new atlas.
+
+        Images that cannot be read are skipped.
+
+        :param folder: the folder holding the images
+        :type folder:  ``str``
+
+        :param names: the file names of the images to pack, or [name, side] pairs
+        :type names:  ``list`` of ``str`` or pairs
+
+        :param size: the largest width or height of a page
+        :type size:  ``int`` > 0
+
+        :param padding: the empty pixels between two images
+        :type padding:  ``int`` >= 0
+        """
+        images = {}
+        sides = {}
+        for name in names:
+            if not isinstance(name,str):
+                sides[name[0]] = name[1]
+                name = name[0]
+            pixels = self._read(os.path.join(folder,name))
+            if not pixels is None:
+                images[name] = self._shrink(pixels,sides.get(name))
+        names = [name if isinstance(name,str) else name[0] for name in names]
+
+        # Pack the images into rows, tallest first
+        self._places = {}
+        shelves = []
+        order = sorted(images,key=lambda name: -images[name].shape[0])
+        for name in order:
+            h, w = images[name].shape[:2]
+            if w > size or h > size:
+                shelves.append([h,w,[(name,0)]])
+                continue
+            for shelf in shelves:
+                if shelf[1]+padding+w <= size and h <= shelf[0] and shelf[0] <= size:
+                    shelf[2].append((name,shelf[1]+padding))
+                    shelf[1] += padding+w
+                    break
+            else:
+                shelves.append([h,w,[(name,0)]])
+
+        # Stack the rows into pages
+        pages = []
+        for (h,w,row) in shelves:
+            fits = pages and pages[-1][0]+padding+h <= size and pages[-1][1] <= size
+            if fits and w <= size:
+                page = pages[-1]
+                top = page[0]+padding
+                page[0] = top+h
+                page[1] = max(page[1],w)
+            else:
+                page = [h,w,[]]
+                pages.append(page)
+                top = 0
+            page[2].extend((name,x,top) for (name,x) in row)
+
+        # Copy the pixels (top row first) and remember where each image went
+        self._pixels = []
+        for (height,width,places) in pages:
+            page = np.zeros((height,width,4),dtype=np.uint8)
+            for (name,x,y) in places:
+                h, w = images[name].shape[:2]
+                page[y:y+h,x:x+w] = images[name]
+                self._places[name] = (len(self._pixels),x,height-y-h,w,h)
+            self._pixels.append(page)
+        self._places = {name: self._places[name] for name in names if name in self._places}
+        self._textures = [None]*len(self._pixels)
+
+    def __contains__(self,name):
+        """
+        :return: True if the image ``name`` is in this atlas.
+        :rtype:  ``bool``
+        """
+        return name in self._places
+
+
+    # PUBLIC METHODS
+    def get_texture(self,name):
+        """
+        Returns the region of the given image, or None if it is not in this atlas.
+
+        The region is a Kivy texture, whose `tex_coords` select the image from its page.
+
+        :param name: the file name of the image
+        :type name:  ``str``
+        """
+        if not name in self._places:
+            return None
+        page, x, y, w, h = self._places[name]
+        if self._textures[page] is None:
+            pixels = self._pixels[page]
+            texture = Texture.create(size=(pixels.shape[1],pixels.shape[0]),
+                                     colorfmt='rgba',mipmap=True)
+            texture.blit_buffer(pixels[::-1].tobytes(),colorfmt='rgba',
+                                bufferfmt='ubyte',mipmap_generation=True)
+            self._textures[page] = texture
+        return self._textures[page].get_region(x,y,w,h)
+
+
+    # HIDDEN METHODS
+    def _read(self,path):
+        """
+        Returns the pixels of the given image, or None if it cannot be read.
+
+        The pixels are an array of shape (height,width,4), with the top row first.
+
+        :param path: the path to the image file
+        :type path:  ``str``
+        """
+        try:
+            data = ImageLoader.load(path,keep_data=True)._data[0]
+        except:
+            return None
+
+        channels = len(data.fmt)
+        if not data.fmt in ('rgba','bgra','rgb','bgr'):
+            return None
+        stride = len(data.data)//data.height
+        pixels = np.frombuffer(data.data,dtype=np.uint8).reshape(data.height,stride)
+        pixels = pixels[:,:data.width*channels].reshape(data.height,data.width,channels)
+        if data.fmt[0] == 'b':
+            pixels = pixels[:,:,[2,1,0]+[3]*(channels == 4)]
+        if channels == 3:
+            alpha = np.full((data.height,data.width,1),255,dtype=np.uint8)
+            pixels = np.concatenate((pixels,alpha),axis=2)
+        if not getattr(data,'flip_vertical',True):
+            pixels = pixels[::-1]
+        return pixels
+
+    def _shrink(self,pixels,side):
+        """
+        Returns the pixels scaled down to fit in a square of the given side.
+
+        Each new pixel is the average of the source pixels it covers, weighted by the
+        area covered.  Colors are averaged with premultiplied alpha, so that clear
+        pixels do not darken the edges.  Images that already fit are not changed.
+
+        :param pixels: the pixels of an image
+        :type pixels:  ``numpy.ndarray`` of shape (height,width,4)
+
+        :param side: the largest width and height (None to keep the size)
+        :type side:  ``int`` > 0 or ``None``
+        """
+        h, w = pixels.shape[:2]
+        if side is None or max(w,h) <= side:
+            return pixels
+        scale = side/max(w,h)
+        rows = self._weights(h,max(1,round(h*scale)))
+        cols = self._weights(w,max(1,round(w*scale)))
+
+        color = pixels.astype(np.float64)
+        color[:,:,:3] *= color[:,:,3:]/255.0
+        color = (rows @ color.transpose(2,0,1) @ cols.T).transpose(1,2,0)
+        alpha = color[:,:,3:]
+        color[:,:,:3] *= np.where(alpha > 0,255.0/np.maximum(alpha,1e-9),0)
+        return np.clip(np.round(color),0,255).astype(np.uint8)
+
+    def _weights(self,old,new):
+        """
+        Returns the matrix that averages old pixels (in a line) into new ones.
+
+        Entry [i,j] is the fraction of new pixel i covered by old pixel j.
+
+        :param old: the number of old pixels
+        :type old:  ``int`` > 0
+
+        :param new: the number of new pixels
+        :type new:  ``int`` between 1 and old
+        """
+        edges = np.arange(old+1)*(new/old)
+        lo = np.arange(new)[:,None]
+        cover = np.minimum(edges[None,1:],lo+1)-np.maximum(edges[None,:-1],lo)
+        return np.maximum(cover,0)
@@ -0,0 +1,455 @@
+"""
+A module to support drawing many copies of a shape at once.
+
+Every :class:`GImage` or :class:`GEllipse` has its own transform and its own Kivy
+instructions, so drawing hundreds of them means submitting hundreds of instructions
+every frame.  This module provides batches that draw any number of copies of the same
+image or ellipse with a single Kivy Mesh.  The vertices of the mesh are kept in a
+NumPy buffer, which is rewritten in place whenever the copies move.
+"""
+from kivy.graphics import *
+from kivy.graphics.instructions import *
+from .grectangle import GEllipse, GImage, GObject
+from .app import GameApp
+import numpy as np
+
+# The most vertices a single Mesh can hold (with 16-bit indices)
+MESH_VERTICES = 65535
+
+
+# #mark -
+class MeshBuffer(object):
+    """
+    A class representing the vertex buffer shared by a batch of identical shapes.
+
+    Each shape has the same number of vertices, and the same triangles.  The vertices
+    use the default Mesh format: a position and a texture coordinate, for 4 floats
+    each.  The buffer is split over as many meshes as needed to stay below the limit
+    of 16-bit indices.
+
+    This class is an implementation detail of the batches in this module.  You should
+    never need to use it directly.
+    """
+
+    # IMMUTABLE PROPERTIES
+    @property
+    def group(self):
+        """
+        The instruction group holding the meshes.
+
+        **invariant**: Value is an InstructionGroup.
+        """
+        return self._group
+
+    @property
+    def count(self):
+        """
+        The number of shapes uploaded to the meshes.
+
+        **invariant**: Value is an ``int`` >= 0.
+        """
+        return self._count
+
+
+    # BUILT-IN METHODS
+    def __init__(self,corners,triangles,texcoords=None):
+        """
+        Creates a new, empty vertex buffer.
+
+        :param corners: the number of vertices per shape
+        :type corners:  ``int`` > 0
+
+        :param triangles: the vertex indices of the triangles of a single shape
+        :type triangles:  sequence of ``int`` in 0..corners-1
+
+        :param texcoords: the texture coordinates of each vertex (None for all 0)
+        :type texcoords:  ``None`` or array of shape (corners,2)
+        """
+        self._corners = corners
+        self._shapes = MESH_VERTICES//corners
+        self._triangles = np.array(triangles,dtype=np.uint16)
+        self._texcoords = texcoords
+        self._texture = None
+        self._count = 0
+        self._verts = np.zeros((0,corners,4),dtype=np.float32)
+        self._index = []
+        self._group = InstructionGroup()
+        self._meshes = []
+
+
+    # PUBLIC METHODS
+    def reserve(self,count):
+        """
+        Returns the vertex array for the first count shapes, growing it if necessary.
+
+        The array has shape (count,corners,4).  The last two columns are the texture
+        coordinates, which are set whenever the array grows.  The caller should write
+        the positions to the first two columns, and then call :meth:`upload`.
+
+        :param count: the number of shapes
+        :type count:  ``int`` >= 0
+        """
+        if count > len(self._verts):
+            self._grow(max(count,2*len(self._verts)))
+        return self._verts[:count]
+
+    def upload(self,count):
+        """
+        Hands the vertices of the first count shapes to the meshes.
+
+        :param count: the number of shapes
+        :type count:  ``int`` >= 0
+        """
+        flat = memoryview(self._verts.reshape(-1))
+        needed = -(-count//self._shapes)
+
+        while len(self._meshes) < needed:
+            mesh = Mesh(mode='triangles',texture=self._texture)
+            self._meshes.append(mesh)
+            self._group.add(mesh)
+        while len(self._meshes) > needed:
+            self._group.remove(self._meshes.pop())
+
+        size = 4*self._corners
+        for pos in range(needed):
+            start = pos*self._shapes
+            shapes = min(count-start,self._shapes)
+            mesh = self._meshes[pos]
+            if len(mesh.indices) != len(self._triangles)*shapes:
+                mesh.indices = self._index[:len(self._triangles)*shapes]
+            mesh.vertices = flat[size*start:size*(start+shapes)]
+        self._count = count
+
+    def retexture(self,texture):
+        """
+        Changes the texture of the meshes, and the texture coordinates to match.
+
+        :param texture: the new texture
+        :type texture:  ``None`` or a Kivy texture
+        """
+        self._texture = texture
+        if texture and not self._texcoords is None:
+            self._texcoords = np.reshape(texture.tex_coords,(self._corners,2))
+        for mesh in self._meshes:
+            mesh.texture = texture
+        self._grow(len(self._verts))
+
+
+    # HIDDEN METHODS
+    def _grow(self,capacity):
+        """
+        Reallocates the vertex array to hold capacity shapes.
+
+        :param capacity: the number of shapes to hold
+        :type capacity:  ``int`` >= 0
+        """
+        verts = np.zeros((capacity,self._corners,4),dtype=np.float32)
+        if not self._texcoords is None:
+            verts[:,:,2:] = self._texcoords
+        self._verts = verts
+
+        shapes = min(capacity,self._shapes)
+        if len(self._index) < len(self._triangles)*shapes:
+            first = self._corners*np.arange(shapes,dtype=np.uint16)[:,None]
+            self._index = (first+self._triangles).ravel().tolist()
+
+
+# #mark -
+class GSpriteBatch(GImage):
+    """
+    A class representing many copies of one image, drawn as a single Mesh.
+
+    Every sprite in the batch has the same image (given by the attribute `source`) and
+    the same `width` and `height`.  The sprites only differ in their position and
+    (optionally) their angle, which are set all at once with :meth:`set_sprites`.
+
+    The sprite positions are relative to the attributes `x` and `y` of the batch, which
+    are 0 by default. Similarly, the `angle` and `scale` of the batch apply to the batch
+    as a whole.  If you define ``fillcolor``, every sprite is tinted by that color.
+
+    Sprites may also mix several images, listed in the attribute `sources`, and have
+    sizes of their own.  As a batch is a single Mesh, these images must all be regions
+    of the same texture, packed together with :meth:`GameApp.build_atlas`.
+
+    The method :meth:`contains` treats this object as a single sprite at `x` and `y`,
+    and so is not very useful.  Changes to `source`, `width` or `height` take effect
+    the next time the sprites are set.
+    """
+
+    # MUTABLE PROPERTIES
+    @property
+    def sources(self):
+        """
+        The images that the sprites of this batch can use.
+
+        By default, this is just the image `source`.  Every image must be in the same
+        texture atlas as `source` (see :meth:`GameApp.build_atlas`).
+
+        **invariant**: Value is a non-empty ``list`` of image file names.
+        """
+        return list(self._sources) if self._sources else [self.source]
+
+    @sources.setter
+    def sources(self,value):
+        assert len(value) > 0, '%s is empty' % repr(value)
+        for name in value:
+            assert GameApp.is_image(name), '%s is not an image file' % repr(name)
+        self._sources = list(value)
+        if self._defined:
+            self._reset()
+
+    # IMMUTABLE PROPERTIES
+    @property
+    def count(self):
+        """
+        The number of sprites in this batch.
+
+        **invariant**: Value is an ``int`` >= 0.
+        """
+        return self._buffer.count
+
+
+    # BUILT-IN METHODS
+    def __init__(self,**keywords):
+        """
+        Creates a new, empty sprite batch.
+
+        To use the constructor for this class, you should provide it with a list of
+        keyword arguments that initialize various attributes. For example, to batch
+        sprites of the image ``asteroid1.png``, with size 128x128, use the constructor::
+
+            GSpriteBatch(width=128,height=128,source='asteroid1.png')
+
+        This class supports the all same keywords as :class:`GImage`, as well as the
+        keyword ``sources``.  If you give ``sources`` without ``source``, the first
+        image of ``sources`` is used as ``source``.
+
+        :param keywords: dictionary of keyword arguments
+        :type keywords:  keys are attribute names
+        """
+        square = np.array([(0,0),(1,0),(1,1),(0,1)],dtype=np.float32)
+        self._buffer = MeshBuffer(4,[0,1,2,2,3,0],square)
+        self._coords = square[None]
+        self._defined = False
+        self._sources = None
+        if 'sources' in keywords:
+            self.sources = keywords['sources']
+            if not 'source' in keywords:
+                keywords['source'] = self._sources[0]
+        GImage.__init__(self,**keywords)
+
+
+    # PUBLIC METHODS
+    def set_sprites(self,positions,angles=None,images=None,sizes=None):
+        """
+        Sets the sprites of this batch, replacing any previous ones.
+
+        The vertex buffer is rewritten in place, and is only reallocated if it is too
+        small to hold all of the sprites.
+
+        :param positions: the sprite centers, one per row
+        :type positions:  array of shape (k,2)
+
+        :param angles: the sprite angles in degrees, or None for no rotation
+        :type angles:  ``None`` or array of shape (k,)
+
+        :param images: the image of each sprite, as a position in `sources` (or None
+            for the first image)
+        :type images:  ``None`` or int array of shape (k,)
+
+        :param sizes: the width and height of each sprite (or None for the `width` and
+            `height` of the batch); a single column gives square sprites
+        :type sizes:  ``None`` or array of shape (k,) or (k,2)
+        """
+        positions = np.asarray(positions)
+        k = len(positions)
+        verts = self._buffer.reserve(k)
+
+        if images is None:
+            verts[:,:,2:] = self._coords[0]
+        elif k > 0:
+            verts[:,:,2:] = self._coords[np.asarray(images)]
+
+        if sizes is None:
+            w = self.width/2.0
+            h = self.height/2.0
+        else:
+            sizes = np.asarray(sizes,dtype=np.float32).reshape(k,-1)
+            w = sizes[:,0,None]/2.0
+            h = sizes[:,-1,None]/2.0
+        dx = np.array([-1, 1, 1,-1],dtype=np.float32)*w
+        dy = np.array([-1,-1, 1, 1],dtype=np.float32)*h
+
+        if k == 0:
+            pass
+        elif angles is None:
+            np.add(positions[:,0,None],dx,out=verts[:,:,0],casting='unsafe')
+            np.add(positions[:,1,None],dy,out=verts[:,:,1],casting='unsafe')
+        else:
+            theta = np.radians(np.asarray(angles,dtype=float))
+            c = np.cos(theta)[:,None]
+            s = np.sin(theta)[:,None]
+            verts[:,:,0] = positions[:,0,None]+dx*c-dy*s
+            verts[:,:,1] = positions[:,1,None]+dx*s+dy*c
+
+        self._buffer.upload(k)
+
+
+    # HIDDEN METHODS
+    def _reset(self):
+        """
+        Resets the drawing cache.
+        """
+        # Texture must load FIRST
+        self._texture = GameApp.load_texture(self.source,self)
+        if self._texture:
+            if not self._set_width:
+                self.width = self._texture.width
+            if not self._set_height:
+                self.height = self._texture.height
+        else:
+            print('Failed to load',repr(self.source))
+
+        # THEN we can reset
+        GObject._reset(self)
+        if not self._fillcolor is None:
+            self._cache.add(self._fillcolor)
+        else:
+            self._cache.add(Color(1,1,1))
+
+        self._coords = self._regions(self._texture)
+        self._buffer.retexture(self._texture)
+        self._cache.add(self._buffer.group)
+        self._cache.add(PopMatrix())
+
+    def _regions(self,texture):
+        """
+        Returns the texture coordinates of each image in `sources`.
+
+        The value returned is an array of shape (n,4,2), where n is the number of
+        sources.  This method asserts that every image is a region of texture.
+
+        :param texture: the texture of the image `source`
+        :type texture:  a Kivy texture, or None
+        """
+        coords = []
+        GameApp.TEXTURE_CACHE.pin(self,[self.source]+self.sources)
+        for name in self.sources:
+            region = GameApp.load_texture(name)
+            if texture is None or region is None:
+                coords.append([(0,0),(1,0),(1,1),(0,1)])
+                continue
+            assert region.id == texture.id, \
+                '%s is not in the same atlas as %s' % (repr(name),repr(self.source))
+            coords.append(np.reshape(region.tex_coords,(4,2)))
+        return np.array(coords,dtype=np.float32)
+
+
+# #mark -
+class GEllipseBatch(GEllipse):
+    """
+    A class representing many copies of one solid ellipse, drawn as a single Mesh.
+
+    This is the fastest way to draw a stream of identical dots, such as bullets. Every
+    ellipse in the batch has the same `width`, `height` and `fillcolor`, and they only
+    differ in their position, which is set for all of them at once with
+    :meth:`set_positions`.  Each ellipse is approximated by a polygon with `segments`
+    sides.
+
+    The positions are relative to the attributes `x` and `y` of the batch, which are 0
+    by default.  The ellipses have no border, so ``linecolor`` and ``linewidth`` are
+    ignored. Changes to `width`, `height` or `segments` take effect the next time the
+    positions are set.
+    """
+
+    # MUTABLE PROPERTIES
+    @property
+    def segments(self):
+        """
+        The number of sides of the polygon approximating each ellipse.
+
+        **invariant**: Value must be an ``int`` >= 3.
+        """
+        return self._segments
+
+    @segments.setter
+    def segments(self,value):
+        assert type(value) == int, '%s is not an int' % repr(value)
+        assert value >= 3, '%s is less than 3' % repr(value)
+        self._segments = value
+        fan = []
+        for side in range(value):
+            fan.extend([0,side+1,(side+1) % value+1])
+        self._buffer = MeshBuffer(value+1,fan)
+        if self._defined:
+            self._reset()
+
+    # IMMUTABLE PROPERTIES
+    @property
+    def count(self):
+        """
+        The number of ellipses in this batch.
+
+        **invariant**: Value is an ``int`` >= 0.
+        """
+        return self._buffer.count
+
+
+    # BUILT-IN METHODS
+    def __init__(self,**keywords):
+        """
+        Creates a new, empty ellipse batch.
+
+        To use the constructor for this class, you should provide it with a list of
+        keyword arguments that initialize various attributes. For example, to batch
+        red dots of radius 2, use the constructor::
+
+            GEllipseBatch(width=4,height=4,fillcolor='red')
+
+        This class supports the all same keywords as :class:`GEllipse` plus the
+        additional keyword ``segments`` (which is 12 by default).
+
+        :param keywords: dictionary of keyword arguments
+        :type keywords:  keys are attribute names
+        """
+        self._defined = False
+        self.segments = keywords['segments'] if 'segments' in keywords else 12
+        GEllipse.__init__(self,**keywords)
+
+
+    # PUBLIC METHODS
+    def set_positions(self,positions):
+        """
+        Sets the ellipse centers of this batch, replacing any previous ones.
+
+        The vertex buffer is rewritten in place, and is only reallocated if it is too
+        small to hold all of the ellipses.
+
+        :param positions: the ellipse centers, one per row
+        :type positions:  array of shape (k,2)
+        """
+        positions = np.asarray(positions)
+        k = len(positions)
+        verts = self._buffer.reserve(k)
+
+        if k > 0:
+            theta = np.linspace(0,2*np.pi,self._segments,endpoint=False)
+            dx = np.concatenate(([0],np.cos(theta)*self.width/2.0)).astype(np.float32)
+            dy = np.concatenate(([0],np.sin(theta)*self.height/2.0)).astype(np.float32)
+            np.add(positions[:,0,None],dx,out=verts[:,:,0],casting='unsafe')
+            np.add(positions[:,1,None],dy,out=verts[:,:,1],casting='unsafe')
+
+        self._buffer.upload(k)
+
+
+    # HIDDEN METHODS
+    def _reset(self):
+        """
+        Resets the drawing cache.
+        """
+        GObject._reset(self)
+        if not self._fillcolor is None:
+            self._cache.add(self._fillcolor)
+            self._cache.add(self._buffer.group)
+        self._cache.add(PopMatrix())
+
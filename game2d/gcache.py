@@ -0,0 +1,261 @@
+"""
+A module to support a texture cache with a memory budget.
+
+Textures are expensive to load, so :class:`GameApp` keeps every texture it loads in a
+cache.  This module provides that cache.  It keeps track of the memory used by each
+texture, and once the total goes over a budget, it drops the textures that were used
+least recently.  Textures still used by a live object are pinned, and are never dropped.
+"""
+from collections import OrderedDict
+import weakref
+
+# The memory budget of the texture cache, in bytes
+TEXTURE_BUDGET = 256*1024*1024
+
+# The bytes per pixel of each texture color format (any other format is 4)
+TEXTURE_DEPTHS = {'rgb':3, 'bgr':3, 'luminance':1, 'alpha':1, 'luminance_alpha':2}
+
+
+# #mark -
+class TextureCache(object):
+    """
+    A class representing the textures loaded by a game, by file name.
+
+    The cache works like a dictionary, through the methods :meth:`get`, :meth:`add`
+    and :meth:`remove`.  Each texture is charged its width times its height times its
+    bytes per pixel (and a third more if it has mipmaps).  A region of a texture atlas
+    is charged its whole atlas texture, but only once (by GL texture id), no matter how
+    many regions of that atlas are in the cache.
+
+    A texture is pinned while an object that uses it is alive (see :meth:`pin`).  If
+    every texture is pinned, the cache may go over its budget.
+    """
+
+    # MUTABLE PROPERTIES
+    @property
+    def budget(self):
+        """
+        The most memory that the textures in this cache should use, in bytes.
+
+        Lowering the budget drops textures right away, if necessary.
+
+        **invariant**: Value is an ``int`` >= 0.
+        """
+        return self._budget
+
+    @budget.setter
+    def budget(self,value):
+        assert type(value) == int, 'value %s is not an int' % repr(value)
+        assert value >= 0, 'value %s is negative' % repr(value)
+        self._budget = value
+        self._evict()
+
+    # IMMUTABLE PROPERTIES
+    @property
+    def size(self):
+        """
+        The memory used by the textures in this cache, in bytes.
+
+        **invariant**: Value is an ``int`` >= 0.
+        """
+        return sum(self._bytes.values())
+
+    @property
+    def hits(self):
+        """
+        The number of calls to :meth:`get` that found their texture.
+
+        **invariant**: Value is an ``int`` >= 0.
+        """
+        return self._hits
+
+    @property
+    def misses(self):
+        """
+        The number of calls to :meth:`get` that did not find their texture.
+
+        **invariant**: Value is an ``int`` >= 0.
+        """
+        return self._misses
+
+    @property
+    def evictions(self):
+        """
+        The number of textures dropped to stay within the budget.
+
+        **invariant**: Value is an ``int`` >= 0.
+        """
+        return self._evictions
+
+    @property
+    def stats(self):
+        """
+        A summary of this cache, for monitoring.
+
+        The summary is a dictionary with the keys 'entries', 'pinned', 'size',
+        'budget', 'hits', 'misses' and 'evictions'.
+
+        **invariant**: Value is a ``dict``.
+        """
+        return {'entries': len(self._textures), 'pinned': len(self._pinned()),
+                'size': self.size, 'budget': self._budget, 'hits': self._hits,
+                'misses': self._misses, 'evictions': self._evictions}
+
+
+    # BUILT-IN METHODS
+    def __init__(self,budget=TEXTURE_BUDGET):
+        """
+        Creates a new, empty texture cache.
+
+        :param budget: the memory budget in bytes
+        :type budget:  ``int`` >= 0
+        """
+        self._textures = OrderedDict()
+        self._bytes = {}
+        self._users = {}
+        self._pins = weakref.WeakKeyDictionary()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self.budget = budget
+
+    def __contains__(self,name):
+        """
+        :return: True if the texture for ``name`` is in this cache.
+        :rtype:  ``bool``
+        """
+        return name in self._textures
+
+    def __len__(self):
+        """
+        :return: The number of textures in this cache.
+        :rtype:  ``int``
+        """
+        return len(self._textures)
+
+
+    # PUBLIC METHODS
+    def get(self,name):
+        """
+        Returns the texture for the given file name, or None if it is not cached.
+
+        The texture becomes the one used most recently.
+
+        :param name: the file name
+        :type name:  ``str``
+        """
+        if name in self._textures:
+            self._hits += 1
+            self._textures.move_to_end(name)
+            return self._textures[name]
+        self._misses += 1
+        return None
+
+    def add(self,name,texture):
+        """
+        Adds the texture for the given file name, replacing any previous one.
+
+        Older textures are dropped if the cache goes over its budget, but never the
+        texture just added.
+
+        :param name: the file name
+        :type name:  ``str``
+
+        :param texture: the texture (or atlas region) to cache
+        :type texture:  a Kivy texture
+        """
+        self.remove(name)
+        self._textures[name] = texture
+        key = texture.id
+        if self._users.get(key,0) == 0:
+            self._bytes[key] = self._measure(texture)
+        self._users[key] = self._users.get(key,0)+1
+        self._evict()
+
+    def remove(self,name):
+        """
+        Returns the texture for the given file name after removing it from the cache.
+
+        This method returns None if the texture is not cached.  It removes the texture
+        even if it is pinned.
+
+        :param name: the file name
+        :type name:  ``str``
+        """
+        if not name in self._textures:
+            return None
+        texture = self._textures.pop(name)
+        key = texture.id
+        self._users[key] -= 1
+        if self._users[key] == 0:
+            del self._users[key]
+            del self._bytes[key]
+        return texture
+
+    def pin(self,obj,names):
+        """
+        Pins the textures for the given file names while obj is alive.
+
+        The names replace any pinned before for obj, so an object that changes its
+        image should pin its new images.  Pinning an empty list unpins the textures
+        of obj.  The names do not need to be in the cache yet.
+
+        :param obj: the object using the textures
+        :type obj:  any object that can be weakly referenced
+
+        :param names: the file names
+        :type names:  ``list`` of ``str``
+        """
+        if names:
+            self._pins[obj] = frozenset(names)
+        elif obj in self._pins:
+            del self._pins[obj]
+
+    def clear(self):
+        """
+        Removes every texture from this cache, pinned or not.
+        """
+        self._textures.clear()
+        self._bytes.clear()
+        self._users.clear()
+
+
+    # HIDDEN METHODS
+    def _evict(self):
+        """
+        Drops the least recently used textures until the cache fits its budget.
+
+        Pinned textures and the texture used most recently are never dropped.
+        """
+        if self.size <= self._budget or len(self._textures) < 2:
+            return
+        pinned = self._pinned()
+        for name in list(self._textures)[:-1]:
+            if not name in pinned:
+                self.remove(name)
+                self._evictions += 1
+                if self.size <= self._budget:
+                    return
+
+    def _pinned(self):
+        """
+        Returns the set of file names pinned by a live object.
+        """
+        return frozenset().union(*self._pins.values())
+
+    def _measure(self,texture):
+        """
+        Returns the memory used by the GL texture behind the given texture, in bytes.
+
+        For a region, this is the memory of its whole atlas texture, which is found
+        from the fraction of the atlas that the region covers.
+
+        :param texture: the texture or atlas region
+        :type texture:  a Kivy texture
+        """
+        width  = round(texture.width/abs(texture.uvsize[0]))
+        height = round(texture.height/abs(texture.uvsize[1]))
+        size = width*height*TEXTURE_DEPTHS.get(texture.colorfmt,4)
+        if texture.mipmap:
+            size += size//3
+        return size
@@ -0,0 +1,389 @@
+"""
+A module to support fast text that changes often.
+
+A :class:`GLabel` renders its whole text into a new texture every time the text
+changes.  This module instead renders every character of a font once, into a single
+texture called a glyph atlas.  A :class:`GBitmapLabel` then draws its text as one
+textured quad per character, all in a single Mesh, so changing the text only rewrites
+the vertices.
+"""
+from kivy.graphics import *
+from kivy.graphics.instructions import *
+from kivy.graphics.texture import Texture
+from kivy.core.text import Label as CoreLabel
+from .grectangle import GRectangle, GObject
+from .gbatch import MeshBuffer
+from .app import GameApp
+import numpy as np
+
+# The characters in a glyph atlas by default (printable ASCII)
+GLYPH_CHARSET = ''.join(map(chr,range(32,127)))
+
+# The width of a glyph atlas in pixels (the height grows to fit)
+GLYPH_ATLAS_WIDTH = 512
+
+
+# #mark -
+class GlyphAtlas(object):
+    """
+    A class representing the characters of one font, rendered into one texture.
+
+    Each character is rendered by Kivy in white, so that a label can tint it with any
+    color.  The characters are packed into rows of the atlas, with a pixel of space
+    between them to keep them from bleeding into one another.
+
+    Atlases are expensive to make, so you should get them with :meth:`get`, which makes
+    each atlas once and then reuses it.  The texture itself is only created the first
+    time it is used, since it needs a window.
+    """
+    # Class attribute for the atlases made so far, keyed by font name and size
+    ATLAS_CACHE = {}
+
+    # IMMUTABLE PROPERTIES
+    @property
+    def line_height(self):
+        """
+        The height of a line of text in this font.
+
+        **invariant**: Value is an ``int`` >= 0.
+        """
+        return self._lineheight
+
+    @property
+    def texture(self):
+        """
+        The texture holding every character of this atlas.
+
+        **invariant**: Value is a Kivy texture.
+        """
+        if self._texture is None:
+            height, width = self._pixels.shape[:2]
+            self._texture = Texture.create(size=(width,height),colorfmt='rgba')
+            self._texture.blit_buffer(self._pixels[::-1].tobytes(),colorfmt='rgba',
+                                      bufferfmt='ubyte')
+        return self._texture
+
+
+    # CLASS METHODS
+    @classmethod
+    def get(cls,font_name,font_size):
+        """
+        Returns the atlas for the given font and size, making it if necessary.
+
+        :param font_name: the font file, or None for the default Kivy font
+        :type font_name:  ``str`` or ``None``
+
+        :param font_size: the font size in points
+        :type font_size:  ``int`` or ``float`` > 0
+        """
+        key = (font_name,font_size)
+        if not key in cls.ATLAS_CACHE:
+            cls.ATLAS_CACHE[key] = GlyphAtlas(font_name,font_size)
+        return cls.ATLAS_CACHE[key]
+
+
+    # BUILT-IN METHODS
+    def __init__(self,font_name,font_size,charset=GLYPH_CHARSET):
+        """
+        Renders the characters of a font into a new atlas.
+
+        :param font_name: the font file, or None for the default Kivy font
+        :type font_name:  ``str`` or ``None``
+
+        :param font_size: the font size in points
+        :type font_size:  ``int`` or ``float`` > 0
+
+        :param charset: the characters to put in the atlas
+        :type charset:  ``str``
+        """
+        options = {'font_size':font_size,'color':(1,1,1,1)}
+        if font_name:
+            options['font_name'] = font_name
+        label = CoreLabel(**options)
+        label.resolve_font_name()
+        self._lineheight = label.get_extents('A')[1]
+
+        # Render each character, and find where it goes in the atlas
+        self._glyphs = {}
+        images = []
+        x, y, row = 1, 1, 0
+        for char in charset:
+            if char in self._glyphs:
+                continue
+            w, h = label.get_extents(char)
+            if char.isspace() or w <= 0 or h <= 0:
+                self._glyphs[char] = (w,0,0,0,0)
+                continue
+            if x+w+1 > GLYPH_ATLAS_WIDTH:
+                x, y, row = 1, y+row+1, 0
+            label._size = (w,h)
+            label._render_begin()
+            label._render_text(char,0,0)
+            images.append((x,y,label._render_end()))
+            self._glyphs[char] = (w,x,y,w,h)
+            x += w+1
+            row = max(row,h)
+
+        # Copy the characters into the atlas
+        height = 1 << int(y+row+1).bit_length()
+        self._pixels = np.zeros((height,GLYPH_ATLAS_WIDTH,4),dtype=np.uint8)
+        for (x,y,data) in images:
+            pixels = np.frombuffer(data.data,dtype=np.uint8)
+            self._pixels[y:y+data.height,x:x+data.width] = pixels.reshape(data.height,data.width,4)
+
+        # Texture coordinates, for an atlas stored bottom row first
+        self._uvs = {}
+        for (char,(advance,x,y,w,h)) in self._glyphs.items():
+            if w > 0:
+                u0, u1 = x/GLYPH_ATLAS_WIDTH, (x+w)/GLYPH_ATLAS_WIDTH
+                v0, v1 = 1-(y+h)/height, 1-y/height
+                self._uvs[char] = ((u0,v0),(u1,v0),(u1,v1),(u0,v1))
+        self._texture = None
+
+
+    # PUBLIC METHODS
+    def get_extents(self,text):
+        """
+        Returns the width and height of the given text, as a tuple.
+
+        Characters missing from the atlas count as a '?'.
+
+        :param text: the text to measure, possibly with several lines
+        :type text:  ``str``
+        """
+        lines = text.split('\n')
+        width = max(sum(self._advance(char) for char in line) for line in lines)
+        return (width,self._lineheight*len(lines))
+
+    def layout(self,text,halign='center'):
+        """
+        Returns the quads drawing the given text, centered on the origin.
+
+        The value returned is a tuple (corners, uvs), where both are float arrays of
+        shape (k,4,2), with one row for each visible character.  The corners of each
+        quad go counter-clockwise from the bottom left.
+
+        :param text: the text to lay out, possibly with several lines
+        :type text:  ``str``
+
+        :param halign: how to align the lines to each other
+        :type halign:  one of 'left', 'right', or 'center'
+        """
+        width, height = self.get_extents(text)
+        corners = []
+        uvs = []
+        top = height/2.0
+        for line in text.split('\n'):
+            span = sum(self._advance(char) for char in line)
+            if halign == 'left':
+                x = -width/2.0
+            elif halign == 'right':
+                x = width/2.0-span
+            else:
+                x = -span/2.0
+            for char in line:
+                if not char in self._glyphs:
+                    char = '?'
+                advance, _, _, w, h = self._glyphs.get(char,(0,0,0,0,0))
+                if char in self._uvs:
+                    corners.append(((x,top-h),(x+w,top-h),(x+w,top),(x,top)))
+                    uvs.append(self._uvs[char])
+                x += advance
+            top -= self._lineheight
+        corners = np.array(corners,dtype=np.float32).reshape(-1,4,2)
+        uvs = np.array(uvs,dtype=np.float32).reshape(-1,4,2)
+        return (corners,uvs)
+
+
+    # HIDDEN METHODS
+    def _advance(self,char):
+        """
+        Returns the distance to move right after drawing the given character.
+
+        :param char: the character
+        :type char:  ``str`` of length 1
+        """
+        if not char in self._glyphs:
+            char = '?'
+        return self._glyphs.get(char,(0,))[0]
+
+
+# #mark -
+class GBitmapLabel(GRectangle):
+    """
+    A class representing a text label drawn from a glyph atlas.
+
+    This class is a faster alternative to :class:`GLabel` for text that changes often,
+    like a score.  Changing the text only rewrites the vertices of a Mesh, instead of
+    rendering a new texture.  On the other hand, characters are placed without any
+    kerning, and only the characters in :data:`GLYPH_CHARSET` can be shown (any other
+    character is shown as a '?').
+
+    As with :class:`GLabel`, `linecolor` is the color of the text and `fillcolor` is the
+    background color.  The `width` and `height` of this label grow so that the text
+    always fits.  The text is always centered at `x` and `y`, while `halign` aligns the
+    lines of a multi-line text to each other.
+    """
+
+    # MUTABLE PROPERTIES
+    @property
+    def text(self):
+        """
+        The text for this label.
+
+        The text is broken up into multiple lines in the presence of the escape
+        character '\\n'.
+
+        **Invariant**: Must be a string"""
+        return self._text
+
+    @text.setter
+    def text(self,value):
+        assert type(value) == str, 'value %s is not a string' % repr(value)
+        if value == getattr(self,'_text',None):
+            return
+        self._text = value
+        if self._defined:
+            self._layout()
+
+    @property
+    def font_name(self):
+        """
+        The file name for the .ttf file to use as a font
+
+        **Invariant**: Must be None or a string referring to a .ttf file in folder Fonts"""
+        return self._fname
+
+    @font_name.setter
+    def font_name(self,value):
+        assert value is None or GameApp.is_font(value), 'value %s is not a font name' % repr(value)
+        self._fname = value
+        if self._defined:
+            self._reset()
+
+    @property
+    def font_size(self):
+        """
+        The size of the text font in points.
+
+        **Invariant**: Must be a positive number (int or float)"""
+        return self._fsize
+
+    @font_size.setter
+    def font_size(self,value):
+        assert type(value) in [int,float], 'value %s is not a number' % repr(value)
+        assert value > 0, 'value %s is not positive' % repr(value)
+        self._fsize = value
+        if self._defined:
+            self._reset()
+
+    @property
+    def halign(self):
+        """
+        The horizontal alignment of the lines of this label.
+
+        **Invariant**: Must be one of 'left', 'right', or 'center'"""
+        return self._halign
+
+    @halign.setter
+    def halign(self,value):
+        assert value in ('left','right','center'), 'value %s is not a valid horizontal alignment' % repr(value)
+        self._halign = value
+        if self._defined:
+            self._layout()
+
+
+    # BUILT-IN METHODS
+    def __init__(self,**keywords):
+        """
+        Creates a new bitmap text label.
+
+        To use the constructor for this class, you should provide it with a list of
+        keyword arguments that initialize various attributes.  For example, to create a
+        label containing the word 'Hello', use the constructor call::
+
+            GBitmapLabel(text='Hello',font_name='Arcade.ttf',font_size=20)
+
+        This class supports the all same keywords as :class:`GRectangle`, as well as
+        ``text``, ``font_name``, ``font_size`` and ``halign``.
+
+        :param keywords: dictionary of keyword arguments
+        :type keywords:  keys are attribute names
+        """
+        self._defined = False
+        self._buffer = MeshBuffer(4,[0,1,2,2,3,0])
+        self.text = keywords['text'] if 'text' in keywords else ''
+        self.font_name = keywords['font_name'] if 'font_name' in keywords else None
+        self.font_size = keywords['font_size'] if 'font_size' in keywords else 12
+        self.halign = keywords['halign'] if 'halign' in keywords else 'center'
+        if not 'linecolor' in keywords:
+            keywords['linecolor'] = (0,0,0,1)
+        if not 'fillcolor' in keywords:
+            keywords['fillcolor'] = None
+        GRectangle.__init__(self,**keywords)
+
+    def __str__(self):
+        """
+        :return: A readable string representation of this object.
+        :rtype:  ``str``
+        """
+        if self.name is None:
+            s = '['
+        else:
+            s = '[name=%s,' % self.name
+        return '%s,text=%s,center=(%s,%s),angle=%s]' \
+                % (s,repr(self.text),repr(self.x),repr(self.y),repr(self.angle))
+
+
+    # HIDDEN METHODS
+    def _layout(self):
+        """
+        Rewrites the vertices of the mesh for the current text.
+
+        The label is only reset if it has to grow to fit the text.
+        """
+        width, height = self._atlas.get_extents(self._text)
+        if width > self.width or height > self.height:
+            self._reset()   # This grows the label and comes back here
+            return
+
+        corners, uvs = self._atlas.layout(self._text,self._halign)
+        verts = self._buffer.reserve(len(corners))
+        verts[:,:,:2] = corners
+        verts[:,:,2:] = uvs
+        self._buffer.upload(len(corners))
+
+    def _reset(self):
+        """
+        Resets the drawing cache.
+        """
+        self._atlas = GlyphAtlas.get(self._fname,self._fsize)
+        self._buffer.retexture(self._atlas.texture)
+
+        # Resize the outside if necessary
+        width, height = self._atlas.get_extents(self._text)
+        self._defined = False
+        self.width  = max(self.width,width)
+        self.height = max(self.height,height)
+        self._defined = True
+
+        GObject._reset(self)
+        x = -self.width/2.0
+        y = -self.height/2.0
+
+        if self._fillcolor:
+            fill = Rectangle(pos=(x,y), size=(self.width,self.height))
+            self._cache.add(self._fillcolor)
+            self._cache.add(fill)
+
+        if self._linecolor:
+            self._cache.add(self._linecolor)
+            self._cache.add(self._buffer.group)
+
+        if self._linewidth > 0:
+            line = Line(rectangle=(x,y,self.width,self.height),joint='miter',close=True,width=self.linewidth)
+            self._cache.add(self._linecolor)
+            self._cache.add(line)
+
+        self._cache.add(PopMatrix())
+        self._layout()
@@ -0,0 +1,248 @@
+"""
+A module to support loading the assets of a game in the background.
+
+Images, sounds and JSON files are normally loaded the first time that they are used,
+which can make the game stutter.  An :class:`AssetLoader` loads them ahead of time
+instead.  Files are read and decoded by a pool of threads, while the last step (making
+textures, which needs the GL context) is done a little at a time on the main thread,
+so that the game can keep drawing a loading screen.
+"""
+from kivy.core.image import ImageLoader, Image
+from kivy.core.audio import SoundLoader
+from kivy.logger import Logger
+from concurrent.futures import ThreadPoolExecutor
+from .app import GameApp
+from .gatlas import TextureAtlas
+from .gglyph import GlyphAtlas
+from .sound import Sound
+import os.path
+import time
+import json
+
+# The number of threads reading assets
+ASSET_WORKERS = 4
+
+# The seconds per call to AssetLoader.update spent finishing assets on the main thread
+ASSET_UPLOAD_TIME = 0.008
+
+
+# #mark -
+class AssetLoader(object):
+    """
+    A class that loads the assets listed in a manifest in the background.
+
+    A manifest is a dictionary (usually read from a JSON file) with any of these keys:
+
+    * ``'atlas'``: images (in **Images**) to pack into one texture atlas, each a name
+      or a pair [name, side] to shrink the image first (see :class:`TextureAtlas`)
+    * ``'images'``: images (in **Images**) to load as textures of their own
+    * ``'sounds'``: sounds (in **Sounds**) to load
+    * ``'fonts'``: pairs [font name, font size] of glyph atlases to make
+    * ``'json'``: files (in **Data**) to read
+
+    The files are read as soon as the loader is created.  The game must then call
+    :meth:`update` once a frame, which finishes the assets that are ready for a
+    short time, and returns the progress so far.  Once :attr:`done` is True, the
+    assets are resident: :meth:`GameApp.load_texture` and :meth:`GameApp.load_json`
+    return them from the cache, and new :class:`Sound` objects use the loaded sounds.
+
+    Glyph atlases are made on the main thread, since Kivy text rendering is not safe
+    to use from other threads.
+    """
+
+    # IMMUTABLE PROPERTIES
+    @property
+    def total(self):
+        """
+        The number of assets in the manifest.
+
+        **invariant**: Value is an ``int`` >= 0.
+        """
+        return self._total
+
+    @property
+    def loaded(self):
+        """
+        The number of assets finished so far (including ones that failed to load).
+
+        **invariant**: Value is an ``int`` between 0 and :attr:`total`.
+        """
+        return self._total-len(self._pending)
+
+    @property
+    def progress(self):
+        """
+        The fraction of the assets finished so far.
+
+        **invariant**: Value is a ``float`` between 0 and 1.
+        """
+        return self.loaded/self._total if self._total else 1.0
+
+    @property
+    def done(self):
+        """
+        Whether every asset in the manifest is finished.
+
+        **invariant**: Value is a ``bool``.
+        """
+        return not self._pending
+
+
+    # BUILT-IN METHODS
+    def __init__(self,manifest=None,workers=ASSET_WORKERS):
+        """
+        Starts loading the assets in the given manifest.
+
+        If the manifest is None, every image, sound and JSON file in the resource
+        folders is loaded (but no glyph atlases).
+
+        :param manifest: the assets to load
+        :type manifest:  ``dict`` or ``None``
+
+        :param workers: the number of threads reading files
+        :type workers:  ``int`` > 0
+        """
+        if manifest is None:
+            manifest = {'images': self._listdir(GameApp.images,GameApp.is_image),
+                        'sounds': self._listdir(GameApp.sounds,GameApp.is_sound),
+                        'json':   self._listdir(GameApp.json,GameApp.is_json)}
+
+        self._pool = ThreadPoolExecutor(max_workers=workers)
+        self._pending = []
+        atlas = manifest.get('atlas',[])
+        if atlas:
+            self._submit('atlas',tuple(atlas),TextureAtlas,GameApp.images,atlas)
+        for name in manifest.get('images',[]):
+            self._submit('image',name,self._read_image,name)
+        for name in manifest.get('sounds',[]):
+            self._submit('sound',name,self._read_sound,name)
+        for name in manifest.get('json',[]):
+            self._submit('json',name,self._read_json,name)
+        for (name,size) in manifest.get('fonts',[]):
+            self._pending.append(('font',(name,size),None))
+        self._total = len(self._pending)
+        self._pool.shutdown(wait=False)
+
+
+    # PUBLIC METHODS
+    def update(self,budget=ASSET_UPLOAD_TIME):
+        """
+        Returns the progress after finishing the assets that are ready.
+
+        Assets are finished in the order of the manifest, until the time budget runs
+        out.  At least one asset is finished if it is ready, even if it takes longer.
+        This method must be called from the main thread.
+
+        :param budget: the time to spend, in seconds
+        :type budget:  ``int`` or ``float`` >= 0
+        """
+        deadline = time.perf_counter()+budget
+        while self._pending:
+            kind, name, future = self._pending[0]
+            if not future is None and not future.done():
+                break
+            self._pending.pop(0)
+            try:
+                self._finish(kind,name,None if future is None else future.result())
+            except Exception as e:
+                Logger.info('AssetLoader: Could not load %s (%s).' % (repr(name),e))
+            if time.perf_counter() >= deadline:
+                break
+        return self.progress
+
+    def finish(self):
+        """
+        Waits for every asset to be read, and finishes them.
+
+        This method must be called from the main thread.
+        """
+        while self._pending:
+            future = self._pending[0][2]
+            if not future is None:
+                future.exception()
+            self.update(float('inf'))
+
+
+    # HIDDEN METHODS
+    def _submit(self,kind,name,func,*args):
+        """
+        Adds an asset to the pending list, and starts reading it on a thread.
+
+        :param kind: the kind of asset
+        :type kind:  ``str``
+
+        :param name: the name of the asset
+        :type name:  ``str`` or ``tuple``
+
+        :param func: the function to read the asset, called with args
+        :type func:  callable
+        """
+        self._pending.append((kind,name,self._pool.submit(func,*args)))
+
+    def _finish(self,kind,name,data):
+        """
+        Makes an asset resident, after it has been read.
+
+        :param kind: the kind of asset
+        :type kind:  ``str``
+
+        :param name: the name of the asset
+        :type name:  ``str`` or ``tuple``
+
+        :param data: the value read by the thread (None for fonts)
+        """
+        if kind == 'atlas':
+            for image in data.names:
+                GameApp.TEXTURE_CACHE.add(image,data.get_texture(image))
+        elif kind == 'image':
+            GameApp.TEXTURE_CACHE.add(name,Image(data,mipmap=True).texture)
+        elif kind == 'sound':
+            Sound.PRELOADED.setdefault(name,[]).append(data)
+        elif kind == 'json':
+            GameApp.JSON_CACHE[name] = data
+        elif kind == 'font':
+            GlyphAtlas.get(name[0],name[1]).texture
+
+    def _read_image(self,name):
+        """
+        Returns the decoded pixels of an image, ready to become a texture.
+
+        :param name: the file name in the **Images** folder
+        :type name:  ``str``
+        """
+        return ImageLoader.load(os.path.join(GameApp.images,name),keep_data=True,mipmap=True)
+
+    def _read_sound(self,name):
+        """
+        Returns a Kivy sound for the given file, with its data loaded.
+
+        :param name: the file name in the **Sounds** folder
+        :type name:  ``str``
+        """
+        sound = SoundLoader.load(os.path.join(GameApp.sounds,name))
+        if sound is None:
+            raise IOError('cannot read the file')
+        sound.load()
+        return sound
+
+    def _read_json(self,name):
+        """
+        Returns the contents of the given JSON file.
+
+        :param name: the file name in the **Data** folder
+        :type name:  ``str``
+        """
+        with open(os.path.join(GameApp.json,name)) as f:
+            return json.load(f)
+
+    def _listdir(self,folder,test):
+        """
+        Returns the sorted names of the files in folder that pass the given test.
+
+        :param folder: the folder to list
+        :type folder:  ``str``
+
+        :param test: the test for a file name, such as :meth:`GameApp.is_image`
+        :type test:  callable
+        """
+        return sorted(name for name in os.listdir(folder) if test(name))
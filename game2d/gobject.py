@@ -515,6 +515,15 @@ class GObject(object):
         #self._scale  = Scale(1,1,1)
         self._scale  = Scale(1,1,1)
 
+        # The view this object is retained in, and the scene it is in (if any)
+        self._owner = None
+        self._parent = None
+
+        # The offsets from the current transform to the interpolated one
+        self._prev = None
+        self._blend = Translate(0,0,0)
+        self._spin  = Rotate(angle=0,axis=(0,0,1))
+
         # Now update these with the keywords; size first
         if 'width' in keywords:
             self.width = keywords['width']
@@ -622,15 +631,52 @@ class GObject(object):
             p = self.inverse._transform(point[0],point[2])
             return Point2(p[0],p[1])
 
+    def save_transform(self):
+        """
+        Remembers the current position and angle as those of the previous tick.
+
+        Call this at the start of every simulation tick, before the object moves.
+        From then on, :meth:`draw` shows the object part of the way from the previous
+        tick to the current one, according to the ``alpha`` of the view. This keeps
+        motion smooth when the display runs faster than the simulation.
+        """
+        self._prev = (self.x,self.y,self.angle)
+        if not self._owner is None:
+            self._owner._moving.add(self)
+
+    def snap(self):
+        """
+        Forgets the transform of the previous tick.
+
+        Until the next call to :meth:`save_transform`, the object is drawn exactly
+        where it is.  Call this after a jump (such as wrapping around the screen)
+        that should not be animated.
+        """
+        self._prev = None
+        self._blend.x = 0.0
+        self._blend.y = 0.0
+        self._spin.angle = 0.0
+        if not self._owner is None:
+            self._owner._moving.discard(self)
+
     def draw(self, view):
         """
         Draws this shape in the provide view.
 
-        Ideally, the view should be the one provided by :class:`GameApp`.
+        Ideally, the view should be the one provided by :class:`GameApp`.  If 
+        :meth:`save_transform` was called this tick, the shape is drawn between its
+        previous and current transform, using the ``alpha`` attribute of the view.
+
+        If this shape was added to the view with :meth:`GView.add`, it is already on
+        the screen, and this method does nothing.
 
         :param view: view to draw to
         :type view:  :class:`GView`
         """
+        if self._owner is view:
+            return
+        if not self._prev is None:
+            self._interpolate(getattr(view,'alpha',1.0))
         try:
             view.draw(self._cache)
         except:
@@ -640,12 +686,40 @@ class GObject(object):
     def _reset(self):
         """
         Resets the drawing cache.
+
+        If this object is retained in a view or is in a scene, the new cache replaces 
+        the old one there.
         """
+        old = getattr(self,'_cache',None)
         self._cache = InstructionGroup()
+        owner = getattr(self,'_owner',None)
+        if not owner is None and not old is None:
+            owner._swap(self,old)
+        parent = getattr(self,'_parent',None)
+        if not parent is None and not old is None:
+            parent._swap(self,old)
         self._cache.add(PushMatrix())
+        self._cache.add(self._blend)
         self._cache.add(self._trans)
         self._cache.add(self._rotate)
+        self._cache.add(self._spin)
         self._cache.add(self._scale)
+
+    def _interpolate(self,alpha):
+        """
+        Sets the drawing offsets to show the shape alpha of the way through a tick.
+
+        The offsets only change the drawing instructions, not the position or angle.
+
+        :param alpha: the fraction of the tick from the previous transform
+        :type alpha:  ``float`` in 0..1
+        """
+        t = 1.0-alpha
+        self._blend.x = (self._prev[0]-self.x)*t
+        self._blend.y = (self._prev[1]-self.y)*t
+        # Turn the short way around
+        turn = (self._prev[2]-self.angle+180.0) % 360.0 - 180.0
+        self._spin.angle = turn*t
     
     def _build_matrix(self):
         """
@@ -679,6 +753,8 @@ class GScene(GObject):
     read-only.  These values are computed from the list of objects stored in the scene.
 
     All objects stored in a ``GScene`` are drawn as if the point (x,y) is the origin.
+    Changing a child, even in a way that rebuilds its drawing (such as the text of a
+    label), updates the scene automatically.
     """
 
     # MUTABLE PROPERTIES
@@ -697,6 +773,8 @@ class GScene(GObject):
     @children.setter
     def children(self,value):
         assert is_gobject_list(value), '%s is not a list of valid objects' % repr(value)
+        for x in getattr(self,'_children',[]):
+            x._parent = None
         self._children = list(value)
         if self._defined:
             self._reset()
@@ -799,5 +877,24 @@ class GScene(GObject):
         """
         GObject._reset(self)
         for x in self.children:
+            x._parent = self
             self._cache.add(x._cache)
         self._cache.add(PopMatrix())
+
+    def _swap(self,child,old):
+        """
+        Replaces the previous drawing cache of a child with its current one.
+
+        This keeps the scene up to date when a child resets itself, such as a label
+        whose text changes.
+
+        :param child: the child that was reset
+        :type child:  :class:`GObject`
+
+        :param old: the previous cache of the child
+        :type old:  ``InstructionGroup``
+        """
+        pos = self._cache.indexof(old)
+        if pos >= 0:
+            self._cache.remove(old)
+            self._cache.insert(pos,child._cache)
@@ -12,6 +12,7 @@ from kivy.graphics import *
 from kivy.graphics.instructions import *
 from kivy.uix.label import Label
 from kivy.uix.image import Image
+from collections import OrderedDict
 from .gobject import GObject
 from .app import GameApp
 
@@ -254,7 +255,7 @@ class GImage(GRectangle):
         Resets the drawing cache.
         """
         # Texture must load FIRST
-        self._texture = GameApp.load_texture(self.source)
+        self._texture = GameApp.load_texture(self.source,self)
         if self._texture:
             if not self._set_width:
                 self.width = self._texture.width
@@ -307,7 +308,16 @@ class GLabel(GRectangle):
     to the font by filename, including the .ttf. If you give no name, it will use the 
     default Kivy font.  The `bold` attribute only works for the default Kivy font; for 
     other fonts you will need the .ttf file for the bold version of that font.  See the
-    provided `ComicSans.ttf` and `ComicSansBold.ttf` for an example."""
+    provided `ComicSans.ttf` and `ComicSansBold.ttf` for an example.
+    
+    Rendering text is slow, so assigning an attribute its current value does nothing,
+    and the most recently rendered textures are kept in `TEXT_CACHE`.  Labels that show
+    the same text, in the same font, size and color, share a texture."""
+    
+    # Class attribute for the rendered text textures, least recently used first
+    TEXT_CACHE = OrderedDict()
+    # Class attribute for the maximum number of textures in TEXT_CACHE
+    TEXT_CACHE_SIZE = 64
     
     # MUTABLE PROPERTIES
     @property
@@ -321,9 +331,11 @@ class GLabel(GRectangle):
     @font_size.setter
     def font_size(self,value):
         assert type(value) in [int,float], 'value %s is not a number' % repr(value)
+        if value == getattr(self,'_fsize',None):
+            return
         self._fsize = value
         self._label.font_size = value
-        self._label.texture_update()
+        self._render()
     
     @property
     def font_name(self):
@@ -337,8 +349,10 @@ class GLabel(GRectangle):
     def font_name(self,value):
         from .app import GameApp
         assert GameApp.is_font(value), 'value %s is not a font name' % repr(value)
+        if value == self._label.font_name:
+            return
         self._label.font_name = value
-        self._label.texture_update()
+        self._render()
     
     @property
     def bold(self):
@@ -355,8 +369,10 @@ class GLabel(GRectangle):
     @bold.setter
     def bold(self,value):
         assert type(value) == bool, repr(value)+' is not a bool'
+        if value == self._label.bold:
+            return
         self._label.bold = value
-        self._label.texture_update()
+        self._render()
 
     @property
     def text(self):
@@ -373,8 +389,10 @@ class GLabel(GRectangle):
     @text.setter
     def text(self,value):
         assert type(value) == str, 'value %s is not a string' % repr(value)
+        if value == self._label.text:
+            return
         self._label.text = value
-        self._label.texture_update()
+        self._render()
     
     @property
     def halign(self):
@@ -624,6 +642,9 @@ class GLabel(GRectangle):
             self.linecolor = (0,0,0,1)
         if not 'fillcolor' in keywords:
             self.fillcolor = (0,0,0,0)
+        if self.linecolor:
+            self._label.color = self.linecolor
+        self._render()
         self._reset()
         self._defined = True
         self._label.bind(texture_size=self._callback)
@@ -641,6 +662,37 @@ class GLabel(GRectangle):
                 % (s,repr(self.text),repr(self.x),repr(self.y),repr(self.angle))
     
     # HIDDEN METHODS
+    def _render(self):
+        """
+        Updates the label texture, reusing a texture from TEXT_CACHE if possible.
+        
+        The cache is keyed by everything that changes the rendered pixels: the text,
+        font name, font size, boldness, alignment and color.
+        """
+        label = self._label
+        key = (label.text,label.font_name,label.font_size,label.bold,
+               label.halign,tuple(label.color))
+        cache = GLabel.TEXT_CACHE
+        texture = cache.get(key)
+        if texture is None:
+            # Kivy draws new text into the old texture if the size is the same, which
+            # would change the texture in the cache, so make it create a new one
+            label._label.texture = None
+            label.texture_update()
+            if not label.texture is None:
+                cache[key] = label.texture
+                while len(cache) > GLabel.TEXT_CACHE_SIZE:
+                    cache.popitem(last=False)
+        else:
+            cache.move_to_end(key)
+            label.texture = texture
+            label.texture_size = list(texture.size)
+        
+        # Kivy would otherwise render the text again on the next frame
+        trigger = getattr(label,'_trigger_texture',None)
+        if not trigger is None:
+            trigger.cancel()
+    
     def _callback(self,instance=None,value=None):
         """
         A workaround to deal with parameter requirements for callbacks
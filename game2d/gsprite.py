@@ -151,7 +151,7 @@ class GSprite(GRectangle):
         Resets the drawing cache.
         """
         # Texture must load FIRST
-        texture = GameApp.load_texture(self.source)
+        texture = GameApp.load_texture(self.source,self)
         if texture:
             width  = texture.width/self._format[1]
             height = texture.height/self._format[0]
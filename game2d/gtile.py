@@ -102,7 +102,7 @@ class GTile(GObject):
         x = -self._width/2.0
         y = -self._height/2.0
         
-        self._texture = GameApp.load_texture(self.source)
+        self._texture = GameApp.load_texture(self.source,self)
         if not self._texture is None and self.width == 0:
             self.width  = self._texture.width
         if not self._texture is None and self.height == 0:
@@ -467,12 +467,48 @@ class GView(FloatLayout):
     :class:`GObject` instances to the :meth:`draw` method.  You must do this every
     animation frame, as the game is constantly clearing the window.
 
+    Alternatively, objects can be retained by the view.  An object passed to :meth:`add`
+    stays on the screen until it is passed to :meth:`remove`.  Changing its attributes
+    changes the picture directly, so an object that does not change costs nothing per
+    frame.  Retained objects are drawn either behind or in front of everything drawn
+    with :meth:`draw`, in the order that they were added.
+
     **You should never construct an object of this class**.  Creating a new instance
     of this class will not properly display it on the screen.  Instead, you should
     only use the one provided in the `view` attribute of :class:`GameApp`.
     See the documentation of that class for more information.
     """
 
+    # MUTABLE PROPERTIES
+    @property
+    def alpha(self):
+        """
+        The fraction of a simulation tick to draw objects at.
+        
+        A :class:`GObject` that saved its transform this tick is drawn this fraction 
+        of the way from its previous transform to its current one.  This value is set 
+        by :class:`GameApp` before every call to `draw`.
+        
+        **Invariant**: Must be a float in 0..1.
+        """
+        return self._alpha
+    
+    @alpha.setter
+    def alpha(self,value):
+        assert type(value) in [int,float], 'value %s is not a number' % repr(value)
+        assert 0 <= value <= 1, 'value %s is outside of 0..1' % repr(value)
+        self._alpha = float(value)
+    
+    # IMMUTABLE PROPERTIES
+    @property
+    def retained(self):
+        """
+        The objects retained by this view, in the order they were added.
+        
+        **Invariant**: Must be a tuple of :class:`GObject` (possibly empty)
+        """
+        return tuple(self._retained)
+    
     # BUILT-IN METHODS
     def __init__(self):
         """
@@ -484,11 +520,16 @@ class GView(FloatLayout):
         :class:`GameApp`. See the documentation of that class for more information.
         """
         FloatLayout.__init__(self)
+        self._scene = InstructionGroup()
         self._frame = InstructionGroup()
+        self._front = InstructionGroup()
         self.bind(pos=self._reset)
         self.bind(size=self._reset)
         self._reset()
         self._contents = set()
+        self._retained = {}
+        self._moving = set()
+        self._alpha = 1.0
 
 
     # PUBLIC METHODS
@@ -511,12 +552,82 @@ class GView(FloatLayout):
         Clears the contents of the view.
 
         This method is called for you automatically at the start of the animation
-        frame.  That way, you are not drawing images on top of one another.
+        frame.  That way, you are not drawing images on top of one another.  It does
+        not remove the objects retained with :meth:`add`.
         """
         self._frame.clear()
         self._contents.clear()
 
+    def add(self,obj,front=False):
+        """
+        Retains the given object in this view until it is removed.
+
+        The object is drawn every frame, without any calls to its `draw` method, and
+        it is only touched again when one of its attributes changes. Adding an object
+        that is already retained by this view does nothing.
+
+        :param obj: the object to retain
+        :type obj:  :class:`GObject` not retained by any other view
+
+        :param front: whether to draw the object in front of the objects drawn with
+            :meth:`draw` (instead of behind them)
+        :type front:  ``bool``
+        """
+        if obj._owner is self:
+            return
+        assert obj._owner is None, '%s is retained by another view' % repr(obj)
+        group = self._front if front else self._scene
+        obj._owner = self
+        self._retained[obj] = group
+        group.add(obj._cache)
+        if not obj._prev is None:
+            self._moving.add(obj)
+
+    def remove(self,obj):
+        """
+        Removes the given object from this view, if it is retained by it.
+
+        :param obj: the object to remove
+        :type obj:  :class:`GObject`
+        """
+        if obj._owner is self:
+            obj._owner = None
+            self._retained.pop(obj).remove(obj._cache)
+            self._moving.discard(obj)
+
     # HIDDEN METHODS
+    def _sync(self):
+        """
+        Interpolates the transforms of the retained objects that are moving.
+        
+        Only the objects that saved their transform this tick are touched.  An object
+        that has not moved since it saved its transform is snapped, which takes it out
+        of the moving set until it saves its transform again.
+        """
+        still = []
+        for obj in self._moving:
+            if obj._prev == (obj.x,obj.y,obj.angle):
+                still.append(obj)
+            else:
+                obj._interpolate(self._alpha)
+        for obj in still:
+            obj.snap()
+
+    def _swap(self,obj,old):
+        """
+        Replaces the previous drawing cache of a retained object with its current one.
+
+        :param obj: the retained object
+        :type obj:  :class:`GObject`
+
+        :param old: the previous cache
+        :type old:  ``InstructionGroup``
+        """
+        group = self._retained[obj]
+        pos = group.indexof(old)
+        group.remove(old)
+        group.insert(pos,obj._cache)
+
     def _reset(self,obj=None,value=None):
         """
         Resets the view canvas in response to a resizing event
@@ -526,4 +637,6 @@ class GView(FloatLayout):
         self.canvas.add(Rectangle(pos=self.pos,size=self.size))
         # Work-around for Retina Macs
         self.canvas.add(Scale(dp(1),dp(1),dp(1)))
+        self.canvas.add(self._scene)
         self.canvas.add(self._frame)
+        self.canvas.add(self._front)
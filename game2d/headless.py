@@ -0,0 +1,1229 @@
+"""
+Kivy-free stand-ins for the 2D game classes.
+
+This module provides classes with the same names and attributes as the rest of
+game2d, but without any dependency on Kivy.  Nothing is ever drawn: the shapes
+only remember their attributes, the view only remembers what it was asked to
+draw, and the input only knows the keys that a script tells it about.  This
+makes it possible to run the game logic on a machine without a display or a GL
+context, as fast as the CPU allows.
+
+These classes are used in place of the regular ones when the environment
+variable ``GAME2D_HEADLESS`` is set before game2d is imported.
+"""
+import os.path
+import json
+import math
+import logging
+
+from introcs.geom import Point2
+from .gcache import TextureCache
+
+__all__ = ['GObject', 'GScene', 'GRectangle', 'GEllipse', 'GImage', 'GLabel', 'GSprite',
+           'GTile', 'GSpriteBatch', 'GEllipseBatch', 'GBitmapLabel', 'GPath', 'GTriangle', 'GPolygon', 'GInput', 'GView', 'Sound',
+           'SoundLibrary', 'AssetLoader', 'GameApp']
+
+Logger = logging.getLogger('game2d')
+
+
+# #mark -
+class GObject(object):
+    """
+    A class representing a basic graphics object, without any graphics.
+
+    This class accepts the same keywords as the regular :class:`GObject`, and
+    stores them as plain attributes.  Unlike the regular class, the attributes are
+    not validated, and changing them is as cheap as changing any other attribute.
+    """
+
+    # BUILT-IN METHODS
+    def __init__(self,**keywords):
+        """
+        Creates a new headless graphics object.
+
+        :param keywords: dictionary of keyword arguments
+        :type keywords:  keys are attribute names
+        """
+        self.x = 0.0
+        self.y = 0.0
+        self.width  = 1.0
+        self.height = 1.0
+        self.angle = 0.0
+        self.scale = (1.0,1.0)
+        self.fillcolor = [1,1,1,1]
+        self.linecolor = [1,1,1,1]
+        self.linewidth = 0.0
+        self.name = None
+        self._owner = None
+        self._prev = None
+        for key in keywords:
+            setattr(self,key,keywords[key])
+
+    def __str__(self):
+        """
+        :return: A readable string representation of this object.
+        :rtype:  ``str``
+        """
+        if self.name is None:
+            s = '['
+        else:
+            s = '[name=%s,' % self.name
+        return '%s,center=(%s,%s),width=%s,height=%s,angle=%s]' \
+                % (s,repr(self.x),repr(self.y),repr(self.height),repr(self.width),repr(self.angle))
+
+    def __repr__(self):
+        """
+        :return: An unambiguous string representation of this object.
+        :rtype:  ``str``
+        """
+        return str(self.__class__)+str(self)
+
+    # PUBLIC METHODS
+    def contains(self,point):
+        """
+        Checks whether this shape contains the point, using the bounding box.
+
+        :param point: the point to check
+        :type point: :class:`Point2` or a pair of numbers
+
+        :return: True if the shape contains this point
+        :rtype:  ``bool``
+        """
+        if isinstance(point,Point2):
+            point = (point.x,point.y)
+        return abs(point[0]-self.x) < self.width/2.0 and abs(point[1]-self.y) < self.height/2.0
+
+    def transform(self,point):
+        """
+        Transforms the point to the local coordinate system.
+
+        The local coordinates undo the position, angle and scale of this shape.
+
+        :param point: the point to transform
+        :type point: :class:`Point2` or a pair of numbers
+
+        :return: The point transformed to local coordinate system
+        :rtype:  :class:`Point2`
+        """
+        if isinstance(point,Point2):
+            point = (point.x,point.y)
+        sx, sy = self.scale if isinstance(self.scale,(tuple,list)) else (self.scale,self.scale)
+        dx = point[0]-self.x
+        dy = point[1]-self.y
+        theta = math.radians(self.angle)
+        c, s = math.cos(theta), math.sin(theta)
+        return Point2((c*dx+s*dy)/sx,(c*dy-s*dx)/sy)
+
+    def save_transform(self):
+        """
+        Remembers the current position and angle as those of the previous tick.
+        """
+        self._prev = (self.x,self.y,self.angle)
+
+    def snap(self):
+        """
+        Forgets the transform of the previous tick.
+        """
+        self._prev = None
+
+    def draw(self, view):
+        """
+        Draws this shape in the provide view (unless the view retains it).
+
+        :param view: view to draw to
+        :type view:  :class:`GView`
+        """
+        if not self._owner is view:
+            view.draw(self)
+
+
+class GScene(GObject):
+    """
+    A headless scene graph node.
+    """
+
+    def __init__(self,**keywords):
+        """
+        Creates a new headless scene graph node.
+
+        :param keywords: dictionary of keyword arguments
+        :type keywords:  keys are attribute names
+        """
+        self.children = []
+        GObject.__init__(self,**keywords)
+
+    # PUBLIC METHODS
+    def select(self,point):
+        """
+        Selects the child selected by the given point.
+
+        The children are searched in order (and scenes among them recursively), and
+        the first one that contains ``point`` is returned.
+
+        :param point: the point to check
+        :type point: :class:`Point2` or a pair of numbers
+
+        :return: The child containing the point, or None if there is none
+        :rtype:  :class:`GObject` or ``None``
+        """
+        if not self.contains(point):
+            return None
+
+        for child in self.children:
+            if isinstance(child,GScene):
+                result = child.select(point)
+            else:
+                result = child if child.contains(point) else None
+            if not result is None:
+                return result
+        return None
+
+
+class GRectangle(GObject):
+    """
+    A headless rectangle.
+    """
+    pass
+
+
+class GEllipse(GRectangle):
+    """
+    A headless ellipse.
+    """
+    pass
+
+
+class GImage(GRectangle):
+    """
+    A headless image.
+
+    The ``source`` attribute is remembered, but the image file is never loaded.
+    """
+
+    def __init__(self,**keywords):
+        """
+        Creates a new headless image.
+
+        :param keywords: dictionary of keyword arguments
+        :type keywords:  keys are attribute names
+        """
+        self.source = None
+        GRectangle.__init__(self,**keywords)
+
+
+class GSprite(GImage):
+    """
+    A headless filmstrip.
+    """
+
+    def __init__(self,**keywords):
+        """
+        Creates a new headless filmstrip.
+
+        :param keywords: dictionary of keyword arguments
+        :type keywords:  keys are attribute names
+        """
+        self.format = (1,1)
+        self.frame = 0
+        GImage.__init__(self,**keywords)
+
+
+class GTile(GImage):
+    """
+    A headless tiled image.
+    """
+    pass
+
+
+class GSpriteBatch(GImage):
+    """
+    A headless sprite batch.
+
+    The sprites are remembered, but no vertex buffer is built.
+    """
+
+    @property
+    def sources(self):
+        """
+        The images that the sprites of this batch can use.
+
+        **invariant**: Value is a non-empty ``list`` of image file names.
+        """
+        return list(self._sources) if self._sources else [self.source]
+
+    @sources.setter
+    def sources(self,value):
+        assert len(value) > 0, '%s is empty' % repr(value)
+        self._sources = list(value)
+
+    @property
+    def count(self):
+        """
+        The number of sprites in this batch.
+
+        **invariant**: Value is an ``int`` >= 0.
+        """
+        return len(self.positions)
+
+    def __init__(self,**keywords):
+        """
+        Creates a new, empty headless sprite batch.
+
+        :param keywords: dictionary of keyword arguments
+        :type keywords:  keys are attribute names
+        """
+        self.positions = ()
+        self.angles = None
+        self.images = None
+        self.sizes = None
+        self._sources = None
+        if 'sources' in keywords:
+            self.sources = keywords['sources']
+            if not 'source' in keywords:
+                keywords['source'] = self._sources[0]
+        GImage.__init__(self,**keywords)
+
+    def set_sprites(self,positions,angles=None,images=None,sizes=None):
+        """
+        Sets the sprites of this batch, replacing any previous ones.
+
+        :param positions: the sprite centers, one per row
+        :type positions:  array of shape (k,2)
+
+        :param angles: the sprite angles in degrees, or None for no rotation
+        :type angles:  ``None`` or array of shape (k,)
+
+        :param images: the image of each sprite, as a position in `sources`
+        :type images:  ``None`` or int array of shape (k,)
+
+        :param sizes: the width and height of each sprite
+        :type sizes:  ``None`` or array of shape (k,) or (k,2)
+        """
+        self.positions = positions
+        self.angles = angles
+        self.images = images
+        self.sizes = sizes
+
+
+class GEllipseBatch(GEllipse):
+    """
+    A headless ellipse batch.
+
+    The positions are remembered, but no vertex buffer is built.
+    """
+
+    @property
+    def count(self):
+        """
+        The number of ellipses in this batch.
+
+        **invariant**: Value is an ``int`` >= 0.
+        """
+        return len(self.positions)
+
+    def __init__(self,**keywords):
+        """
+        Creates a new, empty headless ellipse batch.
+
+        :param keywords: dictionary of keyword arguments
+        :type keywords:  keys are attribute names
+        """
+        self.positions = ()
+        self.segments = 12
+        GEllipse.__init__(self,**keywords)
+
+    def set_positions(self,positions):
+        """
+        Sets the ellipse centers of this batch, replacing any previous ones.
+
+        :param positions: the ellipse centers, one per row
+        :type positions:  array of shape (k,2)
+        """
+        self.positions = positions
+
+
+class GLabel(GRectangle):
+    """
+    A headless text label.
+
+    The text is remembered, but no font is loaded and nothing is rendered.
+    """
+
+    def __init__(self,**keywords):
+        """
+        Creates a new headless text label.
+
+        :param keywords: dictionary of keyword arguments
+        :type keywords:  keys are attribute names
+        """
+        self.text = ''
+        self.font_size = 12
+        self.font_name = None
+        self.bold = False
+        self.halign = 'center'
+        self.valign = 'middle'
+        GRectangle.__init__(self,**keywords)
+
+
+class GBitmapLabel(GRectangle):
+    """
+    A headless bitmap text label.
+
+    The text is remembered, but no glyph atlas is made and nothing is rendered.
+    """
+
+    def __init__(self,**keywords):
+        """
+        Creates a new headless bitmap text label.
+
+        :param keywords: dictionary of keyword arguments
+        :type keywords:  keys are attribute names
+        """
+        self.text = ''
+        self.font_size = 12
+        self.font_name = None
+        self.halign = 'center'
+        GRectangle.__init__(self,**keywords)
+
+
+class GPath(GObject):
+    """
+    A headless path.
+    """
+
+    def __init__(self,**keywords):
+        """
+        Creates a new headless path.
+
+        :param keywords: dictionary of keyword arguments
+        :type keywords:  keys are attribute names
+        """
+        self.points = ()
+        GObject.__init__(self,**keywords)
+
+    # PUBLIC METHODS
+    def near(self,point):
+        """
+        Checks whether this path is near the given point.
+
+        A point is near the path if its distance to some segment is less than 1e-6.
+
+        :param point: the point to check
+        :type point: :class:`Point2` or a pair of numbers
+
+        :return: True if this path is near the give point; False otherwise.
+        :rtype:  ``bool``
+        """
+        if isinstance(point,Point2):
+            point = (point.x,point.y)
+        x, y = point
+        for ii in range(len(self.points)//2-1):
+            px, py, qx, qy = self.points[2*ii:2*ii+4]
+            length = (qx-px)*(qx-px)+(qy-py)*(qy-py)
+            t = 0.0 if length == 0 else ((x-px)*(qx-px)+(y-py)*(qy-py))/length
+            t = min(1.0,max(0.0,t))
+            if math.hypot(px+t*(qx-px)-x,py+t*(qy-py)-y) < 1e-6:
+                return True
+        return False
+
+
+class GTriangle(GPath):
+    """
+    A headless triangle.
+    """
+    pass
+
+
+class GPolygon(GPath):
+    """
+    A headless polygon.
+    """
+    pass
+
+
+# #mark -
+class GInput(object):
+    """
+    A class representing a scripted input handler.
+
+    This class has the same query methods as the regular :class:`GInput`, but the
+    keyboard is driven by a script instead of by Kivy.  Use :meth:`press` and
+    :meth:`release` (or :meth:`set_keys` to replace the whole key state) to change
+    the keys that are down.  As with the regular handler, a key counts as pressed
+    (or released) for the first frame in which it is read.
+    """
+
+    # IMMUTABLE ATTRIBUTES
+    @property
+    def touch(self):
+        """
+        The current (x,y) coordinate of the mouse, if pressed.
+
+        **Invariant**: Must be either a :class:`Point2` or None (if there is no touch).
+        """
+        return self._touch
+
+    @property
+    def key_count(self):
+        """
+        The number of keys currently held down.
+
+        **Invariant**: Must be an int >= 0."""
+        return self._keycount
+
+    @property
+    def keys(self):
+        """
+        The list of keys that are currently held down.
+
+        **Invariant**: Must be a list of strings (possibly empty)
+        """
+        return tuple(k for (k,v) in self._keystate.items() if v)
+
+    # BUILT-IN METHODS
+    def __init__(self):
+        """
+        Creates a new scripted input handler with no keys down.
+        """
+        self._touch = None
+        self._keystate = {}
+        self._keypress = {}
+        self._keyrelease = {}
+        self._keycount = 0
+
+    # PUBLIC METHODS
+    def is_key_down(self,key):
+        """
+        Checks whether the key is currently held down.
+
+        :param key: the key to test
+        :type key:  ``str``
+
+        :return: True if ``key`` is currently held down
+        :rtype:  ``bool``
+        """
+        if key != '':
+            return key in self._keystate and self._keystate[key]
+        return self._keycount > 0
+
+    def is_key_pressed(self,key):
+        """
+        Returns whether the key was just pressed.
+
+        :param key: the key to test
+        :type key:  ``str``
+
+        :return: True if ``key`` was just pressed
+        :rtype:  ``bool``
+        """
+        if key != '':
+            return key in self._keypress
+        return len(self._keypress) > 0
+
+    def is_key_released(self,key):
+        """
+        Returns whether the key was just released.
+
+        :param key: the key to test
+        :type key:  ``str``
+
+        :return: True if ``key`` was just released
+        :rtype:  ``bool``
+        """
+        if key != '':
+            return key in self._keyrelease
+        return len(self._keyrelease) > 0
+
+    def is_touch_down(self):
+        """
+        :return: True if the mouse is currently held down; False otherwise
+        :rtype:  ``bool``
+        """
+        return not self._touch is None
+
+    def is_touch_pressed(self):
+        """
+        :return: Always False, as there is no mouse
+        :rtype:  ``bool``
+        """
+        return False
+
+    def is_touch_released(self):
+        """
+        :return: Always False, as there is no mouse
+        :rtype:  ``bool``
+        """
+        return False
+
+    def press(self,key):
+        """
+        Puts the given key down.
+
+        :param key: the key to press
+        :type key:  ``str``
+        """
+        if not key in self._keystate or not self._keystate[key]:
+            self._keycount += 1
+            self._keypress[key] = True
+        self._keystate[key] = True
+
+    def release(self,key):
+        """
+        Lets the given key up.
+
+        :param key: the key to release
+        :type key:  ``str``
+        """
+        if key in self._keystate and self._keystate[key]:
+            self._keycount -= 1
+            self._keyrelease[key] = True
+        self._keystate[key] = False
+
+    def set_keys(self,keys):
+        """
+        Changes the key state so that exactly the given keys are down.
+
+        Keys that were up and are now down count as pressed, and keys that were
+        down and are now up count as released.
+
+        :param keys: the keys to hold down
+        :type keys:  iterable of ``str``
+        """
+        keys = set(keys)
+        for k in self.keys:
+            if not k in keys:
+                self.release(k)
+        for k in keys:
+            self.press(k)
+
+    # HIDDEN METHODS
+    def _prestep(self):
+        """
+        The step to perform before the update step.
+        """
+        for k in self._keypress:
+            self._keypress[k] = False
+        for k in self._keyrelease:
+            self._keyrelease[k] = False
+
+    def _poststep(self):
+        """
+        The step to perform after the update step.
+        """
+        for k in list(self._keypress.keys()):
+            if not self._keypress[k]:
+                del self._keypress[k]
+        for k in list(self._keyrelease.keys()):
+            if not self._keyrelease[k]:
+                del self._keyrelease[k]
+
+
+class GView(object):
+    """
+    A class representing a view that is never displayed.
+
+    The view remembers the objects drawn to it since it was last cleared, which
+    can be useful for checking what a frame would show.
+    """
+
+    # IMMUTABLE ATTRIBUTES
+    @property
+    def contents(self):
+        """
+        The objects drawn since the view was last cleared, in order.
+
+        **Invariant**: Must be a tuple (possibly empty)
+        """
+        return tuple(self._contents)
+
+    @property
+    def retained(self):
+        """
+        The objects retained by this view, in the order they were added.
+
+        **Invariant**: Must be a tuple (possibly empty)
+        """
+        return tuple(self._retained)
+
+    # MUTABLE ATTRIBUTES
+    @property
+    def alpha(self):
+        """
+        The fraction of a simulation tick to draw objects at.
+
+        This value is set by :class:`GameApp` before every call to `draw`.
+
+        **Invariant**: Must be a float in 0..1.
+        """
+        return self._alpha
+
+    @alpha.setter
+    def alpha(self,value):
+        assert type(value) in [int,float], 'value %s is not a number' % repr(value)
+        assert 0 <= value <= 1, 'value %s is outside of 0..1' % repr(value)
+        self._alpha = float(value)
+
+    def __init__(self):
+        """
+        Creates a new, empty view.
+        """
+        self._contents = []
+        self._retained = {}
+        self._alpha = 1.0
+
+    def draw(self,cmd):
+        """
+        Records the given object as drawn.
+
+        :param cmd: the object to draw
+        :type cmd:  any
+        """
+        self._contents.append(cmd)
+
+    def clear(self):
+        """
+        Clears the contents of the view (but not the retained objects).
+        """
+        self._contents.clear()
+
+    def add(self,obj,front=False):
+        """
+        Retains the given object in this view until it is removed.
+
+        :param obj: the object to retain
+        :type obj:  :class:`GObject` not retained by any other view
+
+        :param front: whether to draw the object in front of the objects drawn with
+            :meth:`draw` (instead of behind them)
+        :type front:  ``bool``
+        """
+        if obj._owner is self:
+            return
+        assert obj._owner is None, '%s is retained by another view' % repr(obj)
+        obj._owner = self
+        self._retained[obj] = None
+
+    def remove(self,obj):
+        """
+        Removes the given object from this view, if it is retained by it.
+
+        :param obj: the object to remove
+        :type obj:  :class:`GObject`
+        """
+        if obj._owner is self:
+            obj._owner = None
+            del self._retained[obj]
+
+    def _sync(self):
+        """
+        Does nothing, as there is nothing to interpolate without a display.
+        """
+        pass
+
+
+# #mark -
+class Sound(object):
+    """
+    A class representing a silent sound.
+    """
+
+    @property
+    def source(self):
+        """
+        The source file for this sound.
+
+        **Invariant**: Must be a nonempty string.
+        """
+        return self._source
+
+    @property
+    def playing(self):
+        """
+        Whether or not the sound is currently playing (always False).
+
+        **Invariant**: Must be a boolean.
+        """
+        return False
+
+    def __init__(self,source):
+        """
+        Creates a new silent sound.
+
+        :param source: The string providing the name of a sound file
+        :type source:  ``str``
+        """
+        self._source = source
+        self.volume = 1.0
+
+    def play(self,loop=False):
+        """
+        Does nothing.
+
+        :param loop: Whether or not to loop the sound
+        :type loop:  ``bool``
+        """
+        pass
+
+    def stop(self):
+        """
+        Does nothing.
+        """
+        pass
+
+
+class SoundLibrary(dict):
+    """
+    A dictionary that maps keys to silent Sound objects.
+    """
+
+    def __setitem__(self, key, filename):
+        """
+        Creates a sound object from the file filename and assigns it the given name.
+
+        :param key: The key identifying a sound object
+        :type key:  ``str``
+
+        :param filename: The name of the file containing the sound source
+        :type filename:  ``str``
+        """
+        dict.__setitem__(self,key,Sound(filename))
+
+
+# #mark -
+class AssetLoader(object):
+    """
+    A headless asset loader.
+
+    Only the JSON files of the manifest are loaded (one per call to :meth:`update`),
+    since there are no textures, sounds or fonts without a window.  Every other asset
+    counts as finished as soon as it is reached.
+    """
+
+    @property
+    def total(self):
+        """
+        The number of assets in the manifest.
+
+        **invariant**: Value is an ``int`` >= 0.
+        """
+        return self._total
+
+    @property
+    def loaded(self):
+        """
+        The number of assets finished so far.
+
+        **invariant**: Value is an ``int`` between 0 and :attr:`total`.
+        """
+        return self._total-len(self._pending)
+
+    @property
+    def progress(self):
+        """
+        The fraction of the assets finished so far.
+
+        **invariant**: Value is a ``float`` between 0 and 1.
+        """
+        return self.loaded/self._total if self._total else 1.0
+
+    @property
+    def done(self):
+        """
+        Whether every asset in the manifest is finished.
+
+        **invariant**: Value is a ``bool``.
+        """
+        return not self._pending
+
+    def __init__(self,manifest=None,workers=4):
+        """
+        Prepares to load the assets in the given manifest.
+
+        :param manifest: the assets to load (None for every JSON file in **Data**)
+        :type manifest:  ``dict`` or ``None``
+
+        :param workers: the number of threads reading files (ignored)
+        :type workers:  ``int`` > 0
+        """
+        if manifest is None:
+            names = sorted(os.listdir(GameApp.json))
+            manifest = {'json': [name for name in names if GameApp.is_json(name)]}
+        self._pending = []
+        if manifest.get('atlas'):
+            self._pending.append(('atlas',tuple(manifest['atlas'])))
+        for kind in ('images','sounds','json','fonts'):
+            self._pending.extend((kind,name) for name in manifest.get(kind,[]))
+        self._total = len(self._pending)
+
+    def update(self,budget=0.008):
+        """
+        Returns the progress after finishing the next asset.
+
+        :param budget: the time to spend, in seconds (ignored)
+        :type budget:  ``int`` or ``float`` >= 0
+        """
+        if self._pending:
+            kind, name = self._pending.pop(0)
+            data = GameApp.load_json(name) if kind == 'json' else None
+            if not data is None:
+                GameApp.JSON_CACHE[name] = data
+        return self.progress
+
+    def finish(self):
+        """
+        Finishes every asset.
+        """
+        while self._pending:
+            self.update()
+
+
+# #mark -
+class GameApp(object):
+    """
+    A controller class for a game without a window.
+
+    This class has the same methods to override as the regular :class:`GameApp`
+    (``start``, ``update`` and ``draw``).  The method :meth:`run` animates the game
+    as fast as possible, as if every frame took 1/fps seconds, until :meth:`stop` is
+    called or the given number of frames have passed.  As with the regular class, the
+    game is updated in fixed ticks of 1/tick_rate seconds.
+    """
+    # Class attribute for tracking textures (always empty)
+    TEXTURE_CACHE = TextureCache()
+    # Class attribute for JSON files loaded ahead of time (see AssetLoader)
+    JSON_CACHE = {}
+
+    # MUTABLE PROPERTIES
+    @property
+    def fps(self):
+        """
+        The number of frames-per-second the game pretends to run at.
+
+        **Invariant**: Must be an int or float > 0.
+        """
+        return self._fps
+
+    @fps.setter
+    def fps(self,value):
+        assert type(value) in [int,float], 'value %s is not a number' % repr(value)
+        assert value > 0, 'value %s is not positive' % repr(value)
+        self._fps = value
+
+    @property
+    def tick_rate(self):
+        """
+        The number of simulation ticks per second.
+        
+        The game is simulated in fixed ticks, independent of the frame rate. The 
+        method :meth:`update` is called once per tick, always with ``dt`` equal to 
+        1/tick_rate.  A frame may run several ticks (if frames are slower than ticks) 
+        or none at all (if they are faster).  By default this value is 60.
+        
+        **Invariant**: Must be an int or float > 0.
+        """
+        return self._tickrate
+
+    @tick_rate.setter
+    def tick_rate(self,value):
+        assert type(value) in [int,float], 'value %s is not a number' % repr(value)
+        assert value > 0, 'value %s is not positive' % repr(value)
+        self._tickrate = value
+
+    @property
+    def max_substeps(self):
+        """
+        The maximum number of ticks to run in a single frame.
+        
+        If the game falls so far behind that it would need more ticks than this to 
+        catch up, the extra time is dropped and the game slows down instead. By 
+        default this value is 5.
+        
+        **Invariant**: Must be an int > 0.
+        """
+        return self._maxsteps
+
+    @max_substeps.setter
+    def max_substeps(self,value):
+        assert type(value) == int, 'value %s is not an int' % repr(value)
+        assert value > 0, 'value %s is not positive' % repr(value)
+        self._maxsteps = value
+
+    # IMMUTABLE PROPERTIES
+    @property
+    def width(self):
+        """
+        The window width
+
+        **Invariant**: Must be an int or float > 0.
+        """
+        return self._gwidth
+
+    @property
+    def height(self):
+        """
+        The window height
+
+        **Invariant**: Must be an int or float > 0.
+        """
+        return self._gheight
+
+    @property
+    def alpha(self):
+        """
+        The fraction of a tick that has passed since the last call to :meth:`update`.
+        
+        This is the time left in the tick accumulator, divided by the length of a tick.
+        Before each call to :meth:`draw`, it is copied to the ``alpha`` attribute of
+        the view, so objects can be drawn between their previous and current tick.
+        
+        **Invariant**: Must be a float in 0..1.
+        """
+        return min(self._accumulator*self._tickrate,1.0)
+    
+    @property
+    def view(self):
+        """
+        The game view (see :class:`GView`).
+
+        **Invariant**: Must be instance of :class:`GView`.
+        """
+        return self._view
+
+    @property
+    def input(self):
+        """
+        The scripted input handler (see :class:`GInput`).
+
+        **Invariant**: Must be instance of :class:`GInput`
+        """
+        return self._input
+
+    @property
+    def frame(self):
+        """
+        The number of frames animated so far.
+
+        **Invariant**: Must be an int >= 0.
+        """
+        return self._frame
+
+    # CLASS METHODS
+    @classmethod
+    def is_image(cls,name):
+        """
+        :return: True if ``name`` refers to a file in the **Images** folder
+        :rtype:  ``bool``
+        """
+        return type(name) == str and os.path.exists(os.path.join(cls.images,name))
+
+    @classmethod
+    def is_font(cls,name):
+        """
+        :return: True if ``name`` refers to a file in the **Fonts** folder
+        :rtype:  ``bool``
+        """
+        return type(name) == str and os.path.exists(os.path.join(cls.fonts,name))
+
+    @classmethod
+    def is_sound(cls,name):
+        """
+        :return: True if ``name`` refers to a file in the **Sounds** folder
+        :rtype:  ``bool``
+        """
+        return type(name) == str and os.path.exists(os.path.join(cls.sounds,name))
+
+    @classmethod
+    def is_json(cls,name):
+        """
+        :return: True if ``name`` refers to a JSON file in the **Data** folder
+        :rtype:  ``bool``
+        """
+        if type(name) != str or name[-4:].lower() != 'json':
+            return False
+        return os.path.exists(os.path.join(cls.json,name))
+
+    @classmethod
+    def load_texture(cls,name,owner=None):
+        """
+        Returns: None, as there are no textures without a GL context
+
+        :param name: The file name
+        :type name:  ``str``
+
+        :param owner: The object that uses the texture
+        :type owner:  ``None`` or a :class:`GObject`
+        """
+        return None
+
+    @classmethod
+    def build_atlas(cls,names=None,size=4096):
+        """
+        Returns: None, as there are no textures without a GL context
+
+        :param names: The file names of the images to pack, or [name, side] pairs
+        :type names:  ``list`` of ``str`` or pairs, or ``None``
+
+        :param size: The largest width or height of an atlas texture
+        :type size:  ``int`` > 0
+        """
+        return None
+
+    @classmethod
+    def unload_texture(cls,name):
+        """
+        Returns: None, as there are no textures without a GL context
+
+        :param name: The file name
+        :type name:  ``str``
+        """
+        return None
+
+    @classmethod
+    def load_json(cls,name):
+        """
+        Returns: The JSON for the given file name, or None if it cannot be loaded
+
+        The ``name`` must refer to the file in the **Data** folder.
+
+        :param name: The file name
+        :type name:  ``str``
+        """
+        if name in cls.JSON_CACHE:
+            return cls.JSON_CACHE[name]
+
+        if not cls.is_json(name):
+            Logger.info('GameApp: No json file named %s.' % repr(name))
+            return None
+
+        try:
+            with open(os.path.join(cls.json,name)) as f:
+                return json.load(f)
+        except Exception as e:
+            Logger.info('GameApp: JSON %s is not properly formatted.' % repr(name))
+            return None
+
+    @classmethod
+    def set_resource_path(cls,path):
+        """
+        Sets the folder containing the Data, Fonts, Sounds and Images folders.
+
+        :param path: The application directory
+        :type path:  ``str``
+        """
+        cls.json   = os.path.join(path, 'Data')
+        cls.fonts  = os.path.join(path, 'Fonts')
+        cls.sounds = os.path.join(path, 'Sounds')
+        cls.images = os.path.join(path, 'Images')
+
+    # BUILT-IN METHODS
+    def __init__(self,**keywords):
+        """
+        Creates, but does not start, a new headless game.
+
+        :param keywords: dictionary of keyword arguments (``width``, ``height``, ``fps``,
+            ``tick_rate``, ``max_substeps``)
+        :type keywords:  keys are attribute names
+        """
+        self._gwidth = keywords.pop('width', 0.0)
+        self._gheight = keywords.pop('height', 0.0)
+        self.fps = keywords.pop('fps', 60.0)
+        self.tick_rate = keywords.pop('tick_rate', 60.0)
+        self.max_substeps = keywords.pop('max_substeps', 5)
+        self._accumulator = 0.0
+        self._view = GView()
+        self._input = GInput()
+        self._frame = 0
+        self._running = False
+
+        import inspect
+        path = os.path.dirname(os.path.abspath(inspect.getfile(self.__class__)))
+        GameApp.set_resource_path(path)
+
+    # PUBLIC METHODS
+    def run(self,frames=None):
+        """
+        Starts the game and animates it as fast as possible.
+
+        :param frames: The number of frames to animate, or None to run until stopped
+        :type frames:  ``int`` >= 0 or ``None``
+        """
+        self._running = True
+        self.start()
+        while self._running and (frames is None or self._frame < frames):
+            self._refresh(1.0/self.fps)
+
+    def stop(self):
+        """
+        Stops the animation loop started by :meth:`run`.
+        """
+        self._running = False
+
+    def build(self):
+        """
+        Returns the view, as there is no window to build.
+        """
+        return self._view
+
+    def start(self):
+        """
+        Initializes the game state, creating a new game.
+        """
+        pass
+
+    def update(self,dt):
+        """
+        Updates the state of the game one animation frame.
+
+        :param dt: time in seconds since last update
+        :type dt:  ``int`` or ``float``
+        """
+        pass
+
+    def draw(self):
+        """
+        Draws the game objects (to a view that is never displayed).
+        """
+        pass
+
+    def cleanup(self):
+        """
+        Performs any necessary clean-up before the application stops.
+        """
+        pass
+
+    # HIDDEN METHODS
+    def _refresh(self,dt):
+        """
+        Processes a single animation frame.
+
+        :param dt: time in seconds since last update
+        :type dt:  ``int`` or ``float``
+        """
+        self.view.clear()
+        self._tick(dt)
+        self.view.alpha = self.alpha
+        self.view._sync()
+        self.draw()
+        self._frame += 1
+
+    def _tick(self,dt):
+        """
+        Runs the simulation ticks owed after dt more seconds have passed.
+
+        This works exactly like the regular :class:`GameApp`.
+
+        :param dt: time in seconds since last frame
+        :type dt:  ``int`` or ``float``
+        """
+        step = 1.0/self._tickrate
+        self._accumulator += dt
+        ticks = 0
+        # The tolerance keeps rounding error from dropping a tick
+        while self._accumulator >= step-1e-9 and ticks < self._maxsteps:
+            self.input._prestep()
+            self.update(step)
+            self.input._poststep()
+            self._accumulator = max(self._accumulator-step,0.0)
+            ticks += 1
+        if self._accumulator >= step:
+            self._accumulator %= step
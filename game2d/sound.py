@@ -26,6 +26,9 @@ class Sound(object):
     # This class is a simply replacement for the built-in Kivy Sound class.  It is a
     # little better with error handling, since GStreamer appears to be quite unreliable.
     
+    # Class attribute for Kivy sounds loaded ahead of time (see AssetLoader), by file
+    PRELOADED = {}
+    
     # MUTABLE PROPERTIES
     @property
     def volume(self):
@@ -78,6 +81,9 @@ class Sound(object):
         from .app import GameApp
         assert GameApp.is_sound(source), 'source %s is not a sound file' % repr(source)
         self._source = source
+        if Sound.PRELOADED.get(source):
+            self._sound = Sound.PRELOADED[source].pop()
+            return
         self._sound  = SoundLoader.load(source)
         if self._sound is None:
             raise IOError('Module game2d cannot read the file %s' % repr(source))
@@ -0,0 +1,277 @@
+"""
+Procedural wave generator for Planetoids
+
+This module writes wave files in the usual format (see Data/wave1.json), with
+as many asteroids as we like. The shipped waves only have a handful of
+asteroids, so generated waves are what we use to stress the collision and
+drawing code with thousands (or hundreds of thousands) of them.
+
+A wave is determined by its options and a seed, so the same command always
+writes the same file. To write a wave with 5000 asteroids, mostly small ones,
+all heading towards the center of the screen, type
+
+    python generate.py generated/inward.json --count 5000 --mix 6,3,1 \\
+        --directions inward --seed 7
+
+The options control:
+
+  * how many asteroids there are (--count, or --density for the number per
+    100x100 pixels of screen), and whether they are spread evenly or gathered
+    in clusters (--clusters and --cluster-size),
+  * the mix of sizes (--mix, the weights of small, medium and large),
+  * their directions (--directions and --spread), and how many stand still
+    (--still),
+  * the safe zone, a circle around the ship spawn that no asteroid overlaps
+    (--safe-radius),
+  * when the asteroids spawn (--duration, to spread them over that many
+    seconds instead of having them all at the start).
+
+If the output ends in .jsonl, the wave is written as a wave stream (see
+wavefile.py), which the game reads a little at a time. Use this for waves with
+spawn times, or too large to load at once.
+
+Every asteroid of a size class moves at the speed of that class (see
+ASTEROID_SPEEDS), since the wave format only stores a direction. So only the
+direction of the velocity can be chosen here, not its length.
+"""
+from consts import *
+from wavefile import CompiledWave, WAVE_VERSION, STREAM_EXTENSION
+import numpy as np
+import argparse
+import json
+import os
+
+# The radius of the circle around the ship spawn kept clear of asteroids
+SAFE_RADIUS = 120
+
+# The ways to pick asteroid directions
+DIRECTIONS = ('uniform', 'inward', 'outward', 'stream')
+
+# The length of the direction vectors written to the file
+DIRECTION_SCALE = 100
+
+# The number of times to redraw the asteroids in the safe zone before giving up
+SAFE_ATTEMPTS = 100
+
+
+def generate_wave(count, seed=0, mix=(1, 1, 1), directions='uniform', spread=30.0,
+                  heading=0.0, still=0.0, clusters=0, cluster_size=60.0,
+                  safe_radius=SAFE_RADIUS, ship=(GAME_WIDTH // 2, GAME_HEIGHT // 2),
+                  angle=90, duration=0.0):
+    """
+    Returns a new wave (as a dict in the format of a wave file)
+
+    The asteroids are placed on the screen at random, except that none of them
+    overlaps the circle of radius safe_radius around the ship. The directions
+    are picked as follows:
+
+      * 'uniform': any direction, all equally likely
+      * 'inward': towards the center of the screen, give or take spread degrees
+      * 'outward': away from the center of the screen, give or take spread degrees
+      * 'stream': the angle heading, give or take spread degrees
+
+    where "give or take" means a normal distribution with that deviation.
+
+    If duration is not 0, every asteroid gets a random spawn time (in seconds, 
+    rounded to milliseconds) from 0 to duration, and the asteroids are listed 
+    in order of time. These waves should be saved as wave streams.
+
+    Parameter count: the number of asteroids
+    Precondition: count is an int >= 0
+
+    Parameter seed: the seed of the random choices
+    Precondition: seed is an int
+
+    Parameter mix: the relative weights of each size class (smallest first)
+    Precondition: mix is a sequence of len(ASTEROID_SIZES) numbers >= 0, not all 0
+
+    Parameter directions: the way to pick directions
+    Precondition: directions is one of DIRECTIONS
+
+    Parameter spread: the deviation of the directions, in degrees
+    Precondition: spread is a number >= 0
+
+    Parameter heading: the angle of the directions for 'stream', in degrees
+    Precondition: heading is a number
+
+    Parameter still: the fraction of asteroids that do not move
+    Precondition: still is a number in 0..1
+
+    Parameter clusters: the number of clusters (0 to spread the asteroids evenly)
+    Precondition: clusters is an int >= 0
+
+    Parameter cluster_size: the deviation of the distance from a cluster center
+    Precondition: cluster_size is a number > 0
+
+    Parameter safe_radius: the radius of the circle around the ship kept clear
+    Precondition: safe_radius is a number >= 0
+
+    Parameter ship: the position of the ship spawn
+    Precondition: ship is a pair of numbers
+
+    Parameter angle: the angle of the ship
+    Precondition: angle is a number
+
+    Parameter duration: the time over which the asteroids spawn, in seconds
+    Precondition: duration is a number >= 0
+    """
+    assert isinstance(count, int) and count >= 0
+    assert len(mix) == len(ASTEROID_SIZES) and min(mix) >= 0 and sum(mix) > 0
+    assert directions in DIRECTIONS, '%s is not one of %s' % (repr(directions), DIRECTIONS)
+    assert 0 <= still <= 1 and clusters >= 0 and cluster_size > 0 and duration >= 0
+    rng = np.random.default_rng(seed)
+    size = np.array([GAME_WIDTH, GAME_HEIGHT], dtype=float)
+    center = size / 2
+
+    kinds = rng.choice(len(mix), size=count, p=np.asarray(mix, float) / sum(mix))
+    radii = np.take(ASTEROID_RADII, kinds)
+    hubs = rng.uniform(0, 1, (clusters, 2)) * size
+
+    # Place the asteroids (on whole pixels), then place again the ones in the safe zone
+    positions = np.zeros((count, 2))
+    redo = np.arange(count)
+    for attempt in range(SAFE_ATTEMPTS):
+        positions[redo] = np.round(_place(rng, len(redo), size, hubs, cluster_size))
+        gap = np.hypot(positions[:, 0] - ship[0], positions[:, 1] - ship[1])
+        redo = np.flatnonzero(gap < safe_radius + radii)
+        if len(redo) == 0:
+            break
+    assert len(redo) == 0, 'the safe zone leaves no room for the asteroids'
+
+    # Pick the directions
+    if directions == 'uniform':
+        theta = rng.uniform(0, 2 * np.pi, count)
+    else:
+        if directions == 'stream':
+            theta = np.full(count, np.radians(heading))
+        else:
+            theta = np.arctan2(center[1] - positions[:, 1], center[0] - positions[:, 0])
+            if directions == 'outward':
+                theta += np.pi
+        theta += np.radians(spread) * rng.standard_normal(count)
+    vectors = np.round(DIRECTION_SCALE * np.column_stack((np.cos(theta), np.sin(theta))))
+    vectors[rng.uniform(0, 1, count) < still] = 0
+
+    positions = positions.astype(int).tolist()
+    vectors = vectors.astype(int).tolist()
+    asteroids = [{'size': ASTEROID_SIZES[kinds[i]], 'position': positions[i],
+                  'direction': vectors[i]} for i in range(count)]
+    if duration > 0:
+        times = np.round(rng.uniform(0, duration, count), 3)
+        order = np.argsort(times, kind='stable')
+        asteroids = [dict(time=float(times[i]), **asteroids[i]) for i in order]
+    return {'version': WAVE_VERSION,
+            'comment': 'Generated wave (seed %d, %d asteroids)' % (seed, count),
+            'ship': {'position': [int(ship[0]), int(ship[1])], 'angle': angle},
+            'asteroids': asteroids}
+
+
+def save_wave(data, path):
+    """
+    Checks the given wave and writes it to a file
+
+    Each asteroid is written on a line of its own. If path ends in 
+    STREAM_EXTENSION, the wave is written as a wave stream.
+
+    Parameter data: the wave to save
+    Precondition: data is a valid wave dict (see CompiledWave.from_json)
+
+    Parameter path: the file to write
+    Precondition: path is a string
+    """
+    CompiledWave.from_json(data)
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+
+    header = {key: value for (key, value) in data.items() if key != 'asteroids'}
+    if path.endswith(STREAM_EXTENSION):
+        with open(path, 'w') as f:
+            f.write(json.dumps(header) + '\n')
+            for asteroid in data['asteroids']:
+                f.write(json.dumps(asteroid) + '\n')
+        return
+
+    with open(path, 'w') as f:
+        f.write(json.dumps(header)[:-1] + ',\n"asteroids": [\n')
+        lines = [json.dumps(asteroid) for asteroid in data['asteroids']]
+        f.write(',\n'.join(lines))
+        f.write('\n]}\n')
+
+
+# HELPER FUNCTIONS
+def _place(rng, count, size, hubs, cluster_size):
+    """
+    Returns count random positions on the screen, as a float array of shape (count,2)
+
+    If there are no hubs, the positions are spread evenly. Otherwise, each one
+    is near a random hub, and wraps around the screen if it falls off an edge.
+
+    Parameter rng: the random number generator
+    Precondition: rng is a numpy Generator
+
+    Parameter count: the number of positions
+    Precondition: count is an int >= 0
+
+    Parameter size: the width and height of the screen
+    Precondition: size is a float array of shape (2,)
+
+    Parameter hubs: the cluster centers
+    Precondition: hubs is a float array of shape (k,2)
+
+    Parameter cluster_size: the deviation of the distance from a cluster center
+    Precondition: cluster_size is a number > 0
+    """
+    if len(hubs) == 0:
+        return rng.uniform(0, 1, (count, 2)) * size
+    near = hubs[rng.integers(0, len(hubs), count)]
+    return (near + cluster_size * rng.standard_normal((count, 2))) % size
+
+
+def main(argv=None):
+    """
+    Writes the wave described by the command line arguments
+
+    Parameter argv: the command line arguments (None for sys.argv[1:])
+    Precondition: argv is None or a list of strings
+    """
+    parser = argparse.ArgumentParser(description='Generate a Planetoids wave file.')
+    parser.add_argument('output', help='the wave file to write')
+    parser.add_argument('--count', type=int, default=1000, help='number of asteroids')
+    parser.add_argument('--density', type=float, default=None,
+                        help='asteroids per 100x100 pixels (overrides --count)')
+    parser.add_argument('--seed', type=int, default=0, help='the random seed')
+    parser.add_argument('--mix', default='1,1,1',
+                        help='weights of small, medium and large asteroids')
+    parser.add_argument('--directions', default='uniform', choices=DIRECTIONS,
+                        help='how to pick the asteroid directions')
+    parser.add_argument('--spread', type=float, default=30.0,
+                        help='deviation of the directions in degrees')
+    parser.add_argument('--heading', type=float, default=0.0,
+                        help="angle of the directions for 'stream', in degrees")
+    parser.add_argument('--still', type=float, default=0.0,
+                        help='fraction of asteroids that do not move')
+    parser.add_argument('--clusters', type=int, default=0,
+                        help='number of clusters (0 to spread evenly)')
+    parser.add_argument('--cluster-size', type=float, default=60.0,
+                        help='deviation of the distance from a cluster center')
+    parser.add_argument('--safe-radius', type=float, default=SAFE_RADIUS,
+                        help='radius of the circle around the ship kept clear')
+    parser.add_argument('--duration', type=float, default=0.0,
+                        help='seconds over which the asteroids spawn (0 for all at once)')
+    args = parser.parse_args(argv)
+
+    count = args.count
+    if not args.density is None:
+        count = int(round(args.density * GAME_WIDTH * GAME_HEIGHT / 10000))
+    mix = [float(weight) for weight in args.mix.split(',')]
+    data = generate_wave(count, args.seed, mix, args.directions, args.spread,
+                         args.heading, args.still, args.clusters, args.cluster_size,
+                         args.safe_radius, duration=args.duration)
+    save_wave(data, args.output)
+    print('%d asteroids written to %s' % (count, args.output))
+
+
+# Application code
+if __name__ == '__main__':
+    main()
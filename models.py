@@ -5,12 +5,11 @@ This module contains the model classes for the Planetoids game. Anything that
 you interact with on the screen is model: the ship, the bullets, and the 
 planetoids.
 
-We need models for these objects because they contain information beyond the 
-simple shapes like GImage and GEllipse. In particular, ALL of these classes 
-need a velocity representing their movement direction and speed (and hence they 
-all need an additional attribute representing this fact). But for the most part, 
-that is all they need. You will only need more complex models if you are adding 
-advanced features like scoring.
+The ship is a Ship, a GImage with a velocity and a facing. There are far more 
+bullets and planetoids, so they are not objects of their own. An AsteroidField 
+holds every planetoid and a BulletPool every bullet, as NumPy arrays of 
+positions and velocities that are moved all at once, and each is drawn with a 
+single batch instead of one shape per object.
 
 You are free to add even more models to this module. You may wish to do this 
 when you add new features to your game, such as power-ups. If you are unsure 
@@ -22,6 +21,7 @@ about whether to make a new class or not, please ask on Ed Discussions.
 from consts import *
 from game2d import *
 from introcs import *
+import numpy as np
 import math
 
 # PRIMARY RULE: Models are not allowed to access anything in any module other than
@@ -30,44 +30,28 @@ import math
 # the method.
 
 
-class Bullet(GEllipse):
+def blend_positions(positions, velocities, alpha):
     """
-    A class representing a bullet from the ship
-    
-    Bullets are typically just white circles (ellipses). The size of the bullet 
-    is determined by constants in consts.py. However, we MUST subclass GEllipse, 
-    because we need to add an extra attribute for the velocity of the bullet.
-    
-    The class Wave will need to look at this velocity, so you will need getters 
-    for the velocity components. However, it is possible to write this assignment 
-    with no setters for the velocities. That is because the velocity is fixed 
-    and cannot change once the bolt is fired.
-    
-    In addition to the getters, you need to write the __init__ method to set the 
-    starting velocity. This __init__ method will need to call the __init__ from 
-    GEllipse as a helper. This init will need a parameter to set the direction 
-    of the velocity.
-    
-    You also want to create a method to update the bolt. You update the bolt by 
-    adding the velocity to the position. While it is okay to add a method to 
-    detect collisions in this class, you may find it easier to process 
-    collisions in wave.py.
-    """
-    # LIST ANY ATTRIBUTES (AND THEIR INVARIANTS) HERE IF NECESSARY
+    Returns the positions of objects the given fraction of the way through a tick
     
-    # GETTERS AND SETTERS (ONLY ADD IF YOU NEED THEM)
+    Asteroids and bullets move by their velocity every tick, so their position 
+    in the previous tick is their position minus their velocity. Drawing them 
+    at alpha < 1 keeps them moving smoothly when frames are drawn faster than 
+    the game is updated. An object that wrapped this tick is drawn just past 
+    the edge it came in from, where its motion continues.
     
-    # INITIALIZER TO SET THE POSITION AND VELOCITY
-    def __init__(self, position, velocity):
-        super().__init__(x = position[0], y = position[1], width = BULLET_RADIUS*2,\
-                         height = BULLET_RADIUS * 2, fillcolor = BULLET_COLOR)
-        self._velocity = velocity
+    Parameter positions: the current positions
+    Precondition: positions is a float array of shape (k,2)
     
-    def update(self, dt):
-        self.x += self._velocity[0]
-        self.y += self._velocity[1]
+    Parameter velocities: the velocities
+    Precondition: velocities is a float array of shape (k,2)
     
-    # ADDITIONAL METHODS (MOVEMENT, COLLISIONS, ETC)
+    Parameter alpha: the fraction of the tick from the previous positions
+    Precondition: alpha is a float in 0..1
+    """
+    if alpha >= 1:
+        return positions
+    return positions - velocities * (1 - alpha)
 
 
 class Ship(GImage):
@@ -99,6 +83,15 @@ class Ship(GImage):
     def get_facing(self):
         return self._facing
     
+    def get_velocity(self):
+        return self._velocity
+    
+    def set_velocity(self, x, y):
+        self._velocity = Vector2(x, y)
+    
+    def set_facing(self, x, y):
+        self._facing = Vector2(x, y)
+    
     # INITIALIZER TO CREATE A NEW SHIP
     def __init__(self, position, angle):
         super().__init__(x = position[0], y = position[1], width = \
@@ -130,88 +123,538 @@ class Ship(GImage):
         #horizontal wrapping
         if self.x < -DEAD_ZONE:
             self.x += GAME_WIDTH + 2 * DEAD_ZONE
+            self.snap()
         elif self.x > GAME_WIDTH + DEAD_ZONE:
             self.x -= GAME_WIDTH + 2 * DEAD_ZONE
+            self.snap()
 
         #vertical wrapping
         if self.y < -DEAD_ZONE:
             self.y += GAME_HEIGHT + 2 * DEAD_ZONE
+            self.snap()
         elif self.y > GAME_WIDTH + DEAD_ZONE:
             self.y -= GAME_WIDTH + 2 * DEAD_ZONE
+            self.snap()
             
     
     # ADDITIONAL METHODS (MOVEMENT, COLLISIONS, ETC)
 
 
-class Asteroid(GImage):
+# IF YOU NEED ADDITIONAL MODEL CLASSES, THEY GO HERE
+
+class AsteroidField(object):
     """
-    A class to represent a single asteroid.
-    
-    Asteroids are typically are represented by images. Asteroids come in three 
-    different sizes (SMALL_ASTEROID, MEDIUM_ASTEROID, and LARGE_ASTEROID) that 
-    determine the choice of image and asteroid radius. We MUST subclass GImage, 
-    because we need extra attributes for both the size and the velocity of the 
-    asteroid.
-    
-    The class Wave will need to look at the size and velocity, so you will need 
-    getters for them.  However, it is possible to write this assignment with no 
-    setters for either of these. That is because they are fixed and cannot 
-    change when the asteroid is created. 
-    
-    In addition to the getters, you need to write the __init__ method to set the 
-    size and starting velocity. Note that the SPEED of an asteroid is defined in 
-    const.py, so the only thing that differs is the velocity direction.
-    
-    You also want to create a method to update the asteroid. You update the 
-    asteroid by adding the velocity to the position. While it is okay to add a 
-    method to detect collisions in this class, you may find it easier to process 
-    collisions in wave.py.
+    A class to represent all of the asteroids in a wave.
+    
+    Making every asteroid a GImage is slow, since every step goes through the 
+    validating x and y setters of GImage. Instead, this class keeps 
+    the state of every asteroid in contiguous NumPy arrays (position, velocity, 
+    radius and size class) and moves all of them at once in update.
+    
+    Asteroids are identified by their index in the arrays. Indices are in the 
+    order that the asteroids were added, and removing asteroids keeps the 
+    remaining ones in the same order (like removing them from a list).
+    
+    The field is drawn with a single GSpriteBatch, so the cost of drawing does 
+    not grow with the number of Kivy objects. Each sprite picks the image and 
+    size of its size class, which only works if the images of every size are in 
+    one texture atlas (see ASSET_MANIFEST).
     """
     # LIST ANY ATTRIBUTES (AND THEIR INVARIANTS) HERE IF NECESSARY
+    # Attribute _count: the number of asteroids in the field
+    # Invariant: _count is an int >= 0
+    #
+    # Attribute _pos: the asteroid positions; only the first _count rows are used
+    # Invariant: _pos is a float array of shape (capacity,2), capacity >= _count
+    #
+    # Attribute _vel: the asteroid velocities; only the first _count rows are used
+    # Invariant: _vel is a float array of shape (capacity,2)
+    #
+    # Attribute _radius: the asteroid radii; only the first _count entries are used
+    # Invariant: _radius is a float array of shape (capacity,)
+    #
+    # Attribute _size: the size classes (indices into ASTEROID_SIZES)
+    # Invariant: _size is an int8 array of shape (capacity,)
+    #
+    # Attribute _batches: the sprite batches used to draw the asteroids, one for 
+    #            each texture, with the size classes that each batch draws
+    # Invariant: _batches is a list of (GSpriteBatch, int array) pairs, where the 
+    #            sources of each batch are the ASTEROID_IMAGES of its size classes, 
+    #            or None if the field was never drawn
     
     # GETTERS AND SETTERS (ONLY ADD IF YOU NEED THEM)
-    def get_size(self):
-        return self._size
-
-    def get_velocity(self):
-        return self._velocity
+    def get_count(self):
+        """
+        Returns the number of asteroids in the field
+        """
+        return self._count
+    
+    def get_positions(self):
+        """
+        Returns a (count,2) view of the asteroid positions
+        """
+        return self._pos[:self._count]
+    
+    def get_velocities(self):
+        """
+        Returns a (count,2) view of the asteroid velocities
+        """
+        return self._vel[:self._count]
+    
+    def get_radii(self):
+        """
+        Returns a (count,) view of the asteroid radii
+        """
+        return self._radius[:self._count]
+    
+    def get_sizes(self):
+        """
+        Returns a (count,) view of the asteroid size classes
+        """
+        return self._size[:self._count]
+    
+    def get_size(self, index):
+        """
+        Returns the size name (e.g. 'large') of the asteroid at index
+        """
+        return ASTEROID_SIZES[self._size[index]]
     
-    # INITIALIZER TO CREATE A NEW ASTEROID
-    def __init__(self, size, position, direction, image, width, height):
-        super().__init__(x=position[0], y=position[1], source=image, \
-                         width=width, height=height)
-        self._size = size
-
-        if size == 'small':
-            speed = SMALL_SPEED
-        elif size == 'medium':
-            speed = MEDIUM_SPEED
-        elif size == 'large':
-            speed = LARGE_SPEED
-
-        if direction == [0, 0]:
-            self._velocity = Vector2(0, 0)
+    # INITIALIZER TO CREATE AN EMPTY FIELD
+    def __init__(self, capacity=64):
+        """
+        Initializes an empty field
+        
+        Parameter capacity: the number of asteroids to allocate space for
+        Precondition: capacity is an int > 0 (the field grows as needed)
+        """
+        assert isinstance(capacity, int) and capacity > 0
+        self._count = 0
+        self._pos = np.zeros((capacity, 2))
+        self._vel = np.zeros((capacity, 2))
+        self._radius = np.zeros(capacity)
+        self._size = np.zeros(capacity, dtype=np.int8)
+        self._batches = None
+    
+    def add(self, size, position, direction):
+        """
+        Adds a new asteroid to the end of the field
+        
+        The direction is scaled to the speed for this size to get the velocity, 
+        and a [0,0] direction means the asteroid does not move.
+        
+        Parameter size: the asteroid size
+        Precondition: size is one of the names in ASTEROID_SIZES
+        
+        Parameter position: the asteroid center
+        Precondition: position is a pair of numbers
+        
+        Parameter direction: the direction of movement
+        Precondition: direction is a pair of numbers
+        """
+        kind = ASTEROID_SIZES.index(size)
+        speed = ASTEROID_SPEEDS[kind]
+        
+        if direction[0] == 0 and direction[1] == 0:
+            vx, vy = 0.0, 0.0
         else:
             m = math.sqrt(direction[0]**2 + direction[1]**2)
-            self._velocity = Vector2(speed * direction[0] / m, speed * direction[1] / m)
+            vx, vy = speed * direction[0] / m, speed * direction[1] / m
+        
+        n = self._count
+        if n == self._pos.shape[0]:
+            self._grow(2 * n)
+        self._pos[n] = position
+        self._vel[n] = (vx, vy)
+        self._radius[n] = ASTEROID_RADII[kind]
+        self._size[n] = kind
+        self._count = n + 1
+    
+    def add_many(self, kinds, positions, directions):
+        """
+        Adds several new asteroids to the end of the field, in order
+        
+        This is the same as calling add on each asteroid, except that the size 
+        is given as a size class instead of a name.
+        
+        Parameter kinds: the size classes (indices into ASTEROID_SIZES)
+        Precondition: kinds is an int array of shape (k,)
+        
+        Parameter positions: the asteroid centers
+        Precondition: positions is a float array of shape (k,2)
+        
+        Parameter directions: the directions of movement
+        Precondition: directions is a float array of shape (k,2)
+        """
+        k = len(kinds)
+        n = self._count
+        if n + k > self._pos.shape[0]:
+            self._grow(max(2 * self._pos.shape[0], n + k))
+        
+        speed = np.take(ASTEROID_SPEEDS, kinds)
+        m = np.sqrt(directions[:, 0]**2 + directions[:, 1]**2)
+        still = m == 0
+        m[still] = 1
+        vel = self._vel[n:n+k]
+        vel[:, 0] = speed * directions[:, 0] / m
+        vel[:, 1] = speed * directions[:, 1] / m
+        vel[still] = 0
+        
+        self._pos[n:n+k] = positions
+        self._radius[n:n+k] = np.take(ASTEROID_RADII, kinds)
+        self._size[n:n+k] = kinds
+        self._count = n + k
+    
+    def load(self, kinds, positions, velocities):
+        """
+        Replaces every asteroid in the field with the given ones, in order
+        
+        Unlike add_many, the velocities are given directly.
+        
+        Parameter kinds: the size classes (indices into ASTEROID_SIZES)
+        Precondition: kinds is an int array of shape (k,)
+        
+        Parameter positions: the asteroid centers
+        Precondition: positions is a float array of shape (k,2)
+        
+        Parameter velocities: the asteroid velocities
+        Precondition: velocities is a float array of shape (k,2)
+        """
+        k = len(kinds)
+        self._count = 0
+        if k > self._pos.shape[0]:
+            self._grow(max(2 * self._pos.shape[0], k))
+        self._pos[:k] = positions
+        self._vel[:k] = velocities
+        self._radius[:k] = np.take(ASTEROID_RADII, kinds)
+        self._size[:k] = kinds
+        self._count = k
+    
+    def remove(self, indices):
+        """
+        Removes the asteroids at the given indices
+        
+        The remaining asteroids keep their relative order.
+        
+        Parameter indices: the indices to remove
+        Precondition: indices is an int array (or list) of valid indices
+        """
+        n = self._count
+        keep = np.ones(n, dtype=bool)
+        keep[np.asarray(indices, dtype=int)] = False
+        k = int(keep.sum())
+        if k == n:
+            return
+        
+        self._pos[:k] = self._pos[:n][keep]
+        self._vel[:k] = self._vel[:n][keep]
+        self._radius[:k] = self._radius[:n][keep]
+        self._size[:k] = self._size[:n][keep]
+        self._count = k
     
     def update(self, dt):
-        self.x += self._velocity.x
-        self.y += self._velocity.y
-
+        """
+        Moves every asteroid by its velocity, wrapping around the screen
+        
+        The wrapping follows the same rules as Ship.update.
+        
+        Parameter dt: the time since the last update
+        Precondition: dt is a number (int or float)
+        """
+        n = self._count
+        x = self._pos[:n, 0]
+        y = self._pos[:n, 1]
+        x += self._vel[:n, 0]
+        y += self._vel[:n, 1]
+        
         #horizontal wrapping
-        if self.x < -DEAD_ZONE:
-            self.x += GAME_WIDTH + 2 * DEAD_ZONE
-        elif self.x > GAME_WIDTH + DEAD_ZONE:
-            self.x -= GAME_WIDTH + 2 * DEAD_ZONE
-
+        low = x < -DEAD_ZONE
+        high = x > GAME_WIDTH + DEAD_ZONE
+        x[low] += GAME_WIDTH + 2 * DEAD_ZONE
+        x[high] -= GAME_WIDTH + 2 * DEAD_ZONE
+        
         #vertical wrapping
-        if self.y < -DEAD_ZONE:
-            self.y += GAME_HEIGHT + 2 * DEAD_ZONE
-        elif self.y > GAME_WIDTH + DEAD_ZONE:
-            self.y -= GAME_WIDTH + 2 * DEAD_ZONE
-
+        low = y < -DEAD_ZONE
+        high = y > GAME_WIDTH + DEAD_ZONE
+        y[low] += GAME_HEIGHT + 2 * DEAD_ZONE
+        y[high] -= GAME_WIDTH + 2 * DEAD_ZONE
     
-    # ADDITIONAL METHODS (MOVEMENT, COLLISIONS, ETC)
+    def draw(self, view):
+        """
+        Draws every asteroid as one sprite batch for each asteroid texture
+        
+        If the asteroid images are packed in one atlas, this is a single batch. 
+        Otherwise the size classes are split into one batch per texture.
+        
+        If the alpha of the view is less than 1, each asteroid is drawn that 
+        fraction of the way through the last tick (see blend_positions).
+        
+        Parameter view: the view to draw to
+        Precondition: view is a GView object
+        """
+        positions = blend_positions(self.get_positions(), self.get_velocities(), 
+                                    view.alpha)
+        if self._batches is None:
+            self._batches = self._make_batches()
+        
+        sizes = self.get_sizes()
+        diameters = self.get_radii() * 2
+        if len(self._batches) == 1:
+            batch, kinds = self._batches[0]
+            batch.set_sprites(positions, images=np.searchsorted(kinds, sizes), 
+                              sizes=diameters)
+            batch.draw(view)
+            return
+        
+        for batch, kinds in self._batches:
+            mine = np.isin(sizes, kinds)
+            batch.set_sprites(positions[mine], 
+                              images=np.searchsorted(kinds, sizes[mine]), 
+                              sizes=diameters[mine])
+            batch.draw(view)
+    
+    # HELPER METHODS
+    def _make_batches(self):
+        """
+        Returns the sprite batches to draw the asteroids, one for each texture
+        
+        The size classes whose images are regions of the same texture share a 
+        batch, so the images packed in one atlas give a single batch. Without a 
+        texture (as when headless), every size class shares one batch.
+        """
+        groups = {}
+        for kind in range(len(ASTEROID_IMAGES)):
+            texture = GameApp.load_texture(ASTEROID_IMAGES[kind])
+            key = None if texture is None else texture.id
+            if not key in groups:
+                groups[key] = []
+            groups[key].append(kind)
+        
+        result = []
+        for kinds in groups.values():
+            sources = [ASTEROID_IMAGES[kind] for kind in kinds]
+            result.append((GSpriteBatch(sources=sources), np.array(kinds)))
+        return result
+    
+    def _grow(self, capacity):
+        """
+        Reallocates the arrays so that they can hold capacity asteroids
+        
+        Parameter capacity: the new capacity
+        Precondition: capacity is an int >= self._count
+        """
+        n = self._count
+        pos = np.zeros((capacity, 2))
+        vel = np.zeros((capacity, 2))
+        radius = np.zeros(capacity)
+        size = np.zeros(capacity, dtype=np.int8)
+        pos[:n] = self._pos[:n]
+        vel[:n] = self._vel[:n]
+        radius[:n] = self._radius[:n]
+        size[:n] = self._size[:n]
+        self._pos, self._vel, self._radius, self._size = pos, vel, radius, size
 
-# IF YOU NEED ADDITIONAL MODEL CLASSES, THEY GO HERE
+
+class BulletPool(object):
+    """
+    A class to represent all of the bullets on screen.
+    
+    Making a new GEllipse for every shot is slow, since every GEllipse builds 
+    its own Kivy drawing instructions. Instead, this class stores the bullets 
+    in a fixed number of slots. The free slots are kept on a stack, so a new 
+    bullet takes the slot on top, and a removed bullet puts its slot back. Both 
+    spawn and despawn take constant time (per bullet), no matter where the 
+    free slots are.
+    
+    The positions and velocities are stored in NumPy arrays and moved all at 
+    once in update. All of the bullets are drawn with a single GEllipseBatch, 
+    whose vertices are written straight from the position array.
+    
+    Every bullet gets a number when it is fired, and live bullets are always 
+    listed in the order of these numbers, which is the order they were fired.
+    """
+    # LIST ANY ATTRIBUTES (AND THEIR INVARIANTS) HERE IF NECESSARY
+    # Attribute _pos: the bullet position in each slot
+    # Invariant: _pos is a float array of shape (capacity,2)
+    #
+    # Attribute _vel: the bullet velocity in each slot
+    # Invariant: _vel is a float array of shape (capacity,2)
+    #
+    # Attribute _live: whether each slot holds a bullet on screen
+    # Invariant: _live is a bool array of shape (capacity,)
+    #
+    # Attribute _order: the number of the bullet in each slot
+    # Invariant: _order is an int array of shape (capacity,); the numbers of 
+    #            live bullets are distinct and increase in the order fired
+    #
+    # Attribute _fired: the number of the next bullet fired
+    # Invariant: _fired is an int greater than every number in _order
+    #
+    # Attribute _free: the free slots, the next one to use last
+    # Invariant: _free is a list of the slots that are not live, without duplicates
+    #
+    # Attribute _slots: the live slots in the order fired, or None if not known
+    # Invariant: _slots is None or an int array (see get_slots)
+    #
+    # Attribute _misses: the number of shots dropped because the pool was full
+    # Invariant: _misses is an int >= 0
+    #
+    # Attribute _batch: the ellipse batch used to draw the bullets
+    # Invariant: _batch is a GEllipseBatch, or None if the pool was never drawn
+    
+    # GETTERS AND SETTERS (ONLY ADD IF YOU NEED THEM)
+    def get_capacity(self):
+        """
+        Returns the maximum number of live bullets
+        """
+        return len(self._live)
+    
+    def get_count(self):
+        """
+        Returns the number of live bullets
+        """
+        return len(self._live) - len(self._free)
+    
+    def get_misses(self):
+        """
+        Returns the number of shots dropped because the pool was full
+        """
+        return self._misses
+    
+    def get_slots(self):
+        """
+        Returns the slots of the live bullets, oldest first
+        """
+        if self._slots is None:
+            live = np.flatnonzero(self._live)
+            self._slots = live[np.argsort(self._order[live])]
+        return self._slots
+    
+    def get_positions(self):
+        """
+        Returns a (count,2) array of the live bullet positions, oldest first
+        """
+        return self._pos[self.get_slots()]
+    
+    def get_velocities(self):
+        """
+        Returns a (count,2) array of the live bullet velocities, oldest first
+        """
+        return self._vel[self.get_slots()]
+    
+    # INITIALIZER TO CREATE AN EMPTY POOL
+    def __init__(self, capacity=BULLET_POOL_SIZE):
+        """
+        Initializes an empty pool
+        
+        Parameter capacity: the maximum number of live bullets
+        Precondition: capacity is an int > 0
+        """
+        assert isinstance(capacity, int) and capacity > 0
+        self._pos = np.zeros((capacity, 2))
+        self._vel = np.zeros((capacity, 2))
+        self._live = np.zeros(capacity, dtype=bool)
+        self._order = np.zeros(capacity, dtype=np.int64)
+        self._fired = 0
+        self._free = list(range(capacity - 1, -1, -1))
+        self._slots = None
+        self._misses = 0
+        self._batch = None
+    
+    def spawn(self, position, velocity):
+        """
+        Adds a new bullet, returning True if there was room for it
+        
+        If every slot is taken, the shot is dropped and counted as a miss.
+        
+        Parameter position: the bullet center
+        Precondition: position is a pair of numbers
+        
+        Parameter velocity: the bullet velocity
+        Precondition: velocity is a pair of numbers
+        """
+        if not self._free:
+            self._misses += 1
+            return False
+        
+        slot = self._free.pop()
+        self._pos[slot] = position
+        self._vel[slot] = velocity
+        self._live[slot] = True
+        self._order[slot] = self._fired
+        self._fired += 1
+        self._slots = None
+        return True
+    
+    def load(self, positions, velocities, misses=0):
+        """
+        Replaces every bullet in the pool with the given ones, oldest first
+        
+        Parameter positions: the bullet centers
+        Precondition: positions is a float array of shape (k,2), k <= capacity
+        
+        Parameter velocities: the bullet velocities
+        Precondition: velocities is a float array of shape (k,2)
+        
+        Parameter misses: the number of shots dropped so far
+        Precondition: misses is an int >= 0
+        """
+        k = len(positions)
+        capacity = len(self._live)
+        assert k <= capacity
+        self._pos[:k] = positions
+        self._vel[:k] = velocities
+        self._live[:k] = True
+        self._live[k:] = False
+        self._order[:k] = np.arange(k)
+        self._fired = k
+        self._free = list(range(capacity - 1, k - 1, -1))
+        self._slots = None
+        self._misses = misses
+    
+    def despawn(self, slots):
+        """
+        Removes the bullets in the given slots
+        
+        Parameter slots: the slots to free
+        Precondition: slots is an int array of live slots, with no duplicates
+        """
+        if len(slots) == 0:
+            return
+        self._live[slots] = False
+        self._free.extend(slots.tolist())
+        self._slots = None
+    
+    def update(self, dt):
+        """
+        Moves every bullet by its velocity, removing those that leave the screen
+        
+        Parameter dt: the time since the last update
+        Precondition: dt is a number (int or float)
+        """
+        slots = self.get_slots()
+        pos = self._pos[slots] + self._vel[slots]
+        self._pos[slots] = pos
+        
+        x = pos[:, 0]
+        y = pos[:, 1]
+        gone = (x < -DEAD_ZONE) | (x > GAME_WIDTH + DEAD_ZONE) | \
+            (y < -DEAD_ZONE) | (y > GAME_WIDTH + DEAD_ZONE)
+        if gone.any():
+            self.despawn(slots[gone])
+    
+    def draw(self, view):
+        """
+        Draws every live bullet as one ellipse batch
+        
+        Parameter view: the view to draw to
+        Precondition: view is a GView object
+        """
+        if self._batch is None:
+            self._batch = GEllipseBatch(width=BULLET_RADIUS * 2, 
+                                        height=BULLET_RADIUS * 2, 
+                                        fillcolor=BULLET_COLOR)
+        slots = self.get_slots()
+        positions = blend_positions(self._pos[slots], self._vel[slots], 
+                                    view.alpha)
+        self._batch.set_positions(positions)
+        self._batch.draw(view)
@@ -0,0 +1,745 @@
+"""
+Batched simulation module for Planetoids
+
+This module plays many independent waves (worlds) at once. Playing one Wave
+object per episode spends almost all of its time in the Python interpreter,
+which is far too slow for reinforcement learning or Monte Carlo balancing.
+A WaveBatch instead stores the state of every world in stacked NumPy arrays,
+one row per world, and advances all of them with a single call to step.
+
+The rules are the same as Wave.update, Wave.collide and Wave.break_ast, played
+the way Simulation.step plays them: when the ship is hit and lives remain, it
+is restored right away. A world stops changing once it is complete (the player
+is out of lives or every asteroid is destroyed), until it is reset.
+
+Worlds have a fixed number of asteroid slots, enough for every asteroid in the
+wave to break all the way down to small ones, and BULLET_POOL_SIZE bullet slots.
+Unused slots are masked out. Wave keeps its asteroids and bullets in the order
+they were created, which decides which bullet hits which asteroid; here each
+asteroid and bullet gets an increasing sequence number instead, so that slots
+can be reused in any order.
+
+The player input for each world is an action: a bitwise or of ACTION_LEFT,
+ACTION_RIGHT, ACTION_THRUST and ACTION_FIRE.
+"""
+from consts import *
+import numpy as np
+import math
+
+# Action bit to turn the ship left (the 'left' key)
+ACTION_LEFT   = 1
+# Action bit to turn the ship right (the 'right' key)
+ACTION_RIGHT  = 2
+# Action bit to apply thrust (the 'up' key)
+ACTION_THRUST = 4
+# Action bit to fire a bullet (the 'spacebar' key)
+ACTION_FIRE   = 8
+
+# The number of frames the ship is safe after it is restored (see Wave.update)
+SHIP_SAFE_FRAMES = 200
+
+# A coordinate far from the playfield, used for wrapped copies that do not exist
+_FAR = 1e9
+
+# The number of bullets tested against the asteroids at a time (to stay in cache)
+_CHUNK = 2048
+
+
+def action_from_keys(keys):
+    """
+    Returns the action for the given set of keys held down
+
+    Parameter keys: the keys held down (e.g. ['left','spacebar'])
+    Precondition: keys is an iterable of key names
+    """
+    action = 0
+    for (key, bit) in (('left', ACTION_LEFT), ('right', ACTION_RIGHT),
+                       ('up', ACTION_THRUST), ('spacebar', ACTION_FIRE)):
+        if key in keys:
+            action |= bit
+    return action
+
+
+def _leaves(data):
+    """
+    Returns the number of small asteroids the asteroids of a wave can break into
+
+    Parameter data: the wave
+    Precondition: data is a wave dict (see Data/wave1.json)
+    """
+    return sum(3 ** ASTEROID_SIZES.index(a['size']) for a in data['asteroids'])
+
+
+class WaveBatch(object):
+    """
+    A class to play many waves at once, with every world stored in NumPy arrays.
+
+    The worlds are indexed 0..W-1. Each world plays its own wave (several worlds
+    may share the same wave dict), and all of them are advanced by step.
+
+    Ship state is stored in arrays of shape (W,). Asteroid state is stored in
+    arrays of shape (W,A) and bullet state in arrays of shape (W,B), along with
+    a mask of the slots in use.
+    """
+    # Attribute _data: the wave of each world
+    # Invariant: _data is a list of W wave dicts
+    #
+    # Attribute _ship_pos, _ship_vel: the ship positions and velocities
+    # Invariant: _ship_pos, _ship_vel are float arrays of shape (W,2)
+    #
+    # Attribute _ship_angle: the ship angles in degrees
+    # Invariant: _ship_angle is a float array of shape (W,)
+    #
+    # Attribute _ast_pos, _ast_vel: the asteroid positions and velocities
+    # Invariant: _ast_pos, _ast_vel are float arrays of shape (W,A,2)
+    #
+    # Attribute _ast_size: the asteroid size classes (indices into ASTEROID_SIZES)
+    # Invariant: _ast_size is an int8 array of shape (W,A)
+    #
+    # Attribute _ast_radius: the asteroid radii
+    # Invariant: _ast_radius is a float array of shape (W,A)
+    #
+    # Attribute _ast_live: whether each asteroid slot is in use
+    # Invariant: _ast_live is a bool array of shape (W,A)
+    #
+    # Attribute _ast_seq: the order the asteroids were created in
+    # Invariant: _ast_seq is an int64 array of shape (W,A), increasing with age
+    #
+    # Attribute _bul_pos, _bul_vel: the bullet positions and velocities
+    # Invariant: _bul_pos, _bul_vel are float arrays of shape (W,B,2)
+    #
+    # Attribute _bul_live: whether each bullet slot is in use
+    # Invariant: _bul_live is a bool array of shape (W,B)
+    #
+    # Attribute _bul_seq: the order the bullets were fired in
+    # Invariant: _bul_seq is an int64 array of shape (W,B), increasing with age
+    #
+    # Attribute _next_ast, _next_bul: the next sequence numbers
+    # Invariant: _next_ast, _next_bul are int64 arrays of shape (W,)
+    #
+    # Attribute _last_shot, _reset_time: the frame counters of Wave
+    # Invariant: _last_shot, _reset_time are int arrays of shape (W,)
+    #
+    # Attribute _life_lost: whether the ship is safe from asteroids
+    # Invariant: _life_lost is a bool array of shape (W,)
+    #
+    # Attribute _lives, _score, _frame: the lives, score and frames played
+    # Invariant: _lives, _score, _frame are int arrays of shape (W,)
+    #
+    # Attribute _misses: the shots dropped because the bullet slots were full
+    # Invariant: _misses is an int array of shape (W,)
+    #
+    # Attribute _wave: the index of the wave of each world among the distinct waves
+    # Invariant: _wave is an int array of shape (W,)
+    #
+    # Attribute _start_pos, _start_angle: the ship start of each distinct wave
+    # Invariant: _start_pos is a float array of shape (U,2), _start_angle of shape (U,)
+    #
+    # Attribute _start_ast_pos, _start_ast_vel, _start_ast_size: the asteroids
+    # of each distinct wave at its start, in the first slots
+    # Invariant: _start_ast_pos, _start_ast_vel are float arrays of shape (U,A,2),
+    # _start_ast_size is an int8 array of shape (U,A)
+    #
+    # Attribute _start_count: the number of asteroids of each distinct wave
+    # Invariant: _start_count is an int64 array of shape (U,)
+
+    # GETTERS AND SETTERS (ONLY ADD IF YOU NEED THEM)
+    def get_world_count(self):
+        """
+        Returns the number of worlds
+        """
+        return len(self._data)
+
+    def get_lives(self):
+        """
+        Returns the lives left in each world
+        """
+        return self._lives
+
+    def get_scores(self):
+        """
+        Returns the score of each world
+        """
+        return self._score
+
+    def get_frames(self):
+        """
+        Returns the number of frames played in each world
+        """
+        return self._frame
+
+    def get_misses(self):
+        """
+        Returns the number of shots dropped in each world
+        """
+        return self._misses
+
+    def get_asteroid_counts(self):
+        """
+        Returns the number of asteroids left in each world
+        """
+        return self._ast_live.sum(axis=1)
+
+    def get_bullet_counts(self):
+        """
+        Returns the number of bullets on screen in each world
+        """
+        return self._bul_live.sum(axis=1)
+
+    def get_ship_positions(self):
+        """
+        Returns a (W,2) array of the ship positions
+        """
+        return self._ship_pos
+
+    def get_ship_velocities(self):
+        """
+        Returns a (W,2) array of the ship velocities
+        """
+        return self._ship_vel
+
+    def get_ship_angles(self):
+        """
+        Returns a (W,) array of the ship angles in degrees
+        """
+        return self._ship_angle
+
+    def get_asteroids(self, world):
+        """
+        Returns the asteroids of a world as a tuple (positions,velocities,sizes)
+
+        The asteroids are listed in the order that Wave would list them.
+
+        Parameter world: the world index
+        Precondition: world is an int in 0..W-1
+        """
+        slots = np.nonzero(self._ast_live[world])[0]
+        slots = slots[np.argsort(self._ast_seq[world, slots])]
+        return (self._ast_pos[world, slots], self._ast_vel[world, slots],
+                self._ast_size[world, slots])
+
+    def get_bullets(self, world):
+        """
+        Returns the bullets of a world as a tuple (positions,velocities), oldest first
+
+        Parameter world: the world index
+        Precondition: world is an int in 0..W-1
+        """
+        slots = np.nonzero(self._bul_live[world])[0]
+        slots = slots[np.argsort(self._bul_seq[world, slots])]
+        return (self._bul_pos[world, slots], self._bul_vel[world, slots])
+
+    def get_done(self):
+        """
+        Returns a (W,) bool array of the worlds that are complete
+        """
+        return (self._lives <= 0) | ~self._ast_live.any(axis=1)
+
+    # INITIALIZER
+    def __init__(self, data, worlds=None):
+        """
+        Initializes a batch of worlds at the start of their waves
+
+        Parameter data: the wave to play in every world, or a list with one wave per world
+        Precondition: data is a wave dict or a non-empty list of wave dicts
+
+        Parameter worlds: the number of worlds (only used if data is a single wave)
+        Precondition: worlds is None or an int > 0
+        """
+        if type(data) == dict:
+            data = [data] * (1 if worlds is None else worlds)
+        assert len(data) > 0
+        self._data = list(data)
+        w = len(self._data)
+        a = max(_leaves(d) for d in self._data)
+        b = BULLET_POOL_SIZE
+
+        self._ship_pos = np.zeros((w, 2))
+        self._ship_vel = np.zeros((w, 2))
+        self._ship_angle = np.zeros(w)
+        self._ast_pos = np.zeros((w, a, 2))
+        self._ast_vel = np.zeros((w, a, 2))
+        self._ast_size = np.zeros((w, a), dtype=np.int8)
+        self._ast_radius = np.zeros((w, a))
+        self._ast_live = np.zeros((w, a), dtype=bool)
+        self._ast_seq = np.zeros((w, a), dtype=np.int64)
+        self._bul_pos = np.zeros((w, b, 2))
+        self._bul_vel = np.zeros((w, b, 2))
+        self._bul_live = np.zeros((w, b), dtype=bool)
+        self._bul_seq = np.zeros((w, b), dtype=np.int64)
+        self._next_ast = np.zeros(w, dtype=np.int64)
+        self._next_bul = np.zeros(w, dtype=np.int64)
+        self._last_shot = np.zeros(w, dtype=int)
+        self._reset_time = np.zeros(w, dtype=int)
+        self._life_lost = np.zeros(w, dtype=bool)
+        self._hit = np.zeros(w, dtype=bool)
+        self._lives = np.zeros(w, dtype=int)
+        self._score = np.zeros(w, dtype=int)
+        self._frame = np.zeros(w, dtype=int)
+        self._misses = np.zeros(w, dtype=int)
+
+        # Convert each distinct wave once, so that reset only copies arrays
+        waves = {}
+        self._wave = np.array([waves.setdefault(id(d), len(waves)) for d in self._data])
+        waves = list({id(d): d for d in self._data}.values())
+        u = len(waves)
+        self._start_pos = np.array([d['ship']['position'] for d in waves], dtype=float)
+        self._start_angle = np.array([d['ship']['angle'] for d in waves], dtype=float)
+        self._start_ast_pos = np.zeros((u, a, 2))
+        self._start_ast_vel = np.zeros((u, a, 2))
+        self._start_ast_size = np.zeros((u, a), dtype=np.int8)
+        self._start_count = np.zeros(u, dtype=np.int64)
+        for (i, data) in enumerate(waves):
+            rocks = data['asteroids']
+            n = len(rocks)
+            kinds = np.array([ASTEROID_SIZES.index(r['size']) for r in rocks], dtype=int)
+            directions = np.array([r['direction'] for r in rocks], dtype=float).reshape(n, 2)
+            self._start_ast_pos[i, :n] = np.array([r['position'] for r in rocks], dtype=float).reshape(n, 2)
+            self._start_ast_vel[i, :n] = self._velocities(kinds, directions)
+            self._start_ast_size[i, :n] = kinds
+            self._start_count[i] = n
+        self.reset()
+
+    # PUBLIC METHODS
+    def reset(self, worlds=None):
+        """
+        Restarts the given worlds at the start of their waves
+
+        Parameter worlds: the worlds to restart (None for all of them)
+        Precondition: worlds is None, a (W,) bool array, or an array of world indices
+        """
+        if worlds is None:
+            worlds = np.arange(len(self._data))
+        worlds = np.asarray(worlds)
+        if worlds.dtype == bool:
+            worlds = np.nonzero(worlds)[0]
+
+        wave = self._wave[worlds]
+        self._ship_pos[worlds] = self._start_pos[wave]
+        self._ship_vel[worlds] = 0
+        self._ship_angle[worlds] = self._start_angle[wave]
+
+        count = self._start_count[wave]
+        slots = np.arange(self._ast_live.shape[1])
+        self._ast_pos[worlds] = self._start_ast_pos[wave]
+        self._ast_vel[worlds] = self._start_ast_vel[wave]
+        self._ast_size[worlds] = self._start_ast_size[wave]
+        self._ast_radius[worlds] = np.take(ASTEROID_RADII, self._ast_size[worlds])
+        self._ast_live[worlds] = slots < count[:, None]
+        self._ast_seq[worlds] = slots
+        self._next_ast[worlds] = count
+
+        self._bul_live[worlds] = False
+        self._next_bul[worlds] = 0
+
+        self._last_shot[worlds] = BULLET_RATE
+        self._reset_time[worlds] = 0
+        self._life_lost[worlds] = False
+        self._hit[worlds] = False
+        self._lives[worlds] = SHIP_LIVES
+        self._score[worlds] = 0
+        self._frame[worlds] = 0
+        self._misses[worlds] = 0
+
+    def step(self, actions):
+        """
+        Plays a single frame in every world that is not complete
+
+        Parameter actions: the input for each world
+        Precondition: actions is an int array of shape (W,), each a bitwise or
+        of the ACTION constants (or a single int for every world)
+        """
+        run = ~self.get_done()
+        actions = np.broadcast_to(np.asarray(actions, dtype=int), run.shape) * run
+
+        self._turn_ships(actions)
+        self._move_ships(run)
+        self._move_asteroids(run)
+        self._fire(run & (actions & ACTION_FIRE != 0))
+        self._collide(run)
+
+        self._last_shot += run & (self._last_shot < BULLET_RATE)
+        self._move_bullets(run)
+        self._reset_time += run & (self._reset_time < SHIP_SAFE_FRAMES)
+        self._life_lost &= ~(run & (self._reset_time == SHIP_SAFE_FRAMES))
+
+        restore = self._hit & (self._lives > 0)
+        if restore.any():
+            self._restore_ships(restore)
+        self._frame += run
+
+    def run(self, actions, frames):
+        """
+        Plays the given number of frames with the same actions every frame
+
+        Parameter actions: the input for each world
+        Precondition: actions is as in step
+
+        Parameter frames: the number of frames to play
+        Precondition: frames is an int >= 0
+        """
+        for _ in range(frames):
+            self.step(actions)
+
+    # HIDDEN METHODS
+    def _velocities(self, kinds, directions):
+        """
+        Returns the asteroid velocities for the given sizes and directions
+
+        This is the same computation as AsteroidField.add_many.
+
+        Parameter kinds: the size classes
+        Precondition: kinds is an int array of shape (k,)
+
+        Parameter directions: the directions of movement
+        Precondition: directions is a float array of shape (k,2)
+        """
+        speed = np.take(ASTEROID_SPEEDS, kinds)
+        m = np.sqrt(directions[:, 0]**2 + directions[:, 1]**2)
+        still = m == 0
+        m[still] = 1
+        vel = np.empty(directions.shape)
+        vel[:, 0] = speed * directions[:, 0] / m
+        vel[:, 1] = speed * directions[:, 1] / m
+        vel[still] = 0
+        return vel
+
+    def _facing(self):
+        """
+        Returns the ship facing vectors as a tuple (x,y) of (W,) arrays
+        """
+        theta = np.radians(self._ship_angle)
+        return (np.cos(theta), np.sin(theta))
+
+    def _turn_ships(self, actions):
+        """
+        Turns and thrusts the ships, as in Ship.turn
+
+        Parameter actions: the input for each world
+        Precondition: actions is an int array of shape (W,)
+        """
+        left = (actions & ACTION_LEFT) != 0
+        right = (actions & ACTION_RIGHT) != 0
+        self._ship_angle += SHIP_TURN_RATE * (left.astype(int) - right)
+
+        up = np.nonzero(actions & ACTION_THRUST)[0]
+        if len(up) == 0:
+            return
+        fx, fy = self._facing()
+        vel = self._ship_vel[up]
+        vel[:, 0] += fx[up] * SHIP_IMPULSE
+        vel[:, 1] += fy[up] * SHIP_IMPULSE
+        length = np.sqrt(vel[:, 0]*vel[:, 0] + vel[:, 1]*vel[:, 1])
+        fast = length > SHIP_MAX_SPEED
+        vel[fast] = vel[fast] / length[fast, None] * SHIP_MAX_SPEED
+        self._ship_vel[up] = vel
+
+    def _wrap(self, x, y):
+        """
+        Wraps positions around the screen in place, as in Ship.update
+
+        Parameter x, y: the coordinates to wrap
+        Precondition: x, y are float arrays (or views) of the same shape
+        """
+        low = x < -DEAD_ZONE
+        high = x > GAME_WIDTH + DEAD_ZONE
+        x[low] += WRAP_WIDTH
+        x[high] -= WRAP_WIDTH
+
+        low = y < -DEAD_ZONE
+        high = y > GAME_WIDTH + DEAD_ZONE
+        y[low] += WRAP_HEIGHT_BOTTOM
+        y[high] -= WRAP_HEIGHT_TOP
+
+    def _move_ships(self, run):
+        """
+        Moves the ships of the running worlds, as in Ship.update
+
+        Parameter run: the worlds that are not complete
+        Precondition: run is a bool array of shape (W,)
+        """
+        self._ship_pos += np.where(run[:, None], self._ship_vel, 0.0)
+        self._wrap(self._ship_pos[:, 0], self._ship_pos[:, 1])
+
+    def _move_asteroids(self, run):
+        """
+        Moves the asteroids of the running worlds, as in AsteroidField.update
+
+        Parameter run: the worlds that are not complete
+        Precondition: run is a bool array of shape (W,)
+        """
+        self._ast_pos += np.where((run[:, None] & self._ast_live)[:, :, None], self._ast_vel, 0.0)
+        self._wrap(self._ast_pos[:, :, 0], self._ast_pos[:, :, 1])
+
+    def _fire(self, fire):
+        """
+        Fires a bullet from every ship that is allowed to, as in Wave.update
+
+        Parameter fire: the worlds where the fire key is down
+        Precondition: fire is a bool array of shape (W,)
+        """
+        worlds = np.nonzero(fire & (self._last_shot >= BULLET_RATE))[0]
+        if len(worlds) == 0:
+            return
+        self._last_shot[worlds] = 0
+
+        full = self._bul_live[worlds].all(axis=1)
+        self._misses[worlds[full]] += 1
+        worlds = worlds[~full]
+        slots = np.argmin(self._bul_live[worlds], axis=1)
+
+        fx, fy = self._facing()
+        fx = fx[worlds]
+        fy = fy[worlds]
+        px = self._ship_pos[worlds, 0]
+        py = self._ship_pos[worlds, 1]
+        self._bul_pos[worlds, slots, 0] = px + fx * SHIP_RADIUS
+        self._bul_pos[worlds, slots, 1] = py + fy * SHIP_RADIUS
+        self._bul_vel[worlds, slots, 0] = fx * BULLET_SPEED
+        self._bul_vel[worlds, slots, 1] = fy * BULLET_SPEED
+        self._bul_live[worlds, slots] = True
+        self._bul_seq[worlds, slots] = self._next_bul[worlds]
+        self._next_bul[worlds] += 1
+
+    def _move_bullets(self, run):
+        """
+        Moves the bullets of the running worlds, removing those that leave the screen
+
+        This is the same as BulletPool.update.
+
+        Parameter run: the worlds that are not complete
+        Precondition: run is a bool array of shape (W,)
+        """
+        n = self._bullet_count()
+        live = self._bul_live[:, :n] & run[:, None]
+        self._bul_pos[:, :n] += self._bul_vel[:, :n] * live[:, :, None]
+        x = self._bul_pos[:, :n, 0]
+        y = self._bul_pos[:, :n, 1]
+        gone = (x < -DEAD_ZONE) | (x > GAME_WIDTH + DEAD_ZONE) | \
+            (y < -DEAD_ZONE) | (y > GAME_WIDTH + DEAD_ZONE)
+        self._bul_live[:, :n] &= ~(live & gone)
+
+    def _bullet_count(self):
+        """
+        Returns the number of bullet slots to look at in every world
+
+        Bullets always go in the first free slot, so the slots in use are packed
+        near the front. This is one more than the last slot in use in any world
+        (0 if there are no bullets at all).
+        """
+        used = np.flatnonzero(self._bul_live.any(axis=0))
+        return int(used[-1]) + 1 if len(used) > 0 else 0
+
+    def _slot_count(self):
+        """
+        Returns the number of asteroid slots to look at in every world
+
+        New asteroids always go in the first free slot, so the slots in use are
+        packed near the front. This is one more than the last slot in use in
+        any world (0 if there are no asteroids at all).
+        """
+        used = np.flatnonzero(self._ast_live.any(axis=0))
+        return int(used[-1]) + 1 if len(used) > 0 else 0
+
+    def _images(self, m, extra):
+        """
+        Returns the first m asteroid slots of every world, with wrapped copies
+
+        The result is a float array of shape (W,5,m). Its rows are x0, x1, y0,
+        y1 and the squared reach. x0 and y0 are the asteroid coordinates. x1 and
+        y1 are the coordinates of the copies made by collision.wrap_images (with
+        margin GRID_CELL_SIZE), or a far away coordinate if there is no copy. An
+        object overlaps some copy of an asteroid exactly when it overlaps the
+        nearest of the four combinations. The reach is the asteroid radius plus
+        extra. Slots not in use are moved far away, so that nothing overlaps them.
+
+        Parameter m: the number of slots
+        Precondition: m is an int in 0..A
+
+        Parameter extra: the radius of the objects tested against the asteroids
+        Precondition: extra is a number >= 0
+        """
+        margin = GRID_CELL_SIZE
+        live = self._ast_live[:, :m]
+        x0 = np.where(live, self._ast_pos[:, :m, 0], _FAR)
+        y0 = self._ast_pos[:, :m, 1]
+
+        table = np.empty((len(live), 5, m))
+        left = x0 - margin < -DEAD_ZONE
+        right = ~left & (x0 + margin > GAME_WIDTH + DEAD_ZONE)
+        table[:, 0] = x0
+        table[:, 1] = np.where(left, x0 + WRAP_WIDTH, np.where(right & live, x0 - WRAP_WIDTH, _FAR))
+
+        bottom = y0 - margin < -DEAD_ZONE
+        top = ~bottom & (y0 + margin > GAME_WIDTH + DEAD_ZONE)
+        table[:, 2] = y0
+        table[:, 3] = np.where(bottom, y0 + WRAP_HEIGHT_BOTTOM, np.where(top, y0 - WRAP_HEIGHT_TOP, _FAR))
+
+        reach = self._ast_radius[:, :m] + extra
+        table[:, 4] = reach * reach
+        return table
+
+    def _overlaps(self, table, px, py):
+        """
+        Returns a (k,m) bool array of the points that overlap each asteroid
+
+        Parameter table: rows of the result of _images, one per point
+        Precondition: table is a float array of shape (k,5,m)
+
+        Parameter px, py: the point coordinates
+        Precondition: px, py are float arrays of shape (k,)
+        """
+        px = px[:, None]
+        py = py[:, None]
+        d = table[:, 0] - px
+        d *= d
+        t = table[:, 1] - px
+        t *= t
+        np.minimum(d, t, out=d)
+        dy = table[:, 2] - py
+        dy *= dy
+        np.subtract(table[:, 3], py, out=t)
+        t *= t
+        np.minimum(dy, t, out=dy)
+        d += dy
+        return d < table[:, 4]
+
+    def _collide(self, run):
+        """
+        Resolves the collisions in the running worlds, as in Wave.collide
+
+        Parameter run: the worlds that are not complete
+        Precondition: run is a bool array of shape (W,)
+        """
+        bw, bs = np.nonzero(self._bul_live[:, :self._bullet_count()] & run[:, None])
+        if len(bw) > 0:
+            # One row per bullet, over the asteroid slots that can be in use
+            m = self._slot_count()
+            table = self._images(m, BULLET_RADIUS)
+            hit = np.empty((len(bw), m), dtype=bool)
+            for i in range(0, len(bw), _CHUNK):
+                rows = slice(i, i + _CHUNK)
+                hit[rows] = self._overlaps(table[bw[rows]], self._bul_pos[bw[rows], bs[rows], 0],
+                                           self._bul_pos[bw[rows], bs[rows], 1])
+
+            shot = np.nonzero(hit.any(axis=1))[0]
+            if len(shot) > 0:
+                # Each bullet hits its oldest asteroid, each asteroid its oldest bullet
+                worlds = bw[shot]
+                bullets = bs[shot]
+                ages = np.where(hit[shot], self._ast_seq[worlds, :m], np.iinfo(np.int64).max)
+                target = np.argmin(ages, axis=1)
+                age = self._bul_seq[worlds, bullets]
+                order = np.lexsort((age, target, worlds))
+                key = worlds[order] * self._ast_live.shape[1] + target[order]
+                first = np.ones(len(order), dtype=bool)
+                first[1:] = key[1:] != key[:-1]
+                keep = order[first]
+                keep = keep[np.lexsort((age[keep], worlds[keep]))]
+                self._resolve(worlds[keep], bullets[keep], target[keep])
+
+        self._check_ships(run)
+
+    def _resolve(self, worlds, bullets, asteroids):
+        """
+        Removes the bullets and asteroids that hit, breaking up the asteroids
+
+        Parameter worlds, bullets, asteroids: the world, bullet slot and
+        asteroid slot of each hit
+        Precondition: worlds, bullets, asteroids are int arrays of the same
+        length, sorted by world and then by the age of the bullet
+        """
+        hitworlds = np.unique(worlds)
+        self._score[hitworlds] += 1
+
+        big = self._ast_size[worlds, asteroids] > 0
+        fw = worlds[big]
+        kinds = self._ast_size[fw, asteroids[big]].astype(int) - 1
+        centers = self._ast_pos[fw, asteroids[big]]
+        velocities = self._bul_vel[fw, bullets[big]]
+
+        self._bul_live[worlds, bullets] = False
+        self._ast_live[worlds, asteroids] = False
+        if len(fw) > 0:
+            self._break(fw, kinds, centers, velocities)
+
+    def _break(self, worlds, kinds, centers, velocities):
+        """
+        Adds the fragments of broken asteroids, as in Wave.break_ast
+
+        Parameter worlds: the world of each broken asteroid
+        Precondition: worlds is a sorted int array of shape (k,)
+
+        Parameter kinds: the size class of the fragments
+        Precondition: kinds is an int array of shape (k,)
+
+        Parameter centers: the centers of the broken asteroids
+        Precondition: centers is a float array of shape (k,2)
+
+        Parameter velocities: the velocities of the bullets that hit them
+        Precondition: velocities is a float array of shape (k,2)
+        """
+        radius = np.take(ASTEROID_RADII, kinds)[:, None, None]
+        length = np.sqrt(velocities[:, 0]*velocities[:, 0] + velocities[:, 1]*velocities[:, 1])
+        cx = velocities[:, 0] / length
+        cy = velocities[:, 1] / length
+        resultants = [np.stack((cx, cy), axis=1)]
+
+        for i in [120, -120]:
+            theta = math.radians(i)
+            x = cx * math.cos(theta) - cy * math.sin(theta)
+            y = cx * math.sin(theta) + cy * math.cos(theta)
+            length = np.sqrt(x*x + y*y)
+            resultants.append(np.stack((x / length, y / length), axis=1))
+
+        directions = np.stack(resultants, axis=1)
+        positions = (centers[:, None, :] + directions * radius).reshape(-1, 2)
+        directions = directions.reshape(-1, 2)
+        kinds = np.repeat(kinds, 3)
+        worlds = np.repeat(worlds, 3)
+
+        # The j-th new asteroid of a world goes in its j-th free slot
+        uw, start, count = np.unique(worlds, return_index=True, return_counts=True)
+        rank = np.arange(len(worlds)) - np.repeat(start, count)
+        free = np.argsort(self._ast_live[uw], axis=1, kind='stable')
+        slots = free[np.repeat(np.arange(len(uw)), count), rank]
+
+        self._ast_pos[worlds, slots] = positions
+        self._ast_vel[worlds, slots] = self._velocities(kinds, directions)
+        self._ast_size[worlds, slots] = kinds
+        self._ast_radius[worlds, slots] = np.take(ASTEROID_RADII, kinds)
+        self._ast_live[worlds, slots] = True
+        self._ast_seq[worlds, slots] = self._next_ast[worlds] + rank
+        self._next_ast[uw] += count
+
+    def _check_ships(self, run):
+        """
+        Takes a life for every asteroid touching an unprotected ship
+
+        Parameter run: the worlds that are not complete
+        Precondition: run is a bool array of shape (W,)
+        """
+        worlds = np.nonzero(run & ~self._life_lost)[0]
+        if len(worlds) == 0:
+            return
+        table = self._images(self._slot_count(), SHIP_RADIUS)
+        touching = self._overlaps(table[worlds], self._ship_pos[worlds, 0],
+                                  self._ship_pos[worlds, 1]).sum(axis=1)
+        hit = touching > 0
+        self._lives[worlds] -= touching
+        self._hit[worlds[hit]] = True
+
+    def _restore_ships(self, worlds):
+        """
+        Puts the ships of the given worlds back at their start, as in Wave.reset_ship
+
+        Parameter worlds: the worlds whose ship was hit
+        Precondition: worlds is a bool array of shape (W,)
+        """
+        wave = self._wave[worlds]
+        self._ship_pos[worlds] = self._start_pos[wave]
+        self._ship_angle[worlds] = self._start_angle[wave]
+        self._ship_vel[worlds] = 0
+        self._hit[worlds] = False
+        self._reset_time[worlds] = 0
+        self._life_lost[worlds] = True
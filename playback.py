@@ -0,0 +1,157 @@
+"""
+Rendered replay playback for Planetoids
+
+This module shows a recorded input log (see replay.py) in a window, at any
+speed. The wave is played exactly as Simulation plays it, including restoring
+the ship right away when it is hit, so the checksums in the log still apply.
+Each frame of the log is checked as it is played, and the playback stops with
+a message at the first frame that does not match.
+
+Run it through replay.py:
+
+    python replay.py Replays/wave1-1234.plog --render --speed 4
+"""
+from consts import *
+from game2d import *
+from wave import *
+from replay import InputLog, ReplayInput
+import os
+
+
+class ReplayApp(GameApp):
+    """
+    The controller class to watch a replay.
+
+    At speed 1, the replay plays one frame of the log per animation frame. At
+    speed 4, it plays four frames per animation frame, and at speed 0.5 it plays
+    one frame every other animation frame.
+
+    As with Planetoids, this class has no __init__. Call configure before run.
+    """
+    # Attribute _log: the log being played
+    # Invariant: _log is an InputLog
+    #
+    # Attribute _speed: the number of log frames per animation frame
+    # Invariant: _speed is a float > 0
+    #
+    # Attribute _dt: the time step of each log frame, in seconds
+    # Invariant: _dt is a float > 0
+    #
+    # Attribute _wave: the wave being replayed
+    # Invariant: _wave is a Wave object
+    #
+    # Attribute _replay: the input fed to the wave
+    # Invariant: _replay is a ReplayInput
+    #
+    # Attribute _steps: the log frames owed to the replay (the fractional part)
+    # Invariant: _steps is a float >= 0
+    #
+    # Attribute _mismatch: the first frame that did not match its checksum
+    # Invariant: _mismatch is an int, or None if every frame matched so far
+    #
+    # Attribute _status: the label showing the progress of the replay
+    # Invariant: _status is a GLabel
+
+    def configure(self, log, speed=1.0, fps=60):
+        """
+        Sets the log to replay, the playback speed and the recorded frame rate
+
+        Parameter log: the log to replay
+        Precondition: log is an InputLog
+
+        Parameter speed: the number of log frames per animation frame
+        Precondition: speed is an int or float > 0
+
+        Parameter fps: the frame rate the log was recorded at
+        Precondition: fps is an int or float > 0
+        """
+        assert speed > 0
+        assert fps > 0
+        self._log = log
+        self._speed = float(speed)
+        self._dt = 1.0 / fps
+
+    def start(self):
+        """
+        Creates the wave with the seed of the log
+        """
+        AssetLoader(self.load_json(ASSET_MANIFEST)).finish()
+        self._wave = Wave(open_wave(os.path.join(self.json, self._log.get_wave())), 
+                          self._log.get_seed())
+        self._replay = ReplayInput(self._log)
+        self._steps = 0.0
+        self._mismatch = None
+        self._status = GLabel(text='', font_size=20, font_name=MESSAGE_FONT,
+                              x=GAME_WIDTH / 2, y=50)
+
+    def update(self, dt):
+        """
+        Plays the log frames due this animation frame
+
+        Parameter dt: The time in seconds since last update
+        Precondition: dt is a number (int or float)
+        """
+        if self._replay.is_complete() or not self._mismatch is None:
+            return
+        self._steps += self._speed
+        while self._steps >= 1 and not self._replay.is_complete():
+            self._steps -= 1
+            if not self.step():
+                break
+
+        wave = self._wave
+        frame = self._replay.get_frame() + 1
+        wave.set_asteroid_label_text(f"Asteroids\n Left: \n{wave.get_asteroid_count()}")
+        wave.set_lives_label_text(f"Lives\n Left: \n{wave.get_lives()}")
+        wave.set_score_label_text(f"Score: \n{wave.get_score()}")
+        if not self._mismatch is None or self._replay.is_complete():
+            wave.close()
+        if not self._mismatch is None:
+            self._status.text = f"Replay differs at frame {self._mismatch}"
+        elif self._replay.is_complete():
+            self._status.text = f"Replay complete ({frame} frames)"
+        else:
+            self._status.text = f"Replay x{self._speed:g}  frame {frame}/{self._log.get_frame_count()}"
+
+    def step(self):
+        """
+        Plays a single frame of the log, returning False if it did not match
+        """
+        wave = self._wave
+        self._replay._prestep()
+        wave.update(self._dt, self._replay)
+        self._replay._poststep()
+
+        frame = self._replay.get_frame()
+        expected = self._log.get_hash(frame)
+        if not expected is None and wave.get_state_hash() != expected:
+            self._mismatch = frame
+            return False
+        if wave.get_hit() and wave.get_lives() > 0:
+            wave.reset_ship()
+        return True
+
+    def draw(self):
+        """
+        Draws the wave and the replay status
+        """
+        self._wave.draw(self.view)
+        self._status.draw(self.view)
+
+
+def play(log, speed=1.0, fps=60):
+    """
+    Shows the replay of a log in a window
+
+    Parameter log: the log to replay
+    Precondition: log is an InputLog
+
+    Parameter speed: the number of log frames per animation frame
+    Precondition: speed is an int or float > 0
+
+    Parameter fps: the frame rate the log was recorded at
+    Precondition: fps is an int or float > 0
+    """
+    app = ReplayApp(width=GAME_WIDTH, height=GAME_HEIGHT)
+    app.configure(log, speed, fps)
+    app.run()
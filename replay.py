@@ -0,0 +1,439 @@
+"""
+Input recording and replay for Planetoids
+
+Everything in a wave is determined by the wave file, the seed of the wave's
+random number generator (see Wave.get_seed) and the keys the player holds down
+each frame. This module records the keys into an InputLog, which can be saved
+to a small binary file, and plays them back with ReplayInput. Replaying a log
+into a new Wave with the same file and seed repeats the session exactly.
+
+Only the keys in LOG_KEYS are recorded. For each of them, a frame stores three
+bits: whether the key is down, whether it was just pressed, and whether it
+was just released. These are the answers that Wave (through is_key_down and
+is_key_pressed) reads from the input. The frames are packed into bits and
+compressed, so a minute of play usually takes a few dozen bytes.
+
+A log may also hold the state checksum (Wave.get_state_hash) after every
+frame. Playing the log back and comparing checksums shows whether the replay
+still matches the recording, and if not, the first frame where it went wrong.
+This costs another 4 bytes per frame.
+
+To play a log back, type
+
+    python replay.py Replays/wave1-1234.plog
+
+This plays the log headless, as fast as possible, checking every frame. To
+watch it instead, at (say) four times normal speed, type
+
+    python replay.py Replays/wave1-1234.plog --render --speed 4
+"""
+from array import array
+import numpy as np
+import struct
+import zlib
+
+# The keys recorded in an input log (every key the game reads)
+LOG_KEYS = ('left', 'right', 'up', 'spacebar', 's', 'r')
+
+# The first bytes of an input log file
+LOG_MAGIC = b'PLOG'
+
+# The version of the input log file format
+LOG_VERSION = 2
+
+# The fixed part of the file header: magic, version, key count, seed, frames
+LOG_HEADER = struct.Struct('<4sBBqI')
+
+
+class InputLog(object):
+    """
+    A class representing the input of a single wave, one entry per frame.
+
+    Each frame is stored as an int with three bits per key: bit i is set if key
+    i is down, bit K+i if it was just pressed, and bit 2K+i if it was just
+    released, where K is the number of keys. A log also remembers the wave file
+    and the seed that it was recorded with.
+
+    Call record once per frame, just before the wave is updated, with the input
+    that the wave will read.
+    """
+    # Attribute _wave: the name of the wave file
+    # Invariant: _wave is a string
+    #
+    # Attribute _seed: the seed of the wave
+    # Invariant: _seed is an int
+    #
+    # Attribute _keys: the keys in the log
+    # Invariant: _keys is a tuple of at most 21 strings
+    #
+    # Attribute _index: the position of each key in _keys
+    # Invariant: _index is a dict mapping each key in _keys to its position
+    #
+    # Attribute _frames: the key state of each frame
+    # Invariant: _frames is an array of unsigned ints
+    #
+    # Attribute _hashes: the state checksum after each frame, if recorded
+    # Invariant: _hashes is an array of unsigned ints, no longer than _frames
+
+    # GETTERS AND SETTERS (ONLY ADD IF YOU NEED THEM)
+    def get_wave(self):
+        """
+        Returns self._wave
+        """
+        return self._wave
+
+    def get_seed(self):
+        """
+        Returns self._seed
+        """
+        return self._seed
+
+    def get_keys(self):
+        """
+        Returns self._keys
+        """
+        return self._keys
+
+    def get_frame_count(self):
+        """
+        Returns the number of frames in the log
+        """
+        return len(self._frames)
+
+    def get_hash(self, frame):
+        """
+        Returns the state checksum after the given frame, or None if it was not recorded
+
+        Parameter frame: the frame number
+        Precondition: frame is an int >= 0
+        """
+        return self._hashes[frame] if frame < len(self._hashes) else None
+
+    def get_frame(self, frame):
+        """
+        Returns the key state of the given frame (0 if it is past the end)
+
+        Parameter frame: the frame number
+        Precondition: frame is an int >= 0
+        """
+        return self._frames[frame] if frame < len(self._frames) else 0
+
+    # INITIALIZER
+    def __init__(self, wave, seed, keys=LOG_KEYS):
+        """
+        Initializes an empty log
+
+        Parameter wave: the name of the wave file
+        Precondition: wave is a string
+
+        Parameter seed: the seed of the wave
+        Precondition: seed is an int
+
+        Parameter keys: the keys to record
+        Precondition: keys is a sequence of at most 21 strings
+        """
+        assert type(wave) == str and isinstance(seed, int) and len(keys) <= 21
+        self._wave = wave
+        self._seed = seed
+        self._keys = tuple(keys)
+        self._index = {k: i for (i, k) in enumerate(self._keys)}
+        self._frames = array('L')
+        self._hashes = array('L')
+
+    # PUBLIC METHODS
+    def record(self, input):
+        """
+        Adds the current key state of the input as the next frame
+
+        Parameter input: the input the wave is about to read
+        Precondition: input has methods is_key_down, is_key_pressed and is_key_released
+        """
+        n = len(self._keys)
+        state = 0
+        for (i, key) in enumerate(self._keys):
+            if input.is_key_down(key):
+                state |= 1 << i
+            if input.is_key_pressed(key):
+                state |= 1 << (n + i)
+            if input.is_key_released(key):
+                state |= 1 << (2 * n + i)
+        self._frames.append(state)
+
+    def add_hash(self, value):
+        """
+        Adds the state checksum after the last recorded frame
+
+        Parameter value: the checksum
+        Precondition: value is an int in 0..2**32-1
+        """
+        self._hashes.append(value)
+
+    def is_set(self, frame, key, kind=0):
+        """
+        Returns True if the key was down (or pressed, or released) in the frame
+
+        Keys that are not in the log are never down.
+
+        Parameter frame: the frame number
+        Precondition: frame is an int >= 0
+
+        Parameter key: the key to check
+        Precondition: key is a string
+
+        Parameter kind: 0 for down, 1 for pressed, 2 for released
+        Precondition: kind is 0, 1 or 2
+        """
+        if not key in self._index:
+            return False
+        bit = kind * len(self._keys) + self._index[key]
+        return (self.get_frame(frame) >> bit) & 1 == 1
+
+    def to_bytes(self):
+        """
+        Returns the log in the binary input log format
+        """
+        bits = 3 * len(self._keys)
+        frames = np.frombuffer(self._frames, dtype=self._frames.typecode).astype(np.uint64)
+        table = (frames[:, None] >> np.arange(bits, dtype=np.uint64)) & 1
+        packed = np.packbits(table.astype(np.uint8).ravel(), bitorder='little')
+
+        names = '\n'.join(self._keys).encode('utf-8')
+        wave = self._wave.encode('utf-8')
+        header = LOG_HEADER.pack(LOG_MAGIC, LOG_VERSION, len(self._keys),
+                                 self._seed, len(self._frames))
+        payload = zlib.compress(packed.tobytes(), 9)
+        hashes = np.array(self._hashes, dtype='<u4').tobytes()
+        return b''.join([header, struct.pack('<H', len(names)), names,
+                         struct.pack('<H', len(wave)), wave,
+                         struct.pack('<I', len(payload)), payload,
+                         struct.pack('<I', len(self._hashes)), hashes])
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Returns the log stored in data, in the binary input log format
+
+        Parameter data: the bytes of an input log file
+        Precondition: data is a bytes object
+        """
+        magic, version, count, seed, frames = LOG_HEADER.unpack_from(data, 0)
+        assert magic == LOG_MAGIC, 'not an input log'
+        assert version in (1, LOG_VERSION), 'unsupported input log version %d' % version
+
+        pos = LOG_HEADER.size
+        size, = struct.unpack_from('<H', data, pos)
+        names = data[pos+2:pos+2+size].decode('utf-8')
+        pos += 2 + size
+        size, = struct.unpack_from('<H', data, pos)
+        wave = data[pos+2:pos+2+size].decode('utf-8')
+        pos += 2 + size
+
+        # Version 1 logs have no checksums, and the input runs to the end
+        hashes = b''
+        if version == 1:
+            payload = data[pos:]
+        else:
+            size, = struct.unpack_from('<I', data, pos)
+            payload = data[pos+4:pos+4+size]
+            pos += 4 + size
+            size, = struct.unpack_from('<I', data, pos)
+            hashes = data[pos+4:pos+4+4*size]
+
+        keys = names.split('\n') if count > 0 else []
+        log = cls(wave, seed, keys)
+        log._hashes = array('L', np.frombuffer(hashes, dtype='<u4').tolist())
+        bits = 3 * count
+        packed = np.frombuffer(zlib.decompress(payload), dtype=np.uint8)
+        table = np.unpackbits(packed, count=frames * bits, bitorder='little')
+        table = table.reshape(frames, bits).astype(np.uint64)
+        states = (table << np.arange(bits, dtype=np.uint64)).sum(axis=1)
+        log._frames = array('L', states.tolist())
+        return log
+
+    def save(self, filename):
+        """
+        Writes the log to a file
+
+        Parameter filename: the file to write
+        Precondition: filename is a string
+        """
+        with open(filename, 'wb') as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, filename):
+        """
+        Returns the log stored in a file
+
+        Parameter filename: the file to read
+        Precondition: filename is a string naming an input log file
+        """
+        with open(filename, 'rb') as f:
+            return cls.from_bytes(f.read())
+
+
+class ReplayInput(object):
+    """
+    A class to play back an input log.
+
+    This has the same key queries as GInput. Every call to _prestep (which
+    Simulation.step and GameApp make before each update) moves to the next
+    frame of the log. After the end of the log, no keys are down.
+    """
+    # Attribute _log: the log to play back
+    # Invariant: _log is an InputLog
+    #
+    # Attribute _frame: the frame being played, or -1 before the first frame
+    # Invariant: _frame is an int >= -1
+    #
+    # Attribute _state: the key state of the current frame (see InputLog)
+    # Invariant: _state is an int >= 0
+    #
+    # Attribute _bits: the bit of each key, for each kind of query
+    # Invariant: _bits is a list of three dicts mapping keys to ints
+
+    # GETTERS AND SETTERS (ONLY ADD IF YOU NEED THEM)
+    def get_log(self):
+        """
+        Returns self._log
+        """
+        return self._log
+
+    def get_frame(self):
+        """
+        Returns self._frame
+        """
+        return self._frame
+
+    def is_complete(self):
+        """
+        Returns True if every frame of the log has been played
+        """
+        return self._frame + 1 >= self._log.get_frame_count()
+
+    # INITIALIZER
+    def __init__(self, log):
+        """
+        Initializes a replay of the given log, before its first frame
+
+        Parameter log: the log to play back
+        Precondition: log is an InputLog
+        """
+        self._log = log
+        self._frame = -1
+        self._state = log.get_frame(0)
+        n = len(log.get_keys())
+        self._bits = [{k: 1 << (kind * n + i) for (i, k) in enumerate(log.get_keys())}
+                      for kind in range(3)]
+
+    # PUBLIC METHODS
+    def is_key_down(self, key):
+        """
+        Returns True if the key is down in the current frame
+
+        Parameter key: the key to check ('' for any key)
+        Precondition: key is a string
+        """
+        return self._check(key, 0)
+
+    def is_key_pressed(self, key):
+        """
+        Returns True if the key was just pressed in the current frame
+
+        Parameter key: the key to check ('' for any key)
+        Precondition: key is a string
+        """
+        return self._check(key, 1)
+
+    def is_key_released(self, key):
+        """
+        Returns True if the key was just released in the current frame
+
+        Parameter key: the key to check ('' for any key)
+        Precondition: key is a string
+        """
+        return self._check(key, 2)
+
+    def is_touch_down(self):
+        """
+        Returns False, as the mouse is not recorded
+        """
+        return False
+
+    # HIDDEN METHODS
+    def _check(self, key, kind):
+        """
+        Returns True if the key has the given state in the current frame
+
+        Parameter key: the key to check ('' for any key)
+        Precondition: key is a string
+
+        Parameter kind: 0 for down, 1 for pressed, 2 for released
+        Precondition: kind is 0, 1 or 2
+        """
+        bits = self._bits[kind]
+        if key == '':
+            return any(self._state & b for b in bits.values())
+        return self._state & bits.get(key, 0) != 0
+
+    def _prestep(self):
+        """
+        Moves to the next frame of the log
+        """
+        self._frame += 1
+        self._state = self._log.get_frame(self._frame)
+
+    def _poststep(self):
+        """
+        Does nothing; present so that this can stand in for GInput
+        """
+        pass
+
+
+def main(argv=None):
+    """
+    Plays back the input log named on the command line
+
+    Without --render, the log is played headless and every frame is checked
+    against the recorded checksums; the exit status is 1 if a frame differs.
+
+    Parameter argv: the command line arguments (None for sys.argv[1:])
+    Precondition: argv is None or a list of strings
+    """
+    import argparse
+    import time
+    import os
+    import sys
+    parser = argparse.ArgumentParser(description='Play back a Planetoids input log.')
+    parser.add_argument('log', help='the input log file')
+    parser.add_argument('--render', action='store_true', help='show the replay in a window')
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help='playback speed multiplier when rendering (default 1)')
+    parser.add_argument('--fps', type=float, default=60,
+                        help='the frame rate the log was recorded at (default 60)')
+    args = parser.parse_args(argv)
+    log = InputLog.load(args.log)
+
+    if args.render:
+        from playback import play
+        play(log, args.speed, args.fps)
+        return
+
+    # Must happen before anything imports game2d
+    os.environ.setdefault('GAME2D_HEADLESS', '1')
+    from simulate import play_back
+    start = time.perf_counter()
+    frame = play_back(log, args.fps)
+    elapsed = time.perf_counter() - start
+    print('%d frames in %.3f seconds (%.0f frames/s)' %
+          (log.get_frame_count(), elapsed, log.get_frame_count() / max(elapsed, 1e-9)))
+    if frame is None:
+        print('replay matches the recording')
+    else:
+        print('replay differs from the recording at frame %d' % frame)
+        sys.exit(1)
+
+
+# Application code
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,202 @@
+"""
+Headless simulation for Planetoids
+
+This module runs waves of Planetoids without a window. Importing it switches
+game2d to its Kivy-free stand-ins (see game2d/headless.py), so the ship,
+asteroids and bullets in models.py and the Wave in wave.py never touch Kivy,
+load a texture or need a GL context. This is what we use to play thousands of
+games on a server, for balancing and for regression tests.
+
+A Simulation plays a single wave. The input comes from any object with the
+methods is_key_down and is_key_pressed (like GInput); game2d.GInput in headless
+mode is a scripted input whose keys can be set with press, release and set_keys.
+
+This module must be imported before anything else imports game2d. Importing
+it afterwards, when game2d has already loaded the regular Kivy classes, fails
+with an AssertionError rather than quietly simulating with Kivy.
+"""
+import os
+import sys
+os.environ.setdefault('GAME2D_HEADLESS', '1')
+assert not 'game2d' in sys.modules or sys.modules['game2d'].HEADLESS, \
+    'game2d was imported with Kivy before simulate; import simulate first'
+
+from consts import *
+from game2d import *
+from wave import *
+from replay import InputLog, ReplayInput
+import json
+
+# The folder containing this module (and the Data, Fonts, Images and Sounds folders)
+APP_PATH = os.path.dirname(os.path.abspath(__file__))
+GameApp.set_resource_path(APP_PATH)
+
+
+def find_wave(name):
+    """
+    Returns the path to the given wave file.
+
+    Parameter name: a file in the Data folder (e.g. 'wave1.json') or a path
+    Precondition: name is a string
+    """
+    if not os.path.exists(name):
+        name = os.path.join(APP_PATH, 'Data', name)
+    return name
+
+
+def load_wave(name):
+    """
+    Returns the wave data in the given file.
+
+    Parameter name: a file in the Data folder (e.g. 'wave1.json') or a path
+    Precondition: name is a string naming a valid wave JSON file
+    """
+    with open(find_wave(name)) as f:
+        return json.load(f)
+
+
+class Simulation(object):
+    """
+    A class to play a single wave without a window.
+
+    Each call to step plays one animation frame, just as Planetoids does in
+    STATE_ACTIVE. When the ship is hit, the ship is restored right away (as if
+    the player had pressed 's' on the pause screen). The simulation is over when
+    the player is out of lives or all asteroids are destroyed.
+    """
+    # Attribute _wave: the wave being played
+    # Invariant: _wave is a Wave object
+    #
+    # Attribute _input: the source of the player input
+    # Invariant: _input has the methods is_key_down and is_key_pressed
+    #
+    # Attribute _frame: the number of frames played so far
+    # Invariant: _frame is an int >= 0
+    #
+    # Attribute _dt: the time to pass to Wave.update each frame
+    # Invariant: _dt is a float > 0
+    #
+    # Attribute _log: the log to record the input into, if any
+    # Invariant: _log is an InputLog or None
+
+    # GETTERS AND SETTERS (ONLY ADD IF YOU NEED THEM)
+    def get_wave(self):
+        """
+        Returns self._wave
+        """
+        return self._wave
+
+    def get_input(self):
+        """
+        Returns self._input
+        """
+        return self._input
+
+    def get_frame(self):
+        """
+        Returns self._frame
+        """
+        return self._frame
+
+    def get_log(self):
+        """
+        Returns self._log
+        """
+        return self._log
+
+    def is_complete(self):
+        """
+        Returns True if the player is out of lives or has cleared the wave
+        """
+        return self._wave.get_lives() <= 0 or self._wave.is_cleared()
+
+    # INITIALIZER
+    def __init__(self, data, input=None, fps=60, seed=0, log=None):
+        """
+        Initializes a simulation of the given wave
+
+        Parameter data: the wave, or the name of the wave file (which is only 
+        compiled the first time; see open_wave)
+        Precondition: data is a wave dict, a CompiledWave, a WaveStream or a 
+        string accepted by find_wave
+
+        Parameter input: the source of the player input (None for a new GInput)
+        Precondition: input is None or has methods is_key_down and is_key_pressed
+
+        Parameter fps: the frame rate the game pretends to run at
+        Precondition: fps is an int or float > 0
+
+        Parameter seed: the seed for the wave (None to pick one from the time)
+        Precondition: seed is None or an int
+
+        Parameter log: the log to record the input (and state checksums) into,
+        or None to not record
+        Precondition: log is None or an InputLog
+        """
+        if type(data) == str:
+            data = open_wave(find_wave(data))
+        self._wave = Wave(data, seed)
+        self._log = log
+        self._input = GInput() if input is None else input
+        self._frame = 0
+        self._dt = 1.0 / fps
+
+    # PUBLIC METHODS
+    def step(self):
+        """
+        Plays a single frame of the wave.
+        """
+        input = self._input
+        if hasattr(input, '_prestep'):
+            input._prestep()
+        if not self._log is None:
+            self._log.record(input)
+        self._wave.update(self._dt, input)
+        if not self._log is None:
+            self._log.add_hash(self._wave.get_state_hash())
+        if hasattr(input, '_poststep'):
+            input._poststep()
+
+        if self._wave.get_hit() and self._wave.get_lives() > 0:
+            self._wave.reset_ship()
+        self._frame += 1
+
+    def run(self, frames):
+        """
+        Plays frames until the wave is over, returning the number played.
+
+        Parameter frames: the maximum number of frames to play
+        Precondition: frames is an int >= 0
+        """
+        start = self._frame
+        while self._frame - start < frames and not self.is_complete():
+            self.step()
+        return self._frame - start
+
+
+def play_back(log, fps=60):
+    """
+    Plays an input log back headless, as fast as possible.
+
+    After every frame, the state checksum of the wave is compared with the one
+    in the log (if the log has one). Returns the first frame whose checksum does
+    not match, or None if the whole log played back the same as it was recorded.
+
+    Parameter log: the log to play back
+    Precondition: log is an InputLog whose wave is accepted by find_wave
+
+    Parameter fps: the frame rate the game pretends to run at
+    Precondition: fps is an int or float > 0
+    """
+    # The checksums are taken before the ship is restored, so let Simulation take them
+    copy = InputLog(log.get_wave(), log.get_seed(), log.get_keys())
+    sim = Simulation(log.get_wave(), ReplayInput(log), fps, log.get_seed(), copy)
+    try:
+        for frame in range(log.get_frame_count()):
+            sim.step()
+            expected = log.get_hash(frame)
+            if not expected is None and copy.get_hash(frame) != expected:
+                return frame
+        return None
+    finally:
+        sim.get_wave().close()
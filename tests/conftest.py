@@ -0,0 +1,13 @@
+"""
+Test configuration for Planetoids
+
+The tests run without a window: game2d is imported in headless mode (see
+game2d/headless.py), and Kivy is kept from reading the pytest arguments.
+"""
+import os
+import sys
+
+os.environ['GAME2D_HEADLESS'] = '1'
+os.environ.setdefault('KIVY_NO_ARGS', '1')
+os.environ.setdefault('KIVY_LOG_MODE', 'PYTHON')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
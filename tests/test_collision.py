@@ -0,0 +1,63 @@
+"""
+Tests for the collision detection in collision.py
+"""
+from collision import SpatialHash, first_hits, wrap_images
+from consts import *
+import numpy as np
+import pytest
+
+
+def brute_force(grid_size, objects, radii, points, point_radii):
+    """
+    Returns the overlapping (point,object) pairs, testing every pair
+
+    The objects are wrapped the same way as in SpatialHash.build.
+    """
+    index, x, y = wrap_images(objects, grid_size)
+    pairs = set()
+    for p in range(len(points)):
+        dx = x - points[p, 0]
+        dy = y - points[p, 1]
+        r = radii[index] + point_radii[p]
+        pairs.update((p, int(o)) for o in index[dx*dx + dy*dy < r*r])
+    return sorted(pairs)
+
+
+@pytest.mark.parametrize('objects,points', [(5, 8), (300, 400)])
+def test_spatial_hash_matches_brute_force(objects, points):
+    # The small case tests every pair, the large one searches the grid
+    rng = np.random.default_rng(objects)
+    low, high = -DEAD_ZONE, GAME_WIDTH + DEAD_ZONE
+    centers = rng.uniform(low, high, (objects, 2))
+    radii = rng.choice(ASTEROID_RADII, objects).astype(float)
+    queries = rng.uniform(low, high, (points, 2))
+    query_radii = np.full(points, float(BULLET_RADIUS))
+
+    grid = SpatialHash()
+    grid.build(centers, radii)
+    hits, targets = grid.overlapping(queries, query_radii)
+
+    assert grid.get_count() == objects
+    assert list(zip(hits.tolist(), targets.tolist())) == \
+        brute_force(grid.get_size(), centers, radii, queries, query_radii)
+
+
+def test_spatial_hash_finds_overlaps_across_the_edge():
+    grid = SpatialHash()
+    grid.build(np.array([[-DEAD_ZONE + 5.0, 300.0]]), np.array([float(LARGE_RADIUS)]))
+    hits, targets = grid.overlapping(np.array([[GAME_WIDTH + DEAD_ZONE - 5.0, 300.0]]), 2.0)
+    assert hits.tolist() == [0] and targets.tolist() == [0]
+
+
+def test_first_hits_takes_the_lowest_object_then_the_lowest_point():
+    # Point 1 loses object 3 to point 0, and does not fall back to object 4
+    points = np.array([0, 0, 1, 1, 2])
+    objects = np.array([3, 5, 3, 4, 5])
+    hits, targets = first_hits(points, objects)
+    assert hits.tolist() == [0, 2]
+    assert targets.tolist() == [3, 5]
+
+
+def test_first_hits_of_nothing():
+    hits, targets = first_hits(np.zeros(0, dtype=int), np.zeros(0, dtype=int))
+    assert len(hits) == 0 and len(targets) == 0
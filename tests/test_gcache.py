@@ -0,0 +1,79 @@
+"""
+Tests for the texture cache in game2d/gcache.py
+"""
+from game2d.gcache import TextureCache
+import gc
+
+
+class FakeTexture(object):
+    """
+    A stand-in for a Kivy texture, with only what the cache looks at
+    """
+    count = 0
+
+    def __init__(self, width, height, atlas=None, mipmap=False):
+        """
+        Makes a texture, or a region of atlas (if it is not None)
+        """
+        if atlas is None:
+            FakeTexture.count += 1
+            self.id = FakeTexture.count
+            self.uvsize = (1.0, 1.0)
+        else:
+            self.id = atlas.id
+            self.uvsize = (width / atlas.width, -height / atlas.height)
+            mipmap = atlas.mipmap
+        self.width = width
+        self.height = height
+        self.colorfmt = 'rgba'
+        self.mipmap = mipmap
+
+
+class User(object):
+    """
+    An object that can pin textures
+    """
+    pass
+
+
+def test_cache_drops_the_least_recently_used():
+    cache = TextureCache(budget=3 * 400)
+    for name in 'abc':
+        cache.add(name, FakeTexture(10, 10))
+    assert cache.size == 1200 and cache.evictions == 0
+
+    cache.get('a')
+    cache.add('d', FakeTexture(10, 10))
+    assert sorted(cache.stats.keys()) == ['budget', 'entries', 'evictions', 'hits',
+                                          'misses', 'pinned', 'size']
+    assert not 'b' in cache and 'a' in cache and 'd' in cache
+    assert cache.evictions == 1 and cache.hits == 1
+    assert cache.get('b') is None and cache.misses == 1
+
+
+def test_pinned_textures_stay_until_their_user_is_gone():
+    cache = TextureCache(budget=400)
+    user = User()
+    cache.pin(user, ['a'])
+    cache.add('a', FakeTexture(10, 10))
+    cache.add('b', FakeTexture(10, 10))
+    cache.add('c', FakeTexture(10, 10))
+    assert 'a' in cache and not 'b' in cache and 'c' in cache
+    assert cache.stats['pinned'] == 1
+
+    del user
+    gc.collect()
+    cache.budget = 400
+    assert not 'a' in cache and 'c' in cache
+
+
+def test_atlas_regions_are_charged_once():
+    cache = TextureCache()
+    page = FakeTexture(64, 32, mipmap=True)
+    cache.add('one', FakeTexture(16, 16, page))
+    cache.add('two', FakeTexture(32, 16, page))
+    assert cache.size == 64 * 32 * 4 * 4 // 3
+    cache.remove('one')
+    assert cache.size == 64 * 32 * 4 * 4 // 3
+    cache.remove('two')
+    assert cache.size == 0 and len(cache) == 0
@@ -0,0 +1,73 @@
+"""
+Tests that the headless stand-ins have the methods of the regular game2d classes
+
+game2d/headless.py is written by hand, so it can fall behind the classes it
+stands in for. A game that calls a method missing in headless mode only fails
+when it is simulated, so these tests compare the public methods of each pair.
+"""
+import importlib
+import pytest
+
+pytest.importorskip('kivy')
+from game2d import headless
+
+# The game2d modules with the regular classes
+MODULES = ['gobject', 'grectangle', 'gsprite', 'gtile', 'gbatch', 'gglyph', 'gpath',
+           'gview', 'sound', 'gloader', 'app']
+
+# The methods that the stand-ins add for scripts, which have no keyboard or window
+EXTRAS = {'GInput': {'press', 'release', 'set_keys'},
+          'GameApp': {'set_resource_path'}}
+
+
+def regular_classes():
+    """
+    Returns a dict of the regular game2d classes with a stand-in, by name
+    """
+    result = {}
+    for name in MODULES:
+        module = importlib.import_module('game2d.' + name)
+        for (key, value) in vars(module).items():
+            if key in headless.__all__ and getattr(value, '__module__', None) == module.__name__:
+                result[key] = value
+    return result
+
+
+def methods(cls):
+    """
+    Returns the names of the public methods that game2d defines for cls
+
+    Methods inherited from Kivy (or builtin) classes are not counted.
+
+    Parameter cls: the class
+    Precondition: cls is a class
+    """
+    result = set()
+    for base in cls.__mro__:
+        if not base.__module__.startswith('game2d'):
+            continue
+        for (key, value) in vars(base).items():
+            if not key.startswith('_') and not isinstance(value, property) and \
+                    (callable(value) or isinstance(value, (classmethod, staticmethod))):
+                result.add(key)
+    return result
+
+
+REGULAR = regular_classes()
+
+
+def test_every_class_has_a_stand_in():
+    assert sorted(REGULAR) == sorted(headless.__all__)
+
+
+@pytest.mark.parametrize('name', sorted(REGULAR))
+def test_stand_in_has_the_methods(name):
+    stand_in = getattr(headless, name)
+    missing = [key for key in methods(REGULAR[name]) if not callable(getattr(stand_in, key, None))]
+    assert missing == []
+
+
+@pytest.mark.parametrize('name', sorted(REGULAR))
+def test_stand_in_adds_no_methods(name):
+    extra = methods(getattr(headless, name)) - methods(REGULAR[name]) - EXTRAS.get(name, set())
+    assert sorted(extra) == []
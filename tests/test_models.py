@@ -0,0 +1,61 @@
+"""
+Tests for the bullet pool in models.py
+"""
+from models import BulletPool
+import numpy as np
+import random
+
+
+def check(pool, expected):
+    """
+    Checks the pool against the list of bullets (oldest first) it should hold
+
+    Each bullet is identified by its x coordinate.
+    """
+    slots = pool.get_slots()
+    assert pool.get_count() == len(expected) == len(slots)
+    assert len(set(slots.tolist())) == len(slots)
+    assert 0 <= pool.get_count() <= pool.get_capacity()
+    assert pool.get_positions()[:, 0].tolist() == expected
+
+
+def test_pool_keeps_bullets_in_the_order_fired():
+    rng = random.Random(1)
+    pool = BulletPool(16)
+    expected = []
+    misses = 0
+    for shot in range(2000):
+        if rng.random() < 0.6:
+            if len(expected) < 16:
+                expected.append(float(shot))
+            else:
+                misses += 1
+            assert pool.spawn((shot, 0), (0, 0)) == (expected[-1] == shot)
+        elif expected:
+            gone = rng.sample(range(len(expected)), rng.randint(1, len(expected)))
+            pool.despawn(pool.get_slots()[sorted(gone)])
+            expected = [x for (i, x) in enumerate(expected) if not i in gone]
+        check(pool, expected)
+    assert pool.get_misses() == misses
+
+
+def test_pool_removes_bullets_that_leave_the_screen():
+    pool = BulletPool(4)
+    pool.spawn((0, 100), (-30, 0))
+    pool.spawn((1, 100), (0, 10))
+    pool.spawn((2, 100), (-30, 0))
+    for _ in range(2):
+        pool.update(1 / 60)
+    assert pool.get_positions().tolist() == [[1, 120]]
+
+
+def test_load_replaces_the_bullets():
+    pool = BulletPool(4)
+    for i in range(4):
+        pool.spawn((i, 0), (0, 0))
+    pool.load(np.array([[7.0, 1.0], [8.0, 2.0]]), np.zeros((2, 2)), 3)
+    check(pool, [7.0, 8.0])
+    assert pool.get_misses() == 3
+    assert pool.spawn((9, 0), (0, 0)) and pool.spawn((10, 0), (0, 0))
+    assert not pool.spawn((11, 0), (0, 0))
+    check(pool, [7.0, 8.0, 9.0, 10.0])
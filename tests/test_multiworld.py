@@ -0,0 +1,57 @@
+"""
+Tests that WaveBatch plays waves the same way as Simulation
+"""
+from simulate import Simulation, load_wave
+from batch import RandomPolicy
+from multiworld import WaveBatch, action_from_keys
+import numpy as np
+
+# The waves (and the policy seeds) played in the test
+WAVES = ['wave1.json', 'wave2.json', 'easy1.json']
+SEEDS = [0, 1]
+
+# The number of frames to play
+FRAMES = 600
+
+
+def test_batch_matches_simulation():
+    data = [load_wave(name) for name in WAVES for _ in SEEDS]
+    policies = [RandomPolicy(seed) for _ in WAVES for seed in SEEDS]
+    sims = [Simulation(wave) for wave in data]
+    batch = WaveBatch(data)
+    keys = [[] for _ in sims]
+
+    for frame in range(FRAMES):
+        actions = np.zeros(len(sims), dtype=int)
+        for (i, sim) in enumerate(sims):
+            choice = policies[i].keys(frame, sim.get_wave())
+            if not choice is None:
+                keys[i] = choice
+            if not sim.is_complete():
+                sim.get_input().set_keys(keys[i])
+                sim.step()
+            actions[i] = action_from_keys(keys[i])
+        batch.step(actions)
+
+        for (i, sim) in enumerate(sims):
+            wave = sim.get_wave()
+            ship = wave.get_ship()
+            positions = batch.get_asteroids(i)[0]
+            assert batch.get_frames()[i] == sim.get_frame()
+            assert batch.get_scores()[i] == wave.get_score()
+            assert batch.get_lives()[i] == wave.get_lives()
+            assert batch.get_ship_positions()[i].tolist() == [ship.x, ship.y]
+            assert np.array_equal(positions, wave.get_field().get_positions())
+            assert np.array_equal(batch.get_bullets(i)[0], wave.get_pool().get_positions())
+    assert batch.get_scores().sum() > 0
+
+
+def test_reset_restarts_the_worlds():
+    data = load_wave('wave1.json')
+    batch = WaveBatch(data, 3)
+    start = batch.get_asteroids(0)[0].copy()
+    batch.run(15, 100)
+    batch.reset(np.array([False, True, False]))
+    assert batch.get_frames().tolist() == [100, 0, 100]
+    assert np.array_equal(batch.get_asteroids(1)[0], start)
+    assert batch.get_ship_positions()[1].tolist() == data['ship']['position']
@@ -0,0 +1,52 @@
+"""
+Tests for recording and playing back input logs (replay.py)
+"""
+from simulate import Simulation, play_back
+from replay import InputLog
+from batch import RandomPolicy
+
+
+def record(wave, seed, frames):
+    """
+    Returns the log of a simulation of the given wave played with random keys
+    """
+    log = InputLog(wave, seed)
+    sim = Simulation(wave, seed=seed, log=log)
+    policy = RandomPolicy(seed)
+    for frame in range(frames):
+        keys = policy.keys(frame, sim.get_wave())
+        if not keys is None:
+            sim.get_input().set_keys(keys)
+        sim.step()
+    sim.get_wave().close()
+    return log
+
+
+def test_log_round_trip(tmp_path):
+    log = record('wave1.json', 5, 400)
+    path = str(tmp_path / 'wave1.plog')
+    log.save(path)
+    copy = InputLog.load(path)
+
+    assert copy.to_bytes() == log.to_bytes()
+    assert (copy.get_wave(), copy.get_seed(), copy.get_keys()) == \
+        (log.get_wave(), log.get_seed(), log.get_keys())
+    assert copy.get_frame_count() == 400
+    assert [copy.get_frame(f) for f in range(400)] == [log.get_frame(f) for f in range(400)]
+    assert [copy.get_hash(f) for f in range(400)] == [log.get_hash(f) for f in range(400)]
+
+
+def test_play_back_matches_the_recording():
+    log = record('wave2.json', 3, 500)
+    assert play_back(InputLog.from_bytes(log.to_bytes())) is None
+
+
+def test_play_back_finds_a_changed_frame():
+    # Let go of every key from frame 100 on, keeping the recorded checksums
+    log = record('wave1.json', 2, 300)
+    broken = InputLog(log.get_wave(), log.get_seed(), log.get_keys())
+    for frame in range(log.get_frame_count()):
+        broken._frames.append(log.get_frame(frame) if frame < 100 else 0)
+        broken._hashes.append(log.get_hash(frame))
+    mismatch = play_back(broken)
+    assert not mismatch is None and mismatch >= 100
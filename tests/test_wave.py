@@ -0,0 +1,67 @@
+"""
+Tests for saving and restoring waves with Wave.snapshot and Wave.restore
+"""
+from simulate import Simulation
+from wavefile import open_wave
+from generate import generate_wave, save_wave
+from batch import RandomPolicy
+import pytest
+
+
+def play(sim, policy, start, frames):
+    """
+    Returns the state hashes after each of the given frames of a simulation
+    """
+    hashes = []
+    for frame in range(start, start + frames):
+        keys = policy(frame)
+        sim.get_input().set_keys(keys)
+        sim.step()
+        hashes.append(sim.get_wave().get_state_hash())
+    return hashes
+
+
+def keys_for(seed, frames):
+    """
+    Returns a function giving the keys held in each frame, from a random policy
+    """
+    policy = RandomPolicy(seed)
+    script = []
+    held = []
+    for frame in range(frames):
+        keys = policy.keys(frame, None)
+        if not keys is None:
+            held = keys
+        script.append(held)
+    return lambda frame: script[frame]
+
+
+@pytest.mark.parametrize('stream', [False, True])
+def test_restore_continues_the_same_game(tmp_path, stream):
+    if stream:
+        # A wave stream, so that the read position is saved as well
+        path = str(tmp_path / 'timed.jsonl')
+        save_wave(generate_wave(40, seed=3, duration=8.0), path)
+    else:
+        path = 'wave1.json'
+    policy = keys_for(4, 700)
+
+    sim = Simulation(path, seed=9)
+    play(sim, policy, 0, 300)
+    blob = sim.get_wave().snapshot()
+    saved = sim.get_wave().get_state_hash()
+    expected = play(sim, policy, 300, 400)
+    sim.get_wave().close()
+
+    copy = Simulation(path, seed=9)
+    copy.get_wave().restore(blob)
+    assert copy.get_wave().get_state_hash() == saved
+    assert play(copy, policy, 300, 400) == expected
+    assert copy.get_wave().snapshot() == sim.get_wave().snapshot()
+    copy.get_wave().close()
+
+
+def test_restore_rejects_other_data():
+    sim = Simulation('wave1.json')
+    with pytest.raises(AssertionError):
+        sim.get_wave().restore(b'XXXX' + sim.get_wave().snapshot()[4:])
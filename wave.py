@@ -19,8 +19,20 @@ complicated issue. If you do not know, ask on Ed Discussions and we will answer.
 from game2d import *
 from consts import *
 from models import *
+from collision import *
+from wavefile import CompiledWave, WaveStream, open_wave
+import numpy as np
 import random
 import datetime
+import struct
+import zlib
+
+# The parts of a snapshot (see Wave.snapshot), in order
+_SNAPSHOT_HEADER = struct.Struct('<4sBq')
+_SNAPSHOT_SHIP = struct.Struct('<7d')
+_SNAPSHOT_STATE = struct.Struct('<4q2?2Iq')
+_SNAPSHOT_RNG = struct.Struct('<625I?d')
+_SNAPSHOT_STREAM = struct.Struct('<dq')
 
 # PRIMARY RULE: Wave can only access attributes in models.py via getters/setters
 # Level is NOT allowed to access anything in app.py (Subcontrollers are not permitted
@@ -54,23 +66,40 @@ class Wave(object):
     """
     # LIST ANY ATTRIBUTES (AND THEIR INVARIANTS) HERE IF NECESSARY
     # THE ATTRIBUTES LISTED ARE SUGGESTIONS ONLY AND CAN BE CHANGED AS YOU SEE FIT
-    # Attribute _data: The data from the wave JSON, for reloading 
-    # Invariant: _data is a dict loaded from a JSON file
+    # Attribute _data: The compiled wave file (or wave stream), for reloading 
+    # Invariant: _data is a CompiledWave or a WaveStream
+    #
+    # Attribute _stream: the wave stream the asteroids still come from
+    # Invariant: _stream is the WaveStream _data, or None if _data is a CompiledWave
+    #
+    # Attribute _clock: the time the wave has been played, in seconds
+    # Invariant: _clock is a float >= 0
     #
     # Attribute _ship: The player ship to control 
     # Invariant: _ship is a Ship object
     #
-    # Attribute _asteroids: the asteroids on screen 
-    # Invariant: _asteroids is a list of Asteroid, possibly empty
+    # Attribute _field: the asteroids on screen 
+    # Invariant: _field is an AsteroidField object, possibly empty
     #
-    # Attribute _bullets: the bullets currently on screen 
-    # Invariant: _bullets is a list of Bullet, possibly empty
+    # Attribute _pool: the bullets currently on screen 
+    # Invariant: _pool is a BulletPool object, possibly empty
     #
     # Attribute _lives: the number of lives left 
     # Invariant: _lives is an int >= 0
     #
     # Attribute _firerate: the number of frames until the player can fire again 
     # Invariant: _firerate is an int >= 0
+    #
+    # Attribute _grid: the broadphase for collisions, rebuilt every frame
+    # Invariant: _grid is a SpatialHash object
+    #
+    # Attribute _seed: the seed of the random number generator for this wave
+    # Invariant: _seed is an int
+    #
+    # Attribute _rng: the random number generator for this wave; all random 
+    #            choices in the wave must come from it, so that a wave can be 
+    #            replayed from its seed and input
+    # Invariant: _rng is a random.Random object
     
     # GETTERS AND SETTERS (ONLY ADD IF YOU NEED THEM)
     def set_lives(self, value):
@@ -120,9 +149,24 @@ class Wave(object):
     
     def get_asteroid_count(self):
         """
-        Returns len(self._asteroids)
+        Returns the number of asteroids in self._field
+        """
+        return self._field.get_count()
+    
+    def has_pending(self):
+        """
+        Returns True if asteroids are still to come from the wave stream
         """
-        return len(self._asteroids)
+        return not self._stream is None and not self._stream.is_done()
+
+    def is_cleared(self):
+        """
+        Returns True if every asteroid of the wave has been destroyed
+        
+        This is the case when there are no asteroids on screen, and none still 
+        to come from the wave stream.
+        """
+        return self._field.get_count() == 0 and not self.has_pending()
     
     def get_hit(self):
         """
@@ -130,6 +174,56 @@ class Wave(object):
         """
         return self._hit
     
+    def get_seed(self):
+        """
+        Returns self._seed
+        """
+        return self._seed
+    
+    def get_rng(self):
+        """
+        Returns self._rng
+        """
+        return self._rng
+    
+    def get_state_hash(self):
+        """
+        Returns a checksum of the state of the wave
+        
+        The checksum covers the ship (position, velocity and angle), every 
+        asteroid (position, velocity and size), every bullet (position and 
+        velocity), the score and the lives. Two waves with the same checksum 
+        are (almost certainly) in the same state, so comparing checksums frame 
+        by frame catches a replay that has drifted from its recording.
+        """
+        ship = self._ship
+        v = ship.get_velocity()
+        h = zlib.crc32(struct.pack('<5d3q', ship.x, ship.y, v.x, v.y, ship.angle, 
+                                   self._score, self._lives, self._field.get_count()))
+        h = zlib.crc32(self._field.get_positions().tobytes(), h)
+        h = zlib.crc32(self._field.get_velocities().tobytes(), h)
+        h = zlib.crc32(self._field.get_sizes().tobytes(), h)
+        h = zlib.crc32(self._pool.get_positions().tobytes(), h)
+        return zlib.crc32(self._pool.get_velocities().tobytes(), h)
+    
+    def get_ship(self):
+        """
+        Returns self._ship
+        """
+        return self._ship
+    
+    def get_field(self):
+        """
+        Returns self._field
+        """
+        return self._field
+    
+    def get_pool(self):
+        """
+        Returns self._pool
+        """
+        return self._pool
+    
     def get_lives_label(self):
         """
         Returns self._lives_label
@@ -141,70 +235,82 @@ class Wave(object):
         Returns self._asteroid_label
         """
         return self._asteroid_label
+    
+    def get_score_label(self):
+        """
+        Returns self._score_label
+        """
+        return self._score_label
 
     
     # INITIALIZER (standard form) TO CREATE SHIP AND ASTEROIDS
-    def __init__(self, data):
+    def __init__(self, data, seed=None):
         """
         Initializes Wave object
-        Parameter
+        
+        The asteroids of a wave stream are not added here, but when the wave 
+        reaches their spawn time (see update). Only the ones due at time 0 are 
+        added right away, and at most STREAM_SPAWN_LIMIT asteroids are added 
+        per frame, so that a wave stream of any size starts just as fast.
+        
+        Parameter data: the wave loaded from a JSON file, its compiled form 
+        (a dict is compiled first, which checks it), or a wave stream
+        Precondition: data is a dict, a CompiledWave or a WaveStream that no 
+        other Wave has read from
+        Parameter seed: the seed for the random number generator (None to pick 
+        one from the current time; use get_seed to find out which)
+        Precondition: seed is None or an int
         """
+        assert seed is None or isinstance(seed, int)
+        if seed is None:
+            seed = int(datetime.datetime.now().timestamp() * 1000000)
+        self._seed = seed
+        self._rng = random.Random(seed)
+        if type(data) == dict:
+            data = CompiledWave.from_json(data)
         self._data = data
-        self._ship = Ship(position = self._data['ship']['position'], \
-                          angle = self._data['ship']['angle'])
-        self._asteroids = []
-        self.create_asteroids(self._data['asteroids']) 
-        self._bullets = []
+        self._ship = Ship(position = data.get_ship_position(), \
+                          angle = data.get_ship_angle())
+        self._field = AsteroidField()
+        self._clock = 0.0
+        self._stream = None
+        if isinstance(data, WaveStream):
+            self._stream = data
+            self.spawn_asteroids()
+        else:
+            self._field.add_many(data.get_kinds(), data.get_positions(), 
+                                 data.get_directions())
+        self._pool = BulletPool()
+        self._grid = SpatialHash()
         self._last_shot = BULLET_RATE
         self._lives = SHIP_LIVES
         self._hit = False
         self._reset_ship_time = 0
         self._life_lost = False
         self._score = 0
-        self._asteroid_label = GLabel(text = f"Asteroids\n Left: \n{len(self._asteroids)}", \
+        self._asteroid_label = GBitmapLabel(text = f"Asteroids\n Left: \n{self.get_asteroid_count()}", \
                                 font_size = 20, font_name = MESSAGE_FONT, x = 50, y = 650)
-        self._lives_label = GLabel(text = f"Lives\n Left: \n{self._lives}", \
+        self._lives_label = GBitmapLabel(text = f"Lives\n Left: \n{self._lives}", \
                                 font_size = 20, font_name = MESSAGE_FONT, x = 750, y = 650)
-        self._score_label = GLabel(text = f"Score: \n{self._score}", \
+        self._score_label = GBitmapLabel(text = f"Score: \n{self._score}", \
                                 font_size = 20, font_name = MESSAGE_FONT, x = 400, y = 650)
 
-    def create_asteroids(self, data):
-        for i in data:
-            size = i['size']
-            position = i['position']
-            direction = i['direction']    
-        
-            if size == 'small':
-                image, width, height, speed = SMALL_IMAGE, SMALL_RADIUS*2,\
-                      SMALL_RADIUS*2, SMALL_SPEED
-                            
-            if size == 'medium':
-                image, width, height, speed = MEDIUM_IMAGE, MEDIUM_RADIUS*2, \
-                    MEDIUM_RADIUS*2, MEDIUM_SPEED
-                
-            if size == 'large':
-                image, width, height, speed = LARGE_IMAGE, LARGE_RADIUS*2, \
-                    LARGE_RADIUS*2,  LARGE_SPEED
-
-            a = Asteroid(size=size, position = position, \
-                        direction = direction, image = image, width = width, \
-                            height = height)
-            
-            self._asteroids.append(a)
-    
     # UPDATE METHOD TO MOVE THE SHIP, ASTEROIDS, AND BULLETS
     def update(self, dt, input):
+        self._clock += dt
+        if not self._stream is None:
+            self.spawn_asteroids()
+        self._ship.save_transform()
         self._ship.turn(dt, input)
         self._ship.update(dt)
-        for i in self._asteroids:
-            i.update(dt)
+        self._field.update(dt)
 
         if input.is_key_down('spacebar') and self._last_shot >= BULLET_RATE:
             p = (self._ship.x, self._ship.y)
             f = (self._ship.get_facing().x, self._ship.get_facing().y)
             b = (p[0] + f[0] * SHIP_RADIUS, p[1] + f[1] * SHIP_RADIUS)
             v = (f[0] * BULLET_SPEED, f[1] * BULLET_SPEED)
-            self._bullets.append(Bullet(b, v))
+            self._pool.spawn(b, v)
             self._last_shot = 0
 
         self.collide()
@@ -223,84 +329,184 @@ class Wave(object):
     # DRAW METHOD TO DRAW THE SHIP, ASTEROIDS, AND BULLETS
     def draw(self, view):
         self._ship.draw(view)
-        for i in self._asteroids:
-            i.draw(view)
-        for i in self._bullets:
-            i.draw(view)
+        self._field.draw(view)
+        self._pool.draw(view)
         self._asteroid_label.draw(view)
         self._lives_label.draw(view)    
         self._score_label.draw(view)    
 
+    def close(self):
+        """
+        Closes the file of the wave stream, if there is one
+        
+        Call this once the wave is over or abandoned. The wave can still be 
+        drawn, but no more asteroids will spawn unless it is restored from a 
+        snapshot, which opens the file again.
+        """
+        if not self._stream is None:
+            self._stream.close()
+    
+    def spawn_asteroids(self):
+        """
+        Adds the asteroids of the wave stream that are due by now
+        
+        No more than STREAM_SPAWN_LIMIT asteroids are added at a time; the rest 
+        are added on the following frames.
+        """
+        kinds, positions, directions = self._stream.read(self._clock)
+        if len(kinds) > 0:
+            self._field.add_many(kinds, positions, directions)
+
     def remove_bullets(self, dt):
-        i = 0
-        while i < len(self._bullets):
-            b = self._bullets[i]
-            b.update(dt)
-            #horizontal wrapping
-            if b.x < -DEAD_ZONE or b.x > GAME_WIDTH + DEAD_ZONE or \
-                b.y < -DEAD_ZONE or b.y > GAME_WIDTH + DEAD_ZONE:
-                self._bullets.remove(b)
-            else:
-                i += 1
+        self._pool.update(dt)
 
-    def overlap(self, one, two):
-        d = math.sqrt((two.x - one.x)**2 + (two.y - one.y)**2)
-        r1 = one.width / 2
-        r2 = two.width / 2
-        r = r1 + r2
-        return d < r
-    
     def collide(self):
-        db = []
-        da = []
-        hit = False
-        for i in self._bullets:
-            for el in self._asteroids:
-                if self.overlap(i, el):
-                    db.append(i)
-                    da.append(el)
-                    hit = True
-                    if el.width > SMALL_RADIUS * 2:
-                        self.break_ast(el, i._velocity)
-                    break
-        if hit:
+        field = self._field
+        self._grid.build(field.get_positions(), field.get_radii())
+
+        slots = self._pool.get_slots()
+        pairs = self._grid.overlapping(self._pool.get_positions(), BULLET_RADIUS)
+        bullets, asteroids = first_hits(*pairs)
+
+        if len(bullets) > 0:
             self._score += 1
+            large = field.get_radii()[asteroids] > SMALL_RADIUS
+            velocities = self._pool.get_velocities()[bullets[large]]
+            self.break_ast(asteroids[large], velocities)
 
-        self._bullets = [i for i in self._bullets if i not in db]
-        self._asteroids = [i for i in self._asteroids if i not in da]
+            self._pool.despawn(slots[bullets])
+            field.remove(asteroids)
 
         if self._ship:
-            for i in self._asteroids:
-                if self.overlap(self._ship, i):
-                    if not self._life_lost:
-                        self._lives -= 1
-                        self._hit = True
+            index, x, y = wrap_images(field.get_positions(), GRID_CELL_SIZE)
+            dx = x - self._ship.x
+            dy = y - self._ship.y
+            r = field.get_radii()[index] + self._ship.width / 2
+            touching = np.unique(index[dx*dx + dy*dy < r*r])
+            if not self._life_lost and len(touching) > 0:
+                self._lives -= len(touching)
+                self._hit = True
     
-    def break_ast(self, asteroid, velocity):
-        size = 'medium' if asteroid._size == 'large' else 'small'
-        radius = MEDIUM_RADIUS if asteroid._size == 'large' else SMALL_RADIUS
-        speed = MEDIUM_SPEED if asteroid._size == 'large' else SMALL_SPEED
-        image = MEDIUM_IMAGE if asteroid._size == 'large' else SMALL_IMAGE
+    def break_ast(self, indices, velocities):
+        """
+        Breaks the asteroids at the given indices into three smaller ones each
+        
+        The new asteroids are added to the end of self._field, three for each 
+        asteroid in order. One of them moves in the direction of the bullet 
+        that hit the asteroid, the others at 120 degrees to either side. The 
+        broken asteroids themselves are not removed.
+        
+        Parameter indices: the indices of the asteroids to break
+        Precondition: indices is an int array of large or medium asteroids
+        
+        Parameter velocities: the velocities of the bullets that hit them
+        Precondition: velocities is a float array of shape (len(indices),2)
+        """
+        field = self._field
+        if len(indices) == 0:
+            return
+        kinds = field.get_sizes()[indices] - 1
+        radius = np.take(ASTEROID_RADII, kinds)[:, None, None]
+        centers = field.get_positions()[indices][:, None, :]
 
-        collision = Vector2(velocity[0], velocity[1]).normalize()
-        resultants = [collision]
+        length = np.sqrt(velocities[:, 0]*velocities[:, 0] + velocities[:, 1]*velocities[:, 1])
+        cx = velocities[:, 0] / length
+        cy = velocities[:, 1] / length
+        resultants = [np.stack((cx, cy), axis=1)]
 
         for i in [120, -120]:
             theta = math.radians(i)
-            x = collision.x * math.cos(theta) - collision.y * math.sin(theta)
-            y = collision.x * math.sin(theta) + collision.y * math.cos(theta)
-            resultants.append(Vector2(x, y).normalize())
+            x = cx * math.cos(theta) - cy * math.sin(theta)
+            y = cx * math.sin(theta) + cy * math.cos(theta)
+            length = np.sqrt(x*x + y*y)
+            resultants.append(np.stack((x / length, y / length), axis=1))
 
-        for i in resultants:
-            position = (asteroid.x + i.x * radius, asteroid.y + i.y * radius)
-            velocity = (i.x * speed, i.y * speed)
-            self._asteroids.append(Asteroid(size, position, (i.x, i.y), image, radius * 2, \
-                                            radius * 2))
+        directions = np.stack(resultants, axis=1)
+        positions = centers + directions * radius
+        field.add_many(np.repeat(kinds, 3), positions.reshape(-1, 2), directions.reshape(-1, 2))
+    
+    # SNAPSHOT METHODS FOR SAVING AND RESTORING THE WAVE
+    def snapshot(self):
+        """
+        Returns the state of the wave as a compact binary blob
+        
+        The blob holds the ship (position, velocity, angle and facing), every 
+        asteroid (size, position and velocity), every bullet, the frame 
+        counters, lives, score, the state of the random number generator and 
+        how far the wave stream has been read. It does not hold the wave data 
+        itself; restore the blob into a Wave made from the same wave file.
+        """
+        ship = self._ship
+        v = ship.get_velocity()
+        f = ship.get_facing()
+        field = self._field
+        pool = self._pool
+        bullets = pool.get_slots()
+        version, state, gauss = self._rng.getstate()
+        return b''.join([
+            _SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, self._seed),
+            _SNAPSHOT_SHIP.pack(ship.x, ship.y, v.x, v.y, ship.angle, f.x, f.y),
+            _SNAPSHOT_STATE.pack(self._last_shot, self._lives, self._score, 
+                                 self._reset_ship_time, self._hit, self._life_lost, 
+                                 field.get_count(), len(bullets), pool.get_misses()),
+            field.get_positions().tobytes(), field.get_velocities().tobytes(), 
+            field.get_sizes().tobytes(), 
+            pool.get_positions().tobytes(), pool.get_velocities().tobytes(),
+            _SNAPSHOT_RNG.pack(*state, gauss is not None, gauss or 0.0),
+            _SNAPSHOT_STREAM.pack(self._clock, -1 if self._stream is None 
+                                  else self._stream.get_offset())])
+    
+    def restore(self, blob):
+        """
+        Puts the wave back in the state saved in blob
+        
+        The ship is moved rather than replaced, and the asteroids and bullets 
+        are drawn from the restored arrays the next time the wave is drawn.
+        
+        Parameter blob: a snapshot of this wave
+        Precondition: blob is a bytes object returned by snapshot on a Wave 
+        made from the same wave data
+        """
+        magic, version, seed = _SNAPSHOT_HEADER.unpack_from(blob, 0)
+        assert magic == SNAPSHOT_MAGIC, 'not a wave snapshot'
+        assert version == SNAPSHOT_VERSION, 'unsupported snapshot version %d' % version
+        pos = _SNAPSHOT_HEADER.size
+        x, y, vx, vy, angle, fx, fy = _SNAPSHOT_SHIP.unpack_from(blob, pos)
+        pos += _SNAPSHOT_SHIP.size
+        (self._last_shot, self._lives, self._score, self._reset_ship_time, 
+         self._hit, self._life_lost, n, k, misses) = _SNAPSHOT_STATE.unpack_from(blob, pos)
+        pos += _SNAPSHOT_STATE.size
+        
+        arrays = []
+        for (count, dtype) in [(2*n, np.float64), (2*n, np.float64), (n, np.int8), 
+                               (2*k, np.float64), (2*k, np.float64)]:
+            arrays.append(np.frombuffer(blob, dtype, count, pos))
+            pos += arrays[-1].nbytes
+        state = _SNAPSHOT_RNG.unpack_from(blob, pos)
+        pos += _SNAPSHOT_RNG.size
+        self._clock, offset = _SNAPSHOT_STREAM.unpack_from(blob, pos)
+        
+        self._ship.x = x
+        self._ship.y = y
+        self._ship.angle = angle
+        self._ship.set_velocity(vx, vy)
+        self._ship.set_facing(fx, fy)
+        self._ship.snap()
+        self._field.load(arrays[2], arrays[0].reshape(n, 2), arrays[1].reshape(n, 2))
+        self._pool.load(arrays[3].reshape(k, 2), arrays[4].reshape(k, 2), misses)
+        self._seed = seed
+        self._rng.setstate((random.Random.VERSION, state[:625], state[626] if state[625] else None))
+        if not self._stream is None:
+            self._stream.seek(offset)
+        
+        text = f"Lives\n Left: \n{self._lives}"
+        if self._lives_label.text != text:
+            self._lives_label.text = text
     
     # RESET METHOD FOR CREATING A NEW LIFE
     def reset_ship(self):
-        self._ship = Ship(position = self._data['ship']['position'], \
-                          angle = self._data['ship']['angle'])
+        self._ship = Ship(position = self._data.get_ship_position(), \
+                          angle = self._data.get_ship_angle())
         
         self._hit = False
         self._reset_ship_time = 0
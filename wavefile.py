@@ -0,0 +1,558 @@
+"""
+Compiled wave files for Planetoids
+
+A wave file is a JSON file in the Data folder (see Data/wave1.json). Reading
+one means parsing the JSON, checking it, and turning every asteroid's size name
+into a size class. This module does all of that once per file. A CompiledWave
+holds a checked wave as packed arrays (size class, position and direction of
+every asteroid), ready to hand to AsteroidField.add_many.
+
+CompiledWave.load keeps the waves it compiles in memory, keyed by the path and
+the modification time of the file. Loading the same wave again (such as when
+the game restarts) only costs a call to os.stat. If it is given a folder, it
+also saves the compiled waves there in a small binary format, so that later
+runs of the game skip the JSON as well. A file that changes is compiled again.
+
+A wave too large to read at once can be saved as a wave stream instead, which
+is a JSON Lines file (ending in .jsonl). The first line holds everything but
+the asteroids (version, comment and ship), and every other line holds a single
+asteroid, with an optional spawn "time" in seconds (0 if missing):
+
+    {"version": 1.0, "ship": {"position": [400, 350], "angle": 90}}
+    {"time": 0, "size": "large", "position": [100, 600], "direction": [1, 0]}
+    {"time": 2.5, "size": "small", "position": [700, 80], "direction": [0, -1]}
+
+The asteroids must be in order of time. A WaveStream reads the lines as the
+wave reaches their time, so opening a wave stream takes the same time and
+memory whatever its size. Use open_wave to open either kind of wave file.
+"""
+from consts import *
+import numpy as np
+import struct
+import json
+import zlib
+import os
+
+# The wave file version that can be compiled
+WAVE_VERSION = 1.0
+
+# The first bytes of a compiled wave file
+COMPILED_MAGIC = b'PWVC'
+
+# The version of the compiled wave file format
+COMPILED_VERSION = 1
+
+# The header of a compiled wave: magic, version, source mtime (ns) and size,
+# wave version, asteroid count, ship x, ship y and ship angle
+COMPILED_HEADER = struct.Struct('<4sBqqdIddd')
+
+# The file extension of a wave stream
+STREAM_EXTENSION = '.jsonl'
+
+# The most asteroids a wave stream hands out at a time (see WaveStream.read)
+STREAM_SPAWN_LIMIT = 512
+
+
+def open_wave(path, folder=None):
+    """
+    Returns the wave in the given file, ready to give to Wave
+
+    A wave stream (a file ending in STREAM_EXTENSION) is opened as a new
+    WaveStream. Any other file is loaded with CompiledWave.load.
+
+    Parameter path: the path to the wave file
+    Precondition: path is a string naming a valid wave file or wave stream
+
+    Parameter folder: the folder of compiled waves, or None for none
+    Precondition: folder is None or a string naming a folder
+    """
+    if path.endswith(STREAM_EXTENSION):
+        return WaveStream(path)
+    return CompiledWave.load(path, folder)
+
+
+class CompiledWave(object):
+    """
+    A class representing a wave file, checked and packed into arrays.
+
+    A compiled wave should be treated as immutable, since the compiled waves
+    loaded by load are shared by every caller.
+    """
+    # Attribute CACHE: the waves compiled by load, by absolute path
+    # Invariant: CACHE is a dict mapping each path to a pair (stamp, wave),
+    #            where stamp is the (mtime, size) of the file when compiled
+    CACHE = {}
+
+    # Attribute _version: the version of the wave file
+    # Invariant: _version is a float equal to WAVE_VERSION
+    #
+    # Attribute _ship_position: the initial position of the ship
+    # Invariant: _ship_position is a tuple of two floats
+    #
+    # Attribute _ship_angle: the initial angle of the ship
+    # Invariant: _ship_angle is a float
+    #
+    # Attribute _kinds: the size class of each asteroid (index into ASTEROID_SIZES)
+    # Invariant: _kinds is an int8 array of shape (k,)
+    #
+    # Attribute _positions: the initial center of each asteroid
+    # Invariant: _positions is a float array of shape (k,2)
+    #
+    # Attribute _directions: the direction of movement of each asteroid
+    # Invariant: _directions is a float array of shape (k,2)
+
+    # GETTERS AND SETTERS (ONLY ADD IF YOU NEED THEM)
+    def get_version(self):
+        """
+        Returns self._version
+        """
+        return self._version
+
+    def get_ship_position(self):
+        """
+        Returns self._ship_position
+        """
+        return self._ship_position
+
+    def get_ship_angle(self):
+        """
+        Returns self._ship_angle
+        """
+        return self._ship_angle
+
+    def get_count(self):
+        """
+        Returns the number of asteroids in the wave
+        """
+        return len(self._kinds)
+
+    def get_kinds(self):
+        """
+        Returns self._kinds
+        """
+        return self._kinds
+
+    def get_positions(self):
+        """
+        Returns self._positions
+        """
+        return self._positions
+
+    def get_directions(self):
+        """
+        Returns self._directions
+        """
+        return self._directions
+
+    # INITIALIZER
+    def __init__(self, ship_position, ship_angle, kinds, positions, directions,
+                 version=WAVE_VERSION):
+        """
+        Initializes a compiled wave from its arrays
+
+        Use from_json to compile the contents of a wave file.
+
+        Parameter ship_position: the initial position of the ship
+        Precondition: ship_position is a pair of numbers
+
+        Parameter ship_angle: the initial angle of the ship
+        Precondition: ship_angle is a number
+
+        Parameter kinds: the size class of each asteroid
+        Precondition: kinds is an int array of shape (k,) with values in
+        range(len(ASTEROID_SIZES))
+
+        Parameter positions: the initial center of each asteroid
+        Precondition: positions is a number array of shape (k,2)
+
+        Parameter directions: the direction of movement of each asteroid
+        Precondition: directions is a number array of shape (k,2)
+
+        Parameter version: the version of the wave file
+        Precondition: version is a number
+        """
+        self._version = float(version)
+        self._ship_position = (float(ship_position[0]), float(ship_position[1]))
+        self._ship_angle = float(ship_angle)
+        self._kinds = np.asarray(kinds, dtype=np.int8).reshape(-1)
+        self._positions = np.asarray(positions, dtype=float).reshape(-1, 2)
+        self._directions = np.asarray(directions, dtype=float).reshape(-1, 2)
+        assert len(self._positions) == len(self._kinds) == len(self._directions)
+
+    @classmethod
+    def from_json(cls, data):
+        """
+        Returns the compiled form of the given wave, after checking it
+
+        This method fails an assertion if the wave is not a valid wave of
+        version WAVE_VERSION.
+
+        Parameter data: the wave, as loaded from a JSON file
+        Precondition: data is a dict
+        """
+        assert type(data) == dict, 'a wave must be a JSON object'
+        version = data.get('version')
+        _check_version(version)
+
+        ship = data.get('ship')
+        _check_ship(ship)
+
+        asteroids = data.get('asteroids')
+        assert type(asteroids) == list, 'the wave has no asteroid list'
+        kinds = [_check_asteroid(asteroid, i) for (i, asteroid) in enumerate(asteroids)]
+
+        positions = [asteroid['position'] for asteroid in asteroids]
+        directions = [asteroid['direction'] for asteroid in asteroids]
+        return cls(ship['position'], ship['angle'], kinds, positions, directions,
+                   version)
+
+    @classmethod
+    def load(cls, path, folder=None):
+        """
+        Returns the compiled wave in the given wave file
+
+        The wave comes from CACHE if the file has not changed since it was
+        compiled. Otherwise, if folder is not None, it comes from the compiled
+        copy in folder (if there is one for this version of the file). Only if
+        both fail is the JSON parsed and compiled, and the result is saved in
+        folder (if not None) as well as in CACHE.
+
+        Parameter path: the path to the wave file
+        Precondition: path is a string naming a valid wave JSON file
+
+        Parameter folder: the folder of compiled waves, or None for none
+        Precondition: folder is None or a string naming a folder
+        """
+        path = os.path.abspath(path)
+        info = os.stat(path)
+        stamp = (info.st_mtime_ns, info.st_size)
+        if path in cls.CACHE and cls.CACHE[path][0] == stamp:
+            return cls.CACHE[path][1]
+
+        wave = None
+        if not folder is None:
+            name = os.path.splitext(os.path.basename(path))[0]
+            copy = os.path.join(folder, '%s-%08x.pwc' % (name, zlib.crc32(path.encode('utf-8'))))
+            wave = _read_copy(copy, stamp)
+        if wave is None:
+            with open(path) as f:
+                wave = cls.from_json(json.load(f))
+            if not folder is None:
+                os.makedirs(folder, exist_ok=True)
+                with open(copy, 'wb') as f:
+                    f.write(wave.to_bytes(stamp))
+
+        cls.CACHE[path] = (stamp, wave)
+        return wave
+
+    def to_bytes(self, stamp=(0, 0)):
+        """
+        Returns the wave in the binary compiled wave format
+
+        Parameter stamp: the (mtime, size) of the wave file it was compiled from
+        Precondition: stamp is a pair of ints
+        """
+        header = COMPILED_HEADER.pack(COMPILED_MAGIC, COMPILED_VERSION, stamp[0],
+                                      stamp[1], self._version, len(self._kinds),
+                                      self._ship_position[0], self._ship_position[1],
+                                      self._ship_angle)
+        return b''.join([header, self._kinds.tobytes(),
+                         self._positions.astype('<f8').tobytes(),
+                         self._directions.astype('<f8').tobytes()])
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Returns a pair (stamp, wave) for the wave stored in data
+
+        The stamp is the (mtime, size) of the wave file it was compiled from.
+
+        Parameter data: the bytes of a compiled wave file
+        Precondition: data is a bytes object
+        """
+        fields = COMPILED_HEADER.unpack_from(data, 0)
+        magic, version, mtime, size, wave, count, x, y, angle = fields
+        assert magic == COMPILED_MAGIC, 'not a compiled wave'
+        assert version == COMPILED_VERSION, 'unsupported compiled wave version %d' % version
+
+        pos = COMPILED_HEADER.size
+        kinds = np.frombuffer(data, dtype=np.int8, count=count, offset=pos)
+        pos += count
+        positions = np.frombuffer(data, dtype='<f8', count=2*count, offset=pos)
+        pos += 16 * count
+        directions = np.frombuffer(data, dtype='<f8', count=2*count, offset=pos)
+        return ((mtime, size), cls((x, y), angle, kinds, positions, directions, wave))
+
+
+class WaveStream(object):
+    """
+    A class representing a wave stream, read a few asteroids at a time.
+
+    A wave stream has the same getters for the ship as a CompiledWave, but it
+    hands out its asteroids with read, in order of spawn time. Only the line
+    of the next asteroid is held in memory. The file is closed once the last
+    asteroid is read.
+
+    Unlike a CompiledWave, a WaveStream changes as it is read, so every Wave
+    needs a WaveStream of its own. A stream that is not read to the end must be 
+    closed (Wave.close does this), or be used in a with statement.
+    """
+    # Attribute _path: the path to the wave stream
+    # Invariant: _path is a string
+    #
+    # Attribute _file: the open wave stream, or None once it is read to the end
+    # Invariant: _file is None or a file opened in binary mode
+    #
+    # Attribute _version: the version of the wave file
+    # Invariant: _version is a float equal to WAVE_VERSION
+    #
+    # Attribute _ship_position: the initial position of the ship
+    # Invariant: _ship_position is a tuple of two floats
+    #
+    # Attribute _ship_angle: the initial angle of the ship
+    # Invariant: _ship_angle is a float
+    #
+    # Attribute _next: the next asteroid to hand out, or None if there are no more
+    # Invariant: _next is None or a tuple (time, kind, position, direction)
+    #
+    # Attribute _offset: the position in the file of the line of _next
+    # Invariant: _offset is an int >= 0
+    #
+    # Attribute _line: the line number of _next (for error messages)
+    # Invariant: _line is an int >= 1
+
+    # GETTERS AND SETTERS (ONLY ADD IF YOU NEED THEM)
+    def get_path(self):
+        """
+        Returns self._path
+        """
+        return self._path
+
+    def get_version(self):
+        """
+        Returns self._version
+        """
+        return self._version
+
+    def get_ship_position(self):
+        """
+        Returns self._ship_position
+        """
+        return self._ship_position
+
+    def get_ship_angle(self):
+        """
+        Returns self._ship_angle
+        """
+        return self._ship_angle
+
+    def get_offset(self):
+        """
+        Returns the position in the file of the next asteroid (see seek)
+        """
+        return self._offset
+
+    def get_next_time(self):
+        """
+        Returns the spawn time of the next asteroid, or None if there are no more
+        """
+        return None if self._next is None else self._next[0]
+
+    def is_done(self):
+        """
+        Returns True if every asteroid has been read, or the stream is closed
+        """
+        return self._next is None
+
+    # INITIALIZER
+    def __init__(self, path):
+        """
+        Opens the given wave stream, reading the first line and the first asteroid
+
+        Parameter path: the path to the wave stream
+        Precondition: path is a string naming a valid wave stream
+        """
+        self._path = path
+        self._file = open(path, 'rb')
+        header = json.loads(self._file.readline())
+        assert type(header) == dict, 'a wave stream must start with a JSON object'
+        _check_version(header.get('version'))
+        ship = header.get('ship')
+        _check_ship(ship)
+        self._version = float(header['version'])
+        self._ship_position = (float(ship['position'][0]), float(ship['position'][1]))
+        self._ship_angle = float(ship['angle'])
+        self._line = 1
+        self._next = None
+        self._advance(float('-inf'))
+
+    def __enter__(self):
+        """
+        Returns this stream, for use in a with statement
+        """
+        return self
+
+    def __exit__(self, type, value, traceback):
+        """
+        Closes this stream at the end of a with statement
+        """
+        self.close()
+
+    # PUBLIC METHODS
+    def read(self, until, limit=STREAM_SPAWN_LIMIT):
+        """
+        Returns the asteroids due by the given time, as the arrays (kinds, 
+        positions, directions)
+
+        The asteroids are the ones after those already read, up to the first 
+        one whose spawn time is later than until, but no more than limit of 
+        them. The rest are left for the next call.
+
+        Parameter until: the time of the wave, in seconds
+        Precondition: until is a number
+
+        Parameter limit: the most asteroids to read
+        Precondition: limit is an int > 0
+        """
+        kinds = []
+        positions = []
+        directions = []
+        while not self._next is None and self._next[0] <= until and len(kinds) < limit:
+            time, kind, position, direction = self._next
+            kinds.append(kind)
+            positions.append(position)
+            directions.append(direction)
+            self._advance(time)
+        return (np.array(kinds, dtype=np.int8), np.array(positions, dtype=float).reshape(-1, 2),
+                np.array(directions, dtype=float).reshape(-1, 2))
+
+    def seek(self, offset):
+        """
+        Moves back (or ahead) to the asteroid at the given position in the file
+
+        Parameter offset: the position of an asteroid line
+        Precondition: offset is an int returned by get_offset on a stream of 
+        the same file
+        """
+        if self._file is None:
+            self._file = open(self._path, 'rb')
+        self._file.seek(offset)
+        self._next = None
+        self._advance(float('-inf'))
+
+    def close(self):
+        """
+        Closes the file, if it is still open
+
+        No more asteroids are read from a closed stream, but it can still be 
+        moved back with seek, which opens the file again.
+        """
+        self._next = None
+        if not self._file is None:
+            self._file.close()
+            self._file = None
+
+    # HELPER METHODS
+    def _advance(self, last):
+        """
+        Reads the next asteroid into self._next, closing the file at the end
+
+        Parameter last: the spawn time of the asteroid before it
+        Precondition: last is a number
+        """
+        line = b''
+        while not line.strip():
+            self._offset = self._file.tell()
+            line = self._file.readline()
+            self._line += 1
+            if not line:
+                self._next = None
+                self.close()
+                return
+
+        asteroid = json.loads(line)
+        kind = _check_asteroid(asteroid, self._line)
+        time = asteroid.get('time', 0)
+        assert _is_number(time), 'asteroid %d has a time that is not a number' % self._line
+        assert time >= last, 'asteroid %d is out of order' % self._line
+        self._next = (time, kind, asteroid['position'], asteroid['direction'])
+
+
+# HELPER FUNCTIONS
+def _is_number(value):
+    """
+    Returns True if value is an int or float (but not a bool)
+
+    Parameter value: the value to check
+    Precondition: NONE (value can be anything)
+    """
+    return type(value) in (int, float)
+
+
+def _is_pair(value):
+    """
+    Returns True if value is a list of two numbers
+
+    Parameter value: the value to check
+    Precondition: NONE (value can be anything)
+    """
+    return type(value) == list and len(value) == 2 and all(map(_is_number, value))
+
+
+def _check_version(version):
+    """
+    Fails an assertion unless version is a wave version that can be compiled
+
+    Parameter version: the version from the wave file
+    Precondition: NONE (version can be anything)
+    """
+    assert type(version) in (int, float), 'the wave has no version'
+    assert version == WAVE_VERSION, 'unsupported wave version %s' % version
+
+
+def _check_ship(ship):
+    """
+    Fails an assertion unless ship is a valid ship object
+
+    Parameter ship: the ship from the wave file
+    Precondition: NONE (ship can be anything)
+    """
+    assert type(ship) == dict, 'the wave has no ship'
+    assert _is_pair(ship.get('position')), 'the ship position is not a pair'
+    assert _is_number(ship.get('angle')), 'the ship angle is not a number'
+
+
+def _check_asteroid(asteroid, i):
+    """
+    Returns the size class of the given asteroid, after checking it
+
+    Parameter asteroid: the asteroid from the wave file
+    Precondition: NONE (asteroid can be anything)
+
+    Parameter i: the number of the asteroid (for error messages)
+    Precondition: i is an int
+    """
+    assert type(asteroid) == dict, 'asteroid %d is not an object' % i
+    size = asteroid.get('size')
+    assert size in ASTEROID_SIZES, 'asteroid %d has no valid size' % i
+    assert _is_pair(asteroid.get('position')), 'asteroid %d has no position' % i
+    assert _is_pair(asteroid.get('direction')), 'asteroid %d has no direction' % i
+    return ASTEROID_SIZES.index(size)
+
+
+def _read_copy(path, stamp):
+    """
+    Returns the compiled wave saved in path, or None if it is missing or stale
+
+    Parameter path: the path to the compiled wave file
+    Precondition: path is a string
+
+    Parameter stamp: the (mtime, size) of the wave file now
+    Precondition: stamp is a pair of ints
+    """
+    try:
+        with open(path, 'rb') as f:
+            saved, wave = CompiledWave.from_bytes(f.read())
+    except (OSError, AssertionError, struct.error, ValueError):
+        return None
+    return wave if saved == stamp else None